@@ -18,6 +18,24 @@ import test.stats_manager_tests
 import test.seq_helper_tests
 import test.cds_tests
 import test.exon_tests
+import test.fasta_index_tests
+import test.mapped_genome_tests
+import test.twobit_tests
+import test.compressed_file_tests
+import test.gff_attributes_tests
+import test.snapshot_tests
+import test.diagnostic_sinks_tests
+import test.genome_index_tests
+import test.interval_index_tests
+import test.seq_view_tests
+import test.edit_plan_tests
+import test.feature_table_tests
+import test.memory_usage_tests
+import test.stats_accumulator_tests
+import test.distributions_tests
+import test.alt_stats_tests
+import test.parallel_stats_tests
+import test.assembly_stats_tests
 
 # get suites from test modules
 suite1 = test.fasta_reader_tests.suite()
@@ -36,6 +54,24 @@ suite14 = test.stats_manager_tests.suite()
 suite15 = test.seq_helper_tests.suite()
 suite16 = test.cds_tests.suite()
 suite17 = test.exon_tests.suite()
+suite18 = test.fasta_index_tests.suite()
+suite19 = test.mapped_genome_tests.suite()
+suite20 = test.twobit_tests.suite()
+suite21 = test.compressed_file_tests.suite()
+suite22 = test.gff_attributes_tests.suite()
+suite23 = test.snapshot_tests.suite()
+suite24 = test.diagnostic_sinks_tests.suite()
+suite25 = test.genome_index_tests.suite()
+suite26 = test.interval_index_tests.suite()
+suite27 = test.seq_view_tests.suite()
+suite28 = test.edit_plan_tests.suite()
+suite29 = test.feature_table_tests.suite()
+suite30 = test.memory_usage_tests.suite()
+suite31 = test.stats_accumulator_tests.suite()
+suite32 = test.distributions_tests.suite()
+suite33 = test.alt_stats_tests.suite()
+suite34 = test.parallel_stats_tests.suite()
+suite35 = test.assembly_stats_tests.suite()
 
 # collect suites in a TestSuite object
 suite = unittest.TestSuite()
@@ -55,6 +91,24 @@ suite.addTest(suite14)
 suite.addTest(suite15)
 suite.addTest(suite16)
 suite.addTest(suite17)
+suite.addTest(suite18)
+suite.addTest(suite19)
+suite.addTest(suite20)
+suite.addTest(suite21)
+suite.addTest(suite22)
+suite.addTest(suite23)
+suite.addTest(suite24)
+suite.addTest(suite25)
+suite.addTest(suite26)
+suite.addTest(suite27)
+suite.addTest(suite28)
+suite.addTest(suite29)
+suite.addTest(suite30)
+suite.addTest(suite31)
+suite.addTest(suite32)
+suite.addTest(suite33)
+suite.addTest(suite34)
+suite.addTest(suite35)
 
 # run suite
 unittest.TextTestRunner(verbosity=2).run(suite)
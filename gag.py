@@ -80,8 +80,30 @@ class GagCmd(GagCmdBase):
 
     def help_load(self):
         print("\nThis command takes you the GAG LOAD menu. There you can specify the location of")
-        print("your files and load them into memory.")
-        print("Alternately, just type 'load <path>' and avoid the submenu altogether.\n")
+        print("your files and load them into memory. genome.fasta and genome.gff may also be")
+        print("gzipped or bgzipped (genome.fasta.gz, genome.gff.bgz, ...).")
+        print("Alternately, just type 'load <path>' and avoid the submenu altogether.")
+        print("Options can follow the path as name=value pairs:\n")
+        print("  fasta=twobit    keep the bases in memory packed 2 bits per base")
+        print("  fasta=indexed   leave the bases on disk and read them through a .fai index")
+        print("  fasta=mmap      memory-map a flat copy of the bases, shared between GAG processes")
+        print("  threads=N       threads used to decompress bgzipped input (default: one per CPU)")
+        print("  workers=N       processes used to parse an uncompressed fasta and gff, and to")
+        print("                  compute per-sequence stats (default: 1)")
+        print("  stats=table     work out 'info' stats on the modified genome from a NumPy table of")
+        print("                  feature coordinates, with filters as array masks (needs NumPy)")
+        print("  gff=stream      leave the gff on disk and read it one sequence at a time when")
+        print("                  writing; needs a gff sorted by seqid. Only 'info' and 'write'")
+        print("                  see the genes.")
+        print("  comments=X      what to do with gff comment lines: 'off' to drop them, 'count'")
+        print("                  to count them, or a file to write them to")
+        print("                  (default: genome.comments.gff)")
+        print("  invalid=X       the same for invalid gff lines (default: genome.invalid.gff)")
+        print("  ignored=X       the same for ignored features (default: genome.ignored.gff)")
+        print("  snapshot=on     save a snapshot of the parsed genome, and restore it on later")
+        print("                  loads of the same files with the same options; snapshots are")
+        print("                  kept in ~/.cache/gag (or $XDG_CACHE_HOME/gag)")
+        print("")
 
     def do_load(self, line):
         path_to_load = line.strip()
@@ -142,7 +164,7 @@ class GagCmd(GagCmdBase):
 
     def help_view(self):
         print("\nThis command takes you to the GAG VIEW menu.")
-        print("There you can view cds, gene or sequence features on screen.\n")
+        print("There you can view cds, gene, sequence or region features on screen.\n")
 
     def do_view(self, line):
         if self.controller.genome_is_loaded():
@@ -160,13 +182,24 @@ class GagCmd(GagCmdBase):
     def help_info(self):
         print("\nPrints summary statistics about original genome (from file)" +\
                 " and modified genome (filters and fixes applied).")
-        print("May take a moment to run.\n")
+        print("May take a moment to run.")
+        print("Type 'info distributions' to see medians, percentiles, N50 and histograms of")
+        print("gene, mRNA, exon, intron and CDS lengths (needs NumPy).")
+        print("Type 'info assembly' to see GC and N content, N gaps, scaffold N50/L50 and the")
+        print("soft-masked fraction of the loaded bases.")
+        print("Type 'info memory' to see how much memory the annotation takes up.\n")
 
     def do_info(self, line):
-        if self.controller.genome_is_loaded():
-            print(try_catch(self.controller.stats, None))
-        else:
+        reports = {"": self.controller.stats,\
+                "assembly": self.controller.assembly_report,\
+                "distributions": self.controller.distributions_report,\
+                "memory": self.controller.memory_report}
+        if not self.controller.genome_is_loaded():
             print(self.no_genome_message)
+        elif line.strip() not in reports:
+            print("Usage: info [assembly|distributions|memory]\n")
+        else:
+            print(try_catch(reports[line.strip()], None))
 
 
 ##############################################
@@ -392,6 +425,7 @@ class LoadCmd(GagCmdBase):
         self.helptext = "\nThis is the GAG LOAD menu.\n"+\
                 "Type the path to a folder containing your .fasta and .gff files.\n"+\
                 "To use the current directory, just hit enter.\n"+\
+                "Options may follow the path, e.g. 'my_genome fasta=indexed'.\n"+\
                 "You can type 'home' at any time to return to the main GAG console.\n"+\
                 "You'll be returned automatically once your genome is loaded.\n\n"+\
                 "Folder path?\n"
@@ -437,9 +471,9 @@ class ViewCmd(GagCmdBase):
     def __init__(self, prompt_prefix, controller, line):
         GagCmdBase.__init__(self)
         self.helptext = "\nWelcome to the GAG VIEW menu.\n"+\
-                "You can view at the cds, gene, or seq level. Please type your choice.\n"+\
+                "You can view at the cds, gene, seq or region level. Please type your choice.\n"+\
                 "(Type 'home' at any time to return to the main GAG console.)\n\n"+\
-                "cds, gene or seq?\n"
+                "cds, gene, seq or region?\n"
         self.prompt = prompt_prefix[:-2] + " VIEW> "
         self.controller = controller
         self.context = {"go_home": False}
@@ -475,6 +509,12 @@ class ViewCmd(GagCmdBase):
         if self.context["go_home"]:
             return True
 
+    def do_region(self, line):
+        regioncmd = ViewRegionCmd(self.prompt, self.controller, self.context, line)
+        regioncmd.cmdloop()
+        if self.context["go_home"]:
+            return True
+
     def do_genome(self, line):
         genomecmd = WriteGenomeCmd(self.prompt, self.controller, self.context, line)
         genomecmd.cmdloop()
@@ -483,7 +523,7 @@ class ViewCmd(GagCmdBase):
 
     def default(self, line):
         response = "\nSorry, I don't know how to display " + line + ".\n"
-        response += "Please choose 'cds', 'gene' or 'seq',"
+        response += "Please choose 'cds', 'gene', 'seq' or 'region',"
         response += "or type 'home' to return to the main menu.\n"
         print(response)
         print(self.helptext)
@@ -846,6 +886,55 @@ class ViewSeqCmd(GagCmdBase):
 
 ################################################
 
+class ViewRegionCmd(GagCmdBase):
+
+    def __init__(self, prompt_prefix, controller, context, line):
+        GagCmdBase.__init__(self)
+        self.helptext = "\nWelcome to the GAG VIEW REGION menu.\n"+\
+                "(Type 'home' at any time to return to the main GAG console.)\n"+\
+                "Please type a seq id followed by start and stop bases to view\n"+\
+                "the genes with any feature in that region, in gff format.\n\n"+\
+                "seq id, start base, stop base?\n"
+        self.prompt = prompt_prefix[:-2] + " REGION> "
+        self.controller = controller
+        self.context = context
+        if line:
+            self.cmdqueue = [line] # Execute default method with passed-in line
+        else:
+            print(self.helptext)
+
+    def help_home(self):
+        print("\nExit this console and return to the main GAG console.\n")
+
+    def do_home(self, line):
+        self.context["go_home"] = True
+        return True
+
+    def help_viewregion(self):
+        print(self.helptext)
+        print(self.controller.get_n_seq_ids(5))
+
+    def emptyline(self):
+        print(self.helptext)
+        print(self.controller.get_n_seq_ids(5))
+
+    def default(self, line):
+        args = line.split()
+        seq_id = args[0]
+        if not self.controller.contains_seq(seq_id):
+            print("\nSorry, couldn't find seq id '" + seq_id + "'.")
+            print(self.controller.get_n_seq_ids(5))
+            print("seq id, start base, stop base?\n")
+        elif len(args) != 3 or not args[1].isdigit() or not args[2].isdigit():
+            print("\nPlease type a seq id followed by start and stop bases.")
+            print("seq id, start base, stop base?\n")
+        else:
+            print("\n" + try_catch(self.controller.barf_region, [line]))
+            self.context["go_home"] = True
+            return True
+
+################################################
+
 class WriteCmd(GagCmdBase):
 
     def __init__(self, prompt_prefix, controller, line):
@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+
+import bisect
+import heapq
+from src.stats_accumulator import StatsAccumulator, segment_length, shorter
+
+# Stats that are plain sums over genes and mRNAs; 'gagflags' is the flag count
+SUMMED = ["Number of genes", "Number of mRNAs", "Number of exons", "Number of introns", "Number of CDS",\
+        "CDS: complete", "CDS: start, no stop", "CDS: stop, no start", "CDS: no stop, no start",\
+        "Total gene length", "Total mRNA length", "Total exon length", "Total intron length",\
+        "Total CDS length", "gagflags"]
+# The StatsAccumulator fields an mRNA adds to each of those sums
+MRNA_SUMS = [("Number of mRNAs", 'mrnas'), ("Number of exons", 'exons'),\
+        ("Number of introns", 'introns'), ("Number of CDS", 'cds'), ("CDS: complete", 'complete'),\
+        ("CDS: start, no stop", 'start_no_stop'), ("CDS: stop, no start", 'stop_no_start'),\
+        ("CDS: no stop, no start", 'no_stop_no_start'), ("Total mRNA length", 'total_mrna_length'),\
+        ("Total exon length", 'total_exon_length'), ("Total intron length", 'total_intron_length'),\
+        ("Total CDS length", 'total_cds_length')]
+MRNA_SUM_POSITIONS = [SUMMED.index(key) for key, field in MRNA_SUMS]
+GAGFLAGS = SUMMED.index("gagflags")
+LONGEST = ["Longest gene", "Longest mRNA", "Longest exon", "Longest intron", "Longest CDS"]
+SHORTEST = ["Shortest gene", "Shortest mRNA", "Shortest CDS"]
+# Per-seq folds of per-gene values (see ShortestFold)
+FOLDED = ["Shortest exon", "Shortest intron"]
+
+def has_duplicate_ids(seqs):
+    """Returns True if any seq holds two genes, or any gene two mRNAs, with the same id.
+
+    Filters remove genes and mRNAs by id, so with duplicates which one goes
+    depends on order and can't be worked out feature by feature.
+    """
+    for seq in seqs:
+        ids = [gene.identifier for gene in seq.genes]
+        if len(set(ids)) != len(ids):
+            return True
+        for gene in seq.genes:
+            ids = gene.get_mrna_ids()
+            if len(set(ids)) != len(ids):
+                return True
+    return False
+
+def flagged_range(values, flags_below, arg):
+    """Returns the (start, stop) slice of sorted values that a filter with this arg flags."""
+    if flags_below:
+        return 0, bisect.bisect_left(values, arg)
+    if arg <= 0:
+        # 'longer than' filters are off at 0
+        return len(values), len(values)
+    return bisect.bisect_right(values, arg), len(values)
+
+def changed_range(values, flags_below, old, new):
+    """Returns the slice of sorted values whose outcome may differ between two
+    (arg, remove) settings of a filter."""
+    old_start, old_stop = flagged_range(values, flags_below, old[0])
+    new_start, new_stop = flagged_range(values, flags_below, new[0])
+    if old[1] != new[1]:
+        # Everything flagged either way is now removed instead of flagged, or the reverse
+        return min(old_start, new_start), max(old_stop, new_stop)
+    if flags_below:
+        return min(old_stop, new_stop), max(old_stop, new_stop)
+    return min(old_start, new_start), max(old_start, new_start)
+
+
+class HeapMultiset:
+    """A multiset of numbers whose smallest (or largest) member is kept in a heap.
+
+    Removed values are only dropped from the heap when they reach the top.
+    """
+
+    def __init__(self, largest=False):
+        self.sign = -1 if largest else 1
+        self.counts = {}
+        self.heap = []
+
+    def add(self, value):
+        count = self.counts.get(value, 0)
+        if not count:
+            heapq.heappush(self.heap, self.sign * value)
+        self.counts[value] = count + 1
+
+    def remove(self, value):
+        count = self.counts[value] - 1
+        if count:
+            self.counts[value] = count
+        else:
+            del self.counts[value]
+
+    def top(self):
+        """Returns the smallest (or largest) value, or 0 if there are none."""
+        while self.heap and self.sign * self.heap[0] not in self.counts:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return 0
+        return self.sign * self.heap[0]
+
+
+class ShortestFold:
+    """The 'shortest exon' (or intron) fold over one seq's genes, kept up to date
+    as genes come and go.
+
+    The fold (see stats_accumulator.shorter) comes out as the minimum of the
+    values after the last 0, or 0 if nothing follows it. Positions are the
+    genes' places on the seq; a segment tree holds the nonzero values and a
+    sorted list the positions holding 0.
+    """
+
+    def __init__(self, size):
+        self.size = max(size, 1)
+        self.tree = [None] * (2 * self.size)
+        self.values = [None] * self.size
+        self.zeros = []
+
+    def set(self, position, value):
+        """Sets the value at a gene's position; None if the gene is gone."""
+        if self.values[position] == 0:
+            del self.zeros[bisect.bisect_left(self.zeros, position)]
+        self.values[position] = value
+        if value == 0:
+            bisect.insort(self.zeros, position)
+            value = None
+        i = position + self.size
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = smaller(self.tree[2*i], self.tree[2*i+1])
+            i //= 2
+
+    def result(self):
+        start = self.zeros[-1] + 1 if self.zeros else 0
+        lowest = None
+        low = start + self.size
+        high = 2 * self.size
+        while low < high:
+            if low & 1:
+                lowest = smaller(lowest, self.tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                lowest = smaller(lowest, self.tree[high])
+            low //= 2
+            high //= 2
+        return lowest or 0
+
+def smaller(first, second):
+    """min() where None means 'nothing'."""
+    if first is None:
+        return second
+    if second is None or first < second:
+        return first
+    return second
+
+
+class MRNARecord:
+    """What one mRNA adds to the stats when it survives the filters."""
+
+    def __init__(self, mrna):
+        accumulator = StatsAccumulator()
+        self.shortest_exon, self.shortest_intron = accumulator.add_mrna(mrna)
+        self.sums = tuple(getattr(accumulator, field) for key, field in MRNA_SUMS)
+        self.longest = (("Longest mRNA", accumulator.longest_mrna),\
+                ("Longest exon", accumulator.longest_exon),\
+                ("Longest intron", accumulator.longest_intron),\
+                ("Longest CDS", accumulator.longest_cds))
+        self.shortest = [("Shortest mRNA", accumulator.shortest_mrna)]
+        if accumulator.shortest_cds is not None:
+            self.shortest.append(("Shortest CDS", accumulator.shortest_cds))
+        self.exon_flagged = bool(mrna.exon) and mrna.exon.gagflagged()
+        self.cds_flagged = bool(mrna.cds) and mrna.cds.gagflagged()
+
+
+class IncrementalAltStats:
+    """The 'Modified Genome' stats, kept up to date with deltas as filter settings change.
+
+    Built over seqs with fixes applied but not filters. Each filter's mRNAs
+    (or genes) are kept sorted by the length it tests, so a settings change
+    only revisits the features between the old and new thresholds; the genes
+    whose outcome changes have their old contribution subtracted and the
+    new one added. Mins and maxes are HeapMultisets, and the order-dependent
+    shortest exon and intron folds are ShortestFolds per seq.
+    The numbers match filtering copies of the seqs and running
+    Sequence.stats on each, as long as ids are unique (see usable).
+    """
+
+    def __init__(self, seqs, filter_mgr):
+        self.usable = not has_duplicate_ids(seqs) and all(hasattr(filt, 'measure')\
+                for filt in filter_mgr.filters.values())
+        self.settings = current_settings(filter_mgr)
+        if not self.usable:
+            return
+        self.filters = filter_mgr.filters
+        self.sequence_length = sum([len(seq.bases) for seq in seqs])
+        self.sums = [0] * len(SUMMED)
+        self.longest = dict((key, HeapMultiset(True)) for key in LONGEST)
+        self.shortest = dict((key, HeapMultiset()) for key in SHORTEST)
+        self.folded = dict((key, HeapMultiset()) for key in FOLDED)
+        self.genes = []
+        self.gene_places = []
+        self.gene_lengths = []
+        self.gene_flagged = []
+        self.gene_mrnas = []
+        self.contributions = []
+        self.mrnas = []
+        self.mrna_genes = []
+        self.records = []
+        self.states = []
+        self.folds = []
+        self.fold_results = []
+        for seq_number, seq in enumerate(seqs):
+            self.folds.append(dict((key, ShortestFold(len(seq.genes))) for key in FOLDED))
+            self.fold_results.append(dict((key, 0) for key in FOLDED))
+            for position, gene in enumerate(seq.genes):
+                self.add_gene(gene, seq_number, position)
+        self.indexes = {}
+        for name, filt in self.filters.items():
+            self.indexes[name] = self.build_index(filt)
+        for g in xrange(len(self.genes)):
+            self.rescore_gene(g)
+        self.refresh_folds(range(len(seqs)))
+
+    def add_gene(self, gene, seq_number, position):
+        g = len(self.genes)
+        self.genes.append(gene)
+        self.gene_places.append((seq_number, position))
+        self.gene_lengths.append(segment_length(gene.indices))
+        self.gene_flagged.append(gene.gagflagged())
+        self.gene_mrnas.append([])
+        self.contributions.append(None)
+        for mrna in gene.mrnas:
+            self.gene_mrnas[g].append(len(self.mrnas))
+            self.mrnas.append(mrna)
+            self.mrna_genes.append(g)
+            self.records.append(MRNARecord(mrna))
+            self.states.append(self.mrna_state(len(self.mrnas) - 1))
+
+    def build_index(self, filt):
+        """Returns (sorted lengths, gene or mRNA numbers in the same order) for a filter."""
+        if hasattr(filt, 'flags_gene'):
+            pairs = [(filt.measure(gene), g) for g, gene in enumerate(self.genes)]
+        else:
+            pairs = [(filt.measure(mrna), i) for i, mrna in enumerate(self.mrnas)]
+        pairs = sorted([pair for pair in pairs if pair[0] is not None])
+        return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+    def mrna_state(self, i):
+        """Returns (survives, exon flagged, CDS flagged) for an mRNA under the current filters."""
+        mrna = self.mrnas[i]
+        record = self.records[i]
+        alive = True
+        exon_flagged = record.exon_flagged
+        cds_flagged = record.cds_flagged
+        for filt in self.filters.values():
+            if hasattr(filt, 'flags_mrna') and filt.flags_mrna(mrna):
+                if filt.remove:
+                    alive = False
+                elif filt.flagged_part == 'exon':
+                    exon_flagged = True
+                else:
+                    cds_flagged = True
+        return alive, exon_flagged, cds_flagged
+
+    def gene_contribution(self, g):
+        """Returns what gene g adds to the stats under the current filters, or None if it's removed."""
+        gene = self.genes[g]
+        flagged = self.gene_flagged[g]
+        for filt in self.filters.values():
+            if hasattr(filt, 'flags_gene') and filt.flags_gene(gene):
+                if filt.remove:
+                    return None
+                flagged = True
+        sums = [0] * len(SUMMED)
+        longest = []
+        shortest = []
+        shortest_exon = 0
+        shortest_intron = 0
+        for i in self.gene_mrnas[g]:
+            alive, exon_flagged, cds_flagged = self.states[i]
+            if not alive:
+                continue
+            record = self.records[i]
+            for position, value in zip(MRNA_SUM_POSITIONS, record.sums):
+                sums[position] += value
+            sums[GAGFLAGS] += exon_flagged + cds_flagged
+            longest.extend(record.longest)
+            shortest.extend(record.shortest)
+            shortest_exon = shorter(shortest_exon, record.shortest_exon)
+            shortest_intron = shorter(shortest_intron, record.shortest_intron)
+        if not longest:
+            # Filters remove genes left without mRNAs
+            return None
+        length = self.gene_lengths[g]
+        sums[SUMMED.index("Number of genes")] += 1
+        sums[SUMMED.index("Total gene length")] += length
+        sums[GAGFLAGS] += flagged
+        longest.append(("Longest gene", length))
+        shortest.append(("Shortest gene", length))
+        return tuple(sums), tuple(longest), tuple(shortest), shortest_exon, shortest_intron
+
+    def apply(self, contribution, sign):
+        if contribution is None:
+            return
+        sums, longest, shortest = contribution[:3]
+        for position, value in enumerate(sums):
+            self.sums[position] += sign * value
+        for key, value in longest:
+            if sign > 0:
+                self.longest[key].add(value)
+            else:
+                self.longest[key].remove(value)
+        for key, value in shortest:
+            if sign > 0:
+                self.shortest[key].add(value)
+            else:
+                self.shortest[key].remove(value)
+
+    def rescore_gene(self, g):
+        """Replaces gene g's contribution with its current one; returns True if it changed."""
+        old = self.contributions[g]
+        new = self.gene_contribution(g)
+        if old == new:
+            return False
+        self.apply(old, -1)
+        self.apply(new, 1)
+        self.contributions[g] = new
+        seq_number, position = self.gene_places[g]
+        for key, value in zip(FOLDED, [3, 4]):
+            if new is None:
+                self.folds[seq_number][key].set(position, None)
+            else:
+                self.folds[seq_number][key].set(position, new[value])
+        return True
+
+    def refresh_folds(self, seq_numbers):
+        """Moves the given seqs' fold results into self.folded, where zeros are left out
+        as StatsManager.update_stats leaves them out."""
+        for seq_number in seq_numbers:
+            for key in FOLDED:
+                old = self.fold_results[seq_number][key]
+                new = self.folds[seq_number][key].result()
+                if old == new:
+                    continue
+                if old:
+                    self.folded[key].remove(old)
+                if new:
+                    self.folded[key].add(new)
+                self.fold_results[seq_number][key] = new
+
+    def update(self, filter_mgr):
+        """Brings the stats up to date with filter_mgr's settings; returns how many genes changed."""
+        settings = current_settings(filter_mgr)
+        if not self.usable or settings == self.settings:
+            self.settings = settings
+            return 0
+        mrnas = set()
+        genes = set()
+        for name, filt in self.filters.items():
+            if settings[name] == self.settings[name]:
+                continue
+            values, items = self.indexes[name]
+            start, stop = changed_range(values, filt.flags_below, self.settings[name], settings[name])
+            if hasattr(filt, 'flags_gene'):
+                genes.update(items[start:stop])
+            else:
+                mrnas.update(items[start:stop])
+        self.settings = settings
+        for i in mrnas:
+            state = self.mrna_state(i)
+            if state != self.states[i]:
+                self.states[i] = state
+                genes.add(self.mrna_genes[i])
+        changed = [g for g in genes if self.rescore_gene(g)]
+        self.refresh_folds(set([self.gene_places[g][0] for g in changed]))
+        return len(changed)
+
+    def gagflags(self):
+        return self.sums[GAGFLAGS]
+
+    def stats(self):
+        """Returns the stats in the form Sequence.stats() gives them, for the whole genome."""
+        stats = {"Total sequence length": self.sequence_length}
+        for key, value in zip(SUMMED, self.sums):
+            if key != "gagflags":
+                stats[key] = value
+        for key in LONGEST:
+            stats[key] = self.longest[key].top()
+        for key in SHORTEST:
+            stats[key] = self.shortest[key].top()
+        for key in FOLDED:
+            stats[key] = self.folded[key].top()
+        return stats
+
+def current_settings(filter_mgr):
+    """Returns {filter name: (arg, remove)} for a FilterManager."""
+    return dict((name, (filt.arg, filt.remove)) for name, filt in filter_mgr.filters.items())
+
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+import string
+from src.twobit import TwoBitBases
+
+# How many bases are counted at a time; lazily stored bases are read this much at once
+CHUNK_SIZE = 1 << 20
+# Maps each byte of packed 2-bit bases to how many of its 4 bases are C or G
+GC_PER_BYTE = ''.join([chr(sum([(byte >> shift) & 1 for shift in (6, 4, 2, 0)]))\
+        for byte in range(256)])
+# Turns N and n into 'N' and every other character into '.', so gaps can be found with str.find
+GAP_MARKS = ''.join(['N' if chr(byte) in 'Nn' else '.' for byte in range(256)])
+
+REPORT_ORDER = ["Number of sequences", "Total sequence length", "Longest sequence",\
+        "Shortest sequence", "Scaffold N50", "Scaffold L50", "GC content (%)", "Number of Ns",\
+        "Ns (%)", "Number of N gaps", "Longest N gap", "Mean N gap length", "Soft-masked bases",\
+        "Soft-masked (%)"]
+
+def scaffold_n50(lengths):
+    """Returns (N50, L50) for a list of sequence lengths."""
+    total = sum(lengths)
+    running = 0
+    for count, length in enumerate(sorted(lengths, reverse=True)):
+        running += length
+        if running * 2 >= total:
+            return length, count + 1
+    return 0, 0
+
+def removed_count(chunk, chars):
+    """Returns how many bases in chunk are one of chars, without a Python-level loop."""
+    return len(chunk) - len(chunk.translate(None, chars))
+
+def percent(part, whole):
+    if not whole:
+        return 0.0
+    return round(100.0 * part / whole, 2)
+
+
+class AssemblyStats:
+    """Counts bases across an assembly: GC, Ns, runs of Ns (gaps) and soft-masked bases.
+
+    Bases are counted a chunk at a time with str.translate, str.count and
+    str.find, so Python code runs per chunk and per gap but not per base.
+    TwoBitBases are counted from their packed bytes and N and mask run
+    tables without being decoded.
+    """
+
+    def __init__(self):
+        self.lengths = []
+        self.acgt = 0
+        self.gc = 0
+        self.ns = 0
+        self.masked = 0
+        self.gaps = 0
+        self.gap_length = 0
+        self.longest_gap = 0
+        # Length of an N run that reached the end of the last chunk
+        self.open_gap = 0
+
+    def add_sequence(self, bases):
+        self.lengths.append(len(bases))
+        if isinstance(bases, TwoBitBases):
+            self.add_twobit(bases)
+            return
+        for start in xrange(0, len(bases), CHUNK_SIZE):
+            self.add_chunk(bases[start:start+CHUNK_SIZE])
+        self.close_gap()
+
+    def add_chunk(self, chunk):
+        chunk = str(chunk)
+        self.acgt += removed_count(chunk, 'ACGTacgt')
+        self.gc += removed_count(chunk, 'CGcg')
+        self.masked += removed_count(chunk, string.ascii_lowercase)
+        ns = chunk.count('N') + chunk.count('n')
+        self.ns += ns
+        if not ns:
+            if chunk:
+                self.close_gap()
+            return
+        marks = chunk.translate(GAP_MARKS)
+        start = marks.find('N')
+        while start != -1:
+            if start > 0:
+                # The gap left open by the last chunk, if any, ended before this one
+                self.close_gap()
+            stop = marks.find('.', start)
+            if stop == -1:
+                self.open_gap += len(marks) - start
+                return
+            self.open_gap += stop - start
+            self.close_gap()
+            start = marks.find('N', stop)
+
+    def close_gap(self):
+        if self.open_gap:
+            self.add_gap(self.open_gap)
+            self.open_gap = 0
+
+    def add_gap(self, size):
+        self.gaps += 1
+        self.gap_length += size
+        self.longest_gap = max(self.longest_gap, size)
+
+    def add_twobit(self, bases):
+        # Ns and other IUPAC codes are packed as T, and the padding is T too
+        for start in xrange(0, len(bases.packed), CHUNK_SIZE):
+            counts = str(bases.packed[start:start+CHUNK_SIZE]).translate(GC_PER_BYTE)
+            self.gc += sum([gc * counts.count(chr(gc)) for gc in range(1, 5)])
+        ns = bases.n_count()
+        self.ns += ns
+        self.acgt += len(bases) - ns - len(bases.other_positions)
+        self.masked += bases.masked_count()
+        for size in bases.n_sizes:
+            self.add_gap(size)
+
+    def stats(self):
+        """Returns a dict with a value for each key in REPORT_ORDER."""
+        total = sum(self.lengths)
+        stats = {"Number of sequences": len(self.lengths), "Total sequence length": total,\
+                "Longest sequence": max(self.lengths or [0]),\
+                "Shortest sequence": min(self.lengths or [0])}
+        stats["Scaffold N50"], stats["Scaffold L50"] = scaffold_n50(self.lengths)
+        stats["GC content (%)"] = percent(self.gc, self.acgt)
+        stats["Number of Ns"] = self.ns
+        stats["Ns (%)"] = percent(self.ns, total)
+        stats["Number of N gaps"] = self.gaps
+        stats["Longest N gap"] = self.longest_gap
+        stats["Mean N gap length"] = self.gap_length / self.gaps if self.gaps else 0
+        stats["Soft-masked bases"] = self.masked
+        stats["Soft-masked (%)"] = percent(self.masked, total)
+        return stats
+
@@ -5,6 +5,8 @@ from src.gene_part import *
 
 class CDS(GenePart):
 
+    __slots__ = ('phase',)
+
     def __init__(self, identifier=None, indices=None, \
                  score=None, phase=None, strand=None, parent_id=None):
         GenePart.__init__(self, feature_type='CDS', identifier=identifier, \
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+
+import gzip
+import os
+import struct
+import zlib
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+GZIP_MAGIC = '\x1f\x8b'
+# Suffixes tried, in order, when looking for an input file
+INPUT_SUFFIXES = ['', '.gz', '.bgz']
+
+def find_input(folder, filename):
+    """Returns the path to filename (or a compressed copy of it) in folder, or None."""
+    for suffix in INPUT_SUFFIXES:
+        path = os.path.join(folder, filename + suffix)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def is_gzipped(path):
+    with open(path, 'rb') as infile:
+        return infile.read(2) == GZIP_MAGIC
+
+def is_bgzf(path):
+    """Returns True if the file starts with a BGZF block (gzip with a 'BC' extra subfield)."""
+    with open(path, 'rb') as infile:
+        header = infile.read(12)
+        if len(header) < 12 or header[:2] != GZIP_MAGIC or not ord(header[3]) & 4:
+            return False
+        xlen = struct.unpack('<H', header[10:12])[0]
+        return find_block_size(infile.read(xlen)) is not None
+
+def find_block_size(extra):
+    """Returns BSIZE from a gzip extra field if it has a BGZF subfield, otherwise None."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        subfield_id = extra[pos:pos+2]
+        length = struct.unpack('<H', extra[pos+2:pos+4])[0]
+        if subfield_id == 'BC' and length == 2:
+            return struct.unpack('<H', extra[pos+4:pos+6])[0]
+        pos += 4 + length
+    return None
+
+def open_input(path, threads=None):
+    """Opens a file for reading in binary mode, decompressing it on the fly if it's gzipped.
+
+    BGZF files (bgzip output) are decompressed block by block in a thread
+    pool; other gzip files go through the gzip module.
+    """
+    if not is_gzipped(path):
+        return open(path, 'rb')
+    if is_bgzf(path):
+        return BgzfReader(path, threads)
+    return gzip.open(path, 'rb')
+
+def inflate_block(block):
+    """Decompresses the deflate payload of one raw BGZF block."""
+    xlen = struct.unpack('<H', block[10:12])[0]
+    return zlib.decompress(block[12+xlen:-8], -15)
+
+
+class BgzfReader:
+    """A read-only file object over a BGZF file.
+
+    Raw blocks are read sequentially, but decompressed a batch at a time
+    in a pool of threads (zlib releases the GIL while inflating), with the
+    next batch started before the current one is consumed.
+    """
+
+    # Number of blocks (each up to 64 KB) decompressed per batch
+    batch_size = 64
+
+    def __init__(self, path, threads=None):
+        self.raw = open(path, 'rb')
+        if not threads:
+            threads = cpu_count()
+        self.pool = ThreadPool(threads)
+        self.pending = None
+        self.buffer = ''
+        self.pos = 0
+        self.finished = False
+
+    def read_raw_blocks(self):
+        """Returns up to batch_size undecompressed blocks from the file."""
+        blocks = []
+        while len(blocks) < self.batch_size:
+            header = self.raw.read(12)
+            if len(header) < 12:
+                break
+            if header[:2] != GZIP_MAGIC:
+                raise IOError("Corrupt BGZF block in " + self.raw.name)
+            xlen = struct.unpack('<H', header[10:12])[0]
+            extra = self.raw.read(xlen)
+            block_size = find_block_size(extra)
+            if block_size is None:
+                raise IOError("Missing BGZF block size in " + self.raw.name)
+            rest = self.raw.read(block_size + 1 - 12 - xlen)
+            blocks.append(header + extra + rest)
+        return blocks
+
+    def start_batch(self):
+        blocks = self.read_raw_blocks()
+        if blocks:
+            self.pending = self.pool.map_async(inflate_block, blocks)
+        else:
+            self.pending = None
+
+    def fill_buffer(self):
+        """Appends the next batch of decompressed data to the buffer; returns False at EOF."""
+        if self.finished:
+            return False
+        if self.pending is None:
+            self.start_batch()
+            if self.pending is None:
+                self.finished = True
+                return False
+        data = ''.join(self.pending.get())
+        self.start_batch()
+        if self.pending is None:
+            self.finished = True
+        # Drop what has already been consumed before growing the buffer
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            while self.fill_buffer():
+                pass
+            size = len(self.buffer) - self.pos
+        while len(self.buffer) - self.pos < size and self.fill_buffer():
+            pass
+        result = self.buffer[self.pos:self.pos+size]
+        self.pos += len(result)
+        return result
+
+    def readline(self):
+        newline = self.buffer.find('\n', self.pos)
+        while newline == -1 and self.fill_buffer():
+            newline = self.buffer.find('\n', self.pos)
+        if newline == -1:
+            newline = len(self.buffer) - 1
+        result = self.buffer[self.pos:newline+1]
+        self.pos += len(result)
+        return result
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            yield line
+
+    def close(self):
+        self.raw.close()
+        self.pool.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -4,13 +4,29 @@
 import os
 import sys
 import subprocess
-import copy
+from collections import OrderedDict
 from src.fasta_reader import FastaReader
+from src.sequence import Sequence
 from src.gff_reader import GFFReader
+from src.diagnostic_sinks import SINK_NAMES
+from src.genome_index import GenomeIndex
+from src.seq_view import fixed_view, fixed_copy, with_shared_ids
 from src.annotator import Annotator
 from src.filter_manager import FilterManager
-from src.stats_manager import StatsManager
+from src.stats_manager import StatsManager, format_columns
+from src.memory_usage import annotation_size, shared_strings, format_bytes
+from src.stats_accumulator import StatsAccumulator
+from src.alt_stats import IncrementalAltStats
+import src.feature_table as feature_table
+from src.parallel_stats import parallel_seq_stats
+from src.assembly_stats import AssemblyStats, REPORT_ORDER
+import src.distributions as distributions
 from src.seq_fixer import SeqFixer
+from src.compressed_file import find_input, is_gzipped, open_input
+from src.snapshot import snapshot_path, snapshot_key, load_snapshot, save_snapshot
+
+# How many fixed and filtered seq views ConsoleController keeps for single-gene commands
+FIXED_SEQ_CACHE_SIZE = 16
 
 class ConsoleController:
 
@@ -25,8 +41,33 @@ class ConsoleController:
         self.filter_mgr = FilterManager()
         self.stats_mgr = StatsManager()
         self.seq_fixer = SeqFixer()
+        # Path of a gff loaded with 'gff=stream'; its genes are read only while writing
+        self.streamed_gff = None
+        # Where GFFReader sends comments, invalid and ignored lines (see GFFReader.sinks)
+        self.gff_sinks = {}
+        # Id lookups over self.seqs; see genome_index()
+        self.index = None
+        # Seq -> (settings key, fixed and filtered view), least recently used first; see fixed_seq()
+        self.fixed_seqs = OrderedDict()
+        # Seq -> (settings key, view with fixes but not filters); see fixed_unfiltered_seqs()
+        self.unfiltered_seqs = {}
+        # Stands in for the filters when building views with fixes only
+        self.no_filters = FilterManager()
+        # Incremental 'Modified Genome' stats and the key they were built for; see incremental_stats()
+        self.alt_stats = None
+        self.alt_stats_key = None
+        # Processes used for per-seq stats, from the 'workers' load option
+        self.workers = 1
+        # 'table' to work out 'Modified Genome' stats from a FeatureTable, from the 'stats'
+        # load option; see table_stats()
+        self.stats_engine = 'objects'
+        # The FeatureTable and the key it was built for
+        self.feature_table = None
+        self.feature_table_key = None
 
     def genome_is_loaded(self):
+        if self.streamed_gff and self.seqs:
+            return True
         for seq in self.seqs:
             if seq.genes:
                 return True
@@ -49,12 +90,9 @@ class ConsoleController:
             cds_fasta = open(line+'/genome.cds.fasta', 'w')
             protein_fasta = open(line+'/genome.proteins.fasta', 'w')
 
-            # Deep copy each seq, apply fixes and filters, write
+            # Fix, filter and write one seq at a time
             sys.stderr.write("Writing gff, tbl and fasta...\n")
-            for seq in self.seqs:
-                cseq = copy.deepcopy(seq)
-                self.seq_fixer.fix(cseq)
-                self.filter_mgr.apply_filters(cseq)
+            for cseq in self.fixed_and_filtered_seqs():
                 gff.write(cseq.to_gff())
                 removed_gff.write(cseq.removed_to_gff())
                 tbl.write(cseq.to_tbl())
@@ -72,35 +110,131 @@ class ConsoleController:
             protein_fasta.close()
 
             return "Genome written to " + line
-        
+
+    def fixed_and_filtered_seqs(self):
+        """Yields a view of each seq with fixes and filters applied, leaving self.seqs untouched.
+
+        Cached views are reused (see fixed_seq) but new ones aren't kept, so a pass
+        over the genome doesn't push out the views single-gene commands keep going
+        back to. Views share the genes that fixes and filters
+        don't change with self.seqs, so callers must not modify them. When the gff is
+        being streamed, each seq carries the genes just read for it and is dropped
+        once the caller moves on to the next.
+        """
+        if not self.streamed_gff:
+            for seq in self.seqs:
+                yield self.fixed_seq(seq, remember=False)
+            return
+        for cseq in self.stream_seqs():
+            self.seq_fixer.fix(cseq)
+            self.filter_mgr.apply_filters(cseq)
+            yield cseq
+
+    def stream_seqs(self):
+        """Yields a new Sequence for each loaded seq, holding its genes from the streamed gff.
+
+        Seqs with genes come in the order the gff lists them, followed by
+        the rest in fasta order.
+        """
+        seqs_by_header = {}
+        for seq in self.seqs:
+            seqs_by_header.setdefault(seq.header, seq)
+        seen = set()
+        gffreader = GFFReader(self.gff_sinks)
+        reader = open_input(self.streamed_gff)
+        try:
+            for seq_name, genes in gffreader.read_by_seqid(reader):
+                if seq_name not in seqs_by_header:
+                    continue
+                seen.add(seq_name)
+                cseq = Sequence(seq_name, seqs_by_header[seq_name].bases)
+                for gene in genes:
+                    cseq.add_gene(gene)
+                yield cseq
+        finally:
+            reader.close()
+        for seq in self.seqs:
+            if seq.header not in seen:
+                yield Sequence(seq.header, seq.bases)
+
     def load_folder(self, line):
-        if not line:
-            line = "."
-        fastapath = line + '/genome.fasta'
-        gffpath = line + '/genome.gff'
+        line, options = parse_load_args(line)
+        # Accept gzipped/bgzipped copies of the inputs too
+        fastapath = find_input(line, 'genome.fasta')
+        gffpath = find_input(line, 'genome.gff')
+        threads = int(options.get('threads', 0))
+        workers = int(options.get('workers', 1))
+        self.workers = workers
+        self.stats_engine = options.get('stats', 'objects')
+        self.gff_sinks = {}
+        for name in SINK_NAMES:
+            if name in options:
+                self.gff_sinks[name] = options[name]
 
         # Verify files
-        if not os.path.isfile(fastapath):
-            sys.stderr.write("Failed to find " + fastapath + ". No genome was loaded.")
+        if not fastapath:
+            sys.stderr.write("Failed to find " + line + "/genome.fasta. No genome was loaded.")
             return
-        if not os.path.isfile(gffpath):
-            sys.stderr.write("Failed to find " + gffpath + ". No genome was loaded.")
+        if not gffpath:
+            sys.stderr.write("Failed to find " + line + "/genome.gff. No genome was loaded.")
             return
 
+        # With snapshot=on, restore the parsed genome if a snapshot of these exact inputs,
+        # parsed with the same options, exists. Lazily read bases and streamed gffs hold
+        # file handles, so they aren't snapshotted.
+        fasta_mode = options.get('fasta', 'memory')
+        use_snapshot = options.get('snapshot') == 'on' and fasta_mode in ['memory', 'twobit']\
+                and options.get('gff') != 'stream'
+        if use_snapshot:
+            snapshot_file = snapshot_path(line)
+            use_snapshot = snapshot_file is not None
+        if use_snapshot:
+            key = snapshot_key([fastapath, gffpath], {'fasta': fasta_mode})
+            data = load_snapshot(snapshot_file, key)
+            if data is not None:
+                self.seqs = data['seqs']
+                self.index = None
+                self.fixed_seqs = OrderedDict()
+                self.unfiltered_seqs = {}
+                self.alt_stats = None
+                self.feature_table = None
+                self.stats_mgr.clear_all()
+                self.stats_mgr.ref_stats = data['ref_stats']
+                self.streamed_gff = None
+                sys.stderr.write("Restored genome from " + snapshot_file + ".\n")
+                return
+
         # Read the fasta
         sys.stderr.write("Reading fasta...\n")
-        self.read_fasta(fastapath)
+        self.read_fasta(fastapath, fasta_mode, threads, workers)
+        self.fixed_seqs = OrderedDict()
+        self.unfiltered_seqs = {}
+        self.alt_stats = None
+        self.feature_table = None
         sys.stderr.write("Done.\n")
 
+        # Clear stats; read in new stats
+        self.stats_mgr.clear_all()
+        self.streamed_gff = None
+        if options.get('gff') == 'stream':
+            # Leave the gff on disk; only take a pass through it for stats
+            self.streamed_gff = gffpath
+            sys.stderr.write("Scanning gff...\n")
+            for seq in self.stream_seqs():
+                self.stats_mgr.update_ref(seq.stats())
+            sys.stderr.write("Done.\n")
+            return
+
         # Read the gff
         sys.stderr.write("Reading gff...\n")
-        self.read_gff(gffpath)
+        self.read_gff(gffpath, threads, workers)
         sys.stderr.write("Done.\n")
 
-        # Clear stats; read in new stats
-        self.stats_mgr.clear_all()
-        for seq in self.seqs:
-            self.stats_mgr.update_ref(seq.stats())
+        for stats, gagflags in self.seq_stats(fixed=False):
+            self.stats_mgr.update_ref(stats)
+
+        if use_snapshot:
+            save_snapshot(snapshot_file, key, {'seqs': self.seqs, 'ref_stats': self.stats_mgr.ref_stats})
 
     def set_filter_arg(self, filter_name, val):
         self.filter_mgr.set_filter_arg(filter_name, val)
@@ -114,6 +248,12 @@ class ConsoleController:
     def apply_filters(self):
         for seq in self.seqs:
             self.filter_mgr.apply_filters(seq)
+        # Filters may have removed genes and mRNAs
+        self.index = None
+        self.fixed_seqs = OrderedDict()
+        self.unfiltered_seqs = {}
+        self.alt_stats = None
+        self.feature_table = None
 
     def fix_terminal_ns(self):
         self.seq_fixer.fix_terminal_ns()
@@ -183,16 +323,67 @@ class ConsoleController:
 
 ## Reading in files
 
-    def read_fasta(self, line):
-        reader = FastaReader()
-        self.seqs = reader.read(open(line, 'r'))
+    def read_fasta(self, line, mode='memory', threads=None, workers=1):
+        """Reads a fasta file (optionally gzipped or bgzipped) into self.seqs.
 
-    def read_gff(self, line):
-        gffreader = GFFReader()
-        reader = open(line, 'rb')
-        genes = gffreader.read_file(reader)
+        mode is 'memory' to hold every sequence as a string, 'twobit' to
+        hold them 2-bit packed, 'indexed' to leave the bases on disk and
+        read them through a .fai index, or 'mmap' to memory-map a flat copy
+        of the bases. threads sets how many threads decompress a bgzipped
+        file (default: one per CPU). In 'memory' and 'twobit' mode, workers
+        greater than 1 parses an uncompressed file in that many processes.
+        """
+        reader = FastaReader()
+        if mode == 'twobit':
+            reader.pack_bases = True
+        elif mode == 'mmap':
+            self.seqs = reader.read_mapped(line, threads)
+            return
+        elif mode == 'indexed' and is_gzipped(line):
+            sys.stderr.write("Can't index a compressed fasta; reading it into memory instead.\n")
+        elif mode == 'indexed':
+            try:
+                self.seqs = reader.read_indexed(line)
+                return
+            except ValueError as error:
+                sys.stderr.write(str(error) + " Reading it into memory instead.\n")
+                reader = FastaReader()
+        elif mode != 'memory':
+            sys.stderr.write("Unknown fasta mode '" + mode + "'; reading into memory.\n")
+        if workers > 1 and not is_gzipped(line):
+            self.seqs = reader.read_parallel(line, workers)
+            sys.stderr.write(reader.throughput_message())
+            return
+        infile = open_input(line, threads)
+        self.seqs = reader.read(infile)
+        infile.close()
+        sys.stderr.write(reader.throughput_message())
+
+    def read_gff(self, line, threads=None, workers=1):
+        """Reads a gff file and adds its genes to the loaded seqs.
+
+        With workers greater than 1, an uncompressed file is split up by
+        seqid and parsed in that many processes, and the shards' genes are
+        merged here.
+        """
+        gffreader = GFFReader(self.gff_sinks)
+        if workers > 1 and not is_gzipped(line):
+            genes = gffreader.read_file_parallel(line, workers)
+        else:
+            reader = open_input(line, threads)
+            genes = gffreader.read_file(reader)
+            reader.close()
+        for name in SINK_NAMES:
+            if name in gffreader.sink_counts:
+                sys.stderr.write("Found " + str(gffreader.sink_counts[name]) + " " + name + " lines.\n")
+        # Look seqs up by header once instead of scanning them for every gene
+        seqs_by_header = {}
+        for seq in self.seqs:
+            seqs_by_header.setdefault(seq.header, []).append(seq)
         for gene in genes:
-            self.add_gene(gene)
+            for seq in seqs_by_header.get(gene.seq_name, []):
+                seq.add_gene(gene)
+        self.index = GenomeIndex(self.seqs)
 
 
 ## Output info to console
@@ -201,12 +392,9 @@ class ConsoleController:
         if not self.seqs:
             return self.no_genome_message
         else:
-            for seq in self.seqs:
-                if seq.contains_gene(line):
-                    cseq = copy.deepcopy(seq)
-                    self.seq_fixer.fix(cseq)
-                    self.filter_mgr.apply_filters(cseq)
-                    return cseq.gene_to_gff(line)
+            cseq = self.fixed_gene_view(line)
+            if cseq:
+                return cseq.gene_to_gff(line)
 
     def barf_seq(self, line):
         if not self.seqs:
@@ -214,37 +402,107 @@ class ConsoleController:
         else:
             args = line.split(' ')
             if len(args) == 1:
-                seq_id = args[0]
-                for seq in self.seqs:
-                    if seq.header == seq_id:
-                        cseq = copy.deepcopy(seq)
-                        self.seq_fixer.fix(cseq)
-                        self.filter_mgr.apply_filters(cseq)
-                        return cseq.get_subseq()
+                seq = self.genome_index().get_seq(args[0])
+                if seq:
+                    # Only the bases are shown, so no genes need copying
+                    cseq = fixed_copy(seq, [], self.seq_fixer, self.filter_mgr)
+                    return cseq.get_subseq()
             elif len(args) == 3:
-                seq_id = args[0]
+                seq = self.genome_index().get_seq(args[0])
                 start = int(args[1])
                 stop = int(args[2])
-                for seq in self.seqs:
-                    if seq.header == seq_id:
-                        cseq = copy.deepcopy(seq)
-                        self.seq_fixer.fix(cseq)
-                        self.filter_mgr.apply_filters(cseq)
-                        return cseq.get_subseq(start, stop)
+                if seq:
+                    cseq = fixed_copy(seq, [], self.seq_fixer, self.filter_mgr)
+                    return cseq.get_subseq(start, stop)
             else:
                 return "Usage: barfseq <seq_id> <start_index> <end_index>\n"
 
+    def barf_region(self, line):
+        if not self.seqs:
+            return self.no_genome_message
+        args = line.split()
+        if len(args) != 3:
+            return "Usage: region <seq_id> <start_index> <end_index>\n"
+        seq = self.genome_index().get_seq(args[0])
+        if not seq:
+            return "Error: Couldn't find sequence.\n"
+        # The cached view keeps its interval index between queries
+        return self.fixed_seq(seq).region_to_gff(int(args[1]), int(args[2]))
+
+    def fixed_seq(self, seq, remember=True):
+        """Returns seq with fixes and filters applied, reusing the last result for it
+        while the fixer and filter settings and its genes haven't changed.
+
+        Only the FIXED_SEQ_CACHE_SIZE most recently used views are kept, and none
+        are added when remember is False.
+        """
+        view = self.cached_fixed_seq(seq)
+        if view is not None:
+            # Most recently used goes last
+            self.fixed_seqs[seq] = self.fixed_seqs.pop(seq)
+            return view
+        key = (self.seq_fixer.version, self.filter_mgr.version, len(seq.genes))
+        view = fixed_view(seq, self.seq_fixer, self.filter_mgr)
+        if remember:
+            self.fixed_seqs[seq] = (key, view)
+            if len(self.fixed_seqs) > FIXED_SEQ_CACHE_SIZE:
+                self.fixed_seqs.popitem(last=False)
+        return view
+
+    def cached_fixed_seq(self, seq):
+        """Returns the cached fixed and filtered view of seq if it's still current, or None."""
+        key = (self.seq_fixer.version, self.filter_mgr.version, len(seq.genes))
+        cached = self.fixed_seqs.get(seq)
+        if cached and cached[0] == key:
+            return cached[1]
+        return None
+
+    def fixed_gene_view(self, gene_id):
+        """Returns a fixed and filtered copy of the seq holding a gene, with only
+        the genes sharing its id, or None if there's no such gene.
+
+        A cached view of the whole seq (see fixed_seq) is used instead when there
+        is one; otherwise only the genes sharing the id are copied.
+        """
+        found = self.genome_index().get_gene(gene_id)
+        if not found:
+            return None
+        return self.fixed_gene_view_on(found[0], gene_id)
+
+    def fixed_gene_view_on(self, seq, gene_id):
+        """Like fixed_gene_view, for the genes with this id on a given seq."""
+        cached = self.cached_fixed_seq(seq)
+        if cached is not None:
+            return cached
+        genes = [gene for gene in seq.genes if gene.identifier == gene_id]
+        return fixed_copy(seq, genes, self.seq_fixer, self.filter_mgr)
+
+    def fixed_mrna_view(self, mrna_id):
+        """Returns a fixed and filtered copy of the seq holding an mRNA, with only
+        the genes that could hold it after filtering, or None if there's no such mRNA.
+
+        As with fixed_gene_view, a cached view of the whole seq is used if there is one.
+        """
+        found = self.genome_index().get_mrna(mrna_id)
+        if not found:
+            return None
+        seq = self.genome_index().get_seq(found[0].seq_name)
+        if not seq:
+            return None
+        cached = self.cached_fixed_seq(seq)
+        if cached is not None:
+            return cached
+        genes = with_shared_ids(seq, [gene for gene in seq.genes if gene.contains_mrna(mrna_id)])
+        return fixed_copy(seq, genes, self.seq_fixer, self.filter_mgr)
+
     def barf_cds_seq(self, line):
         if not self.seqs:
             return self.no_genome_message
         else:
             name = line
-            for seq in self.seqs:
-                if seq.contains_mrna(name):
-                    cseq = copy.deepcopy(seq)
-                    self.seq_fixer.fix(cseq)
-                    self.filter_mgr.apply_filters(cseq)
-                    return cseq.extract_cds_seq(name)
+            cseq = self.fixed_mrna_view(name)
+            if cseq:
+                return cseq.extract_cds_seq(name)
             return "Error: Couldn't find mRNA.\n"
 
     def cds_to_gff(self, line):
@@ -252,12 +510,9 @@ class ConsoleController:
             return self.no_genome_message
         else:
             name = line
-            for seq in self.seqs:
-                if seq.contains_mrna(name):
-                    cseq = copy.deepcopy(seq)
-                    self.seq_fixer.fix(cseq)
-                    self.filter_mgr.apply_filters(cseq)
-                    return cseq.cds_to_gff(name)
+            cseq = self.fixed_mrna_view(name)
+            if cseq:
+                return cseq.cds_to_gff(name)
             return "Error: Couldn't find mRNA.\n"
 
     def cds_to_tbl(self, line):
@@ -265,12 +520,9 @@ class ConsoleController:
             return self.no_genome_message
         else:
             name = line
-            for seq in self.seqs:
-                if seq.contains_mrna(name):
-                    cseq = copy.deepcopy(seq)
-                    self.seq_fixer.fix(cseq)
-                    self.filter_mgr.apply_filters(cseq)
-                    return cseq.cds_to_tbl(name)
+            cseq = self.fixed_mrna_view(name)
+            if cseq:
+                return cseq.cds_to_tbl(name)
             return "Error: Couldn't find mRNA.\n"
 
     def barf_gene_tbl(self, line):
@@ -278,12 +530,9 @@ class ConsoleController:
             return self.no_genome_message
         else:
             output = ">Feature SeqId\n"
-            for seq in self.seqs:
-                if seq.contains_gene(line):
-                    cseq = copy.deepcopy(seq)
-                    self.seq_fixer.fix(cseq)
-                    self.filter_mgr.apply_filters(cseq)
-                    output += cseq.gene_to_tbl(line)
+            # Every seq holding a gene with this id contributes, not just the first
+            for seq in self.genome_index().get_seqs_with_gene(line):
+                output += self.fixed_gene_view_on(seq, line).gene_to_tbl(line)
             return output
 
     def stats(self):
@@ -295,24 +544,158 @@ class ConsoleController:
             if self.filter_mgr.dirty or self.seq_fixer.dirty:
                 self.stats_mgr.clear_alt()
                 sys.stderr.write("Calculating statistics on genome...\n")
-                for seq in self.seqs:
-                    # Deep copy seq, apply fixes and filters, then update stats
-                    cseq = copy.deepcopy(seq)
-                    self.seq_fixer.fix(cseq)
-                    self.filter_mgr.apply_filters(cseq)
-                    self.stats_mgr.update_alt(cseq.stats())
-                    number_of_gagflags += cseq.number_of_gagflags()
+                if self.stats_engine == 'table':
+                    results = self.table_stats()
+                else:
+                    engine = self.incremental_stats()
+                    results = [(engine.stats(), engine.gagflags())] if engine else None
+                if results is None:
+                    results = self.seq_stats(fixed=True)
+                for stats, gagflags in results:
+                    self.stats_mgr.update_alt(stats)
+                    number_of_gagflags += gagflags
                 self.filter_mgr.dirty = False
                 self.seq_fixer.dirty = False
             last_line = "(" + str(number_of_gagflags) + " features flagged)\n"
             return first_line + self.stats_mgr.summary() + last_line
 
+    def seq_stats(self, fixed):
+        """Yields (stats, number of gagflags) for each seq, with fixes and filters
+        applied if fixed is True.
+
+        With more than one worker the seqs are shared out to a process pool
+        (see parallel_seq_stats); otherwise they're done one after another.
+        """
+        if self.workers > 1 and len(self.seqs) > 1 and not self.streamed_gff:
+            if fixed:
+                results = parallel_seq_stats(self.seqs, self.workers, self.seq_fixer, self.filter_mgr)
+            else:
+                results = parallel_seq_stats(self.seqs, self.workers)
+            for result in results:
+                yield result
+            return
+        if fixed:
+            seqs = self.fixed_and_filtered_seqs()
+        else:
+            seqs = self.seqs
+        for cseq in seqs:
+            accumulator = cseq.stats_accumulator()
+            yield accumulator.stats(len(cseq.bases)), accumulator.gagflags
+
+    def incremental_stats(self):
+        """Returns the IncrementalAltStats for the current fixes and filters, or None
+        if the stats have to be worked out seq by seq.
+
+        The engine is rebuilt when the fixes or the seqs change, and otherwise
+        only updated for the filter settings that changed since it last ran.
+        """
+        if self.streamed_gff:
+            return None
+        key = (self.seq_fixer.version, [(id(seq), len(seq.genes)) for seq in self.seqs])
+        if self.alt_stats is None or self.alt_stats_key != key:
+            self.alt_stats = IncrementalAltStats(self.fixed_unfiltered_seqs(), self.filter_mgr)
+            self.alt_stats_key = key
+        else:
+            self.alt_stats.update(self.filter_mgr)
+        if not self.alt_stats.usable:
+            return None
+        return self.alt_stats
+
+    def table_stats(self):
+        """Returns [(stats, number of gagflags)] for each seq, worked out from a FeatureTable,
+        or None if the stats have to be worked out seq by seq.
+
+        The table is built over the seqs with fixes applied but not filters, and
+        rebuilt when the fixes or the seqs change. Filters are boolean masks over it.
+        """
+        if self.streamed_gff or feature_table.numpy is None:
+            return None
+        key = (self.seq_fixer.version, [(id(seq), len(seq.genes)) for seq in self.seqs])
+        if self.feature_table is None or self.feature_table_key != key:
+            self.feature_table = feature_table.build_feature_table(self.fixed_unfiltered_seqs())
+            self.feature_table_key = key
+        table = self.feature_table
+        if not table.handles(self.filter_mgr):
+            return None
+        gene_mask, mrna_mask = table.filter_masks(self.filter_mgr)
+        gagflags = table.gagflags(self.filter_mgr, gene_mask, mrna_mask)
+        return zip(table.seq_stats(gene_mask, mrna_mask), [int(count) for count in gagflags])
+
+    def fixed_unfiltered_seqs(self):
+        """Returns a view of each seq with fixes applied but not filters.
+
+        The stats engines hold on to these views anyway, so they're kept and
+        reused for the seqs whose genes and fixes haven't changed since.
+        """
+        previous = self.unfiltered_seqs
+        self.unfiltered_seqs = {}
+        views = []
+        for seq in self.seqs:
+            key = (self.seq_fixer.version, len(seq.genes))
+            cached = previous.get(seq)
+            if not cached or cached[0] != key:
+                cached = (key, fixed_view(seq, self.seq_fixer, self.no_filters))
+            self.unfiltered_seqs[seq] = cached
+            views.append(cached[1])
+        return views
+
+    def distributions_report(self):
+        """Returns tables of feature length distributions, with fixes and filters applied."""
+        if not self.seqs:
+            return self.no_genome_message
+        if distributions.numpy is None:
+            return "Sorry, length distributions need NumPy; please install it (pip install numpy).\n"
+        accumulator = StatsAccumulator(collect_lengths=True)
+        for cseq in self.fixed_and_filtered_seqs():
+            accumulator.add_genes(cseq.genes)
+        return "Length distributions (fixes and filters applied)\n" +\
+                distributions.format_distributions(accumulator.lengths)
+
+    def assembly_report(self):
+        """Returns a table of base composition, N gap and scaffold length stats for the loaded bases."""
+        if not self.seqs:
+            return self.no_genome_message
+        counts = AssemblyStats()
+        for seq in self.seqs:
+            counts.add_sequence(seq.bases)
+        return "Assembly statistics (bases as loaded)\n" +\
+                format_columns(["Assembly"], REPORT_ORDER, [counts.stats()], 5)
+
+    def memory_report(self):
+        """Returns a table of how much memory the loaded annotation takes up."""
+        if not self.seqs:
+            return self.no_genome_message
+        genes = sum([len(seq.genes) for seq in self.seqs])
+        mrnas = sum([len(gene.mrnas) for seq in self.seqs for gene in seq.genes])
+        size = annotation_size(self.seqs)
+        references, distinct = shared_strings(self.seqs)
+        report = {"Number of genes": genes, "Number of mRNAs": mrnas,\
+                "Annotation memory": format_bytes(size),\
+                "Bytes per mRNA": size / mrnas if mrnas else 0,\
+                "Id, type, strand and source strings": references,\
+                "Distinct string objects": distinct}
+        order = ["Number of genes", "Number of mRNAs", "Annotation memory", "Bytes per mRNA",\
+                "Id, type, strand and source strings", "Distinct string objects"]
+        return format_columns(["Memory"], order, [report], 5)
+
 ## Utility methods
 
+    def genome_index(self):
+        """Returns the GenomeIndex over self.seqs, rebuilding it if the seqs were replaced or changed."""
+        if self.index is None or not self.index.covers(self.seqs):
+            self.index = GenomeIndex(self.seqs)
+        return self.index
+
     def add_gene(self, gene):
         for seq in self.seqs:
             if seq.header == gene.seq_name:
                 seq.add_gene(gene)
+                if self.index is not None and self.index.covers(self.seqs):
+                    self.index.add_gene(seq, gene)
+                self.fixed_seqs.pop(seq, None)
+                self.unfiltered_seqs.pop(seq, None)
+                self.alt_stats = None
+                self.feature_table = None
 
     def get_locus_tag(self):
         locus_tag = ""
@@ -325,24 +708,21 @@ class ConsoleController:
     
     def clear_seqs(self):
         self.seqs[:] = []
+        self.streamed_gff = None
+        self.index = None
+        self.fixed_seqs = OrderedDict()
+        self.unfiltered_seqs = {}
+        self.alt_stats = None
+        self.feature_table = None
 
     def contains_mrna(self, mrna_id):
-        for seq in self.seqs:
-            if seq.contains_mrna(mrna_id):
-                return True
-        return False
+        return self.genome_index().get_mrna(mrna_id) is not None
 
     def contains_gene(self, gene_id):
-        for seq in self.seqs:
-            if seq.contains_gene(gene_id):
-                return True
-        return False
+        return self.genome_index().get_gene(gene_id) is not None
 
     def contains_seq(self, seq_id):
-        for seq in self.seqs:
-            if seq.header == seq_id:
-                return True
-        return False
+        return self.genome_index().get_seq(seq_id) is not None
 
     def can_write_to_path(self, path):
         if len(path.split()) > 1:
@@ -352,6 +732,22 @@ class ConsoleController:
 
 
 ## Utility functions
+def parse_load_args(line):
+    """Splits the argument to 'load' into a folder path and a dict of options.
+
+    Options follow the path as name=value pairs, e.g.
+    'load my_genome fasta=indexed'. The path defaults to '.'.
+    """
+    path = "."
+    options = {}
+    for arg in line.split():
+        if '=' in arg:
+            name, value = arg.split('=', 1)
+            options[name] = value
+        else:
+            path = arg
+    return path, options
+
 def format_list_with_strings(entries):
     if len(entries) == 0:
         return ""
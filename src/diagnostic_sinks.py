@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+# Where GFFReader writes lines that don't become features, by default
+DEFAULT_SINKS = {'comments': 'genome.comments.gff', 'invalid': 'genome.invalid.gff',\
+        'ignored': 'genome.ignored.gff'}
+SINK_NAMES = ['comments', 'invalid', 'ignored']
+# Bytes buffered before a file sink touches the disk
+SINK_BUFFER_SIZE = 1 << 20
+
+class NullSink:
+    """Throws away whatever is written to it."""
+
+    def write(self, text):
+        pass
+
+    def close(self):
+        pass
+
+
+class CountingSink:
+    """Counts the lines written to it instead of keeping them."""
+
+    def __init__(self):
+        self.count = 0
+
+    def write(self, text):
+        self.count += text.count('\n')
+        # The last line of a file may have no newline
+        if text and text[-1] != '\n':
+            self.count += 1
+
+    def close(self):
+        pass
+
+
+def open_sink(setting):
+    """Returns the sink for a setting: None for 'off', a CountingSink for
+    'count', and otherwise a buffered file opened at that path."""
+    if setting == 'off':
+        return None
+    if setting == 'count':
+        return CountingSink()
+    return open(setting, 'w', SINK_BUFFER_SIZE)
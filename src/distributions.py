@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+from src.stats_accumulator import LENGTH_KINDS
+from src.stats_manager import format_columns
+
+# NumPy is only needed for 'info distributions', so GAG runs without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COLUMN_NAMES = ["Gene", "mRNA", "Exon", "Intron", "CDS"]
+PERCENTILES = [10, 25, 50, 75, 90]
+SUMMARY_ORDER = ["Count", "10th percentile", "25th percentile", "Median", "75th percentile",\
+        "90th percentile", "N50", "L50"]
+PERCENTILE_NAMES = {10: "10th percentile", 25: "25th percentile", 50: "Median",\
+        75: "75th percentile", 90: "90th percentile"}
+
+def as_numpy(lengths):
+    """Returns an array('l') of lengths as an int64 NumPy array.
+
+    Where a C long is 64 bits the NumPy array shares the array's memory;
+    elsewhere the lengths are copied once, to widen them.
+    """
+    if not len(lengths):
+        return numpy.zeros(0, dtype=numpy.int64)
+    return numpy.frombuffer(lengths, dtype=numpy.dtype('l')).astype(numpy.int64, copy=False)
+
+def n50(lengths):
+    """Returns (N50, L50) for a NumPy array of lengths.
+
+    N50 is the length such that features at least that long hold half the
+    total length; L50 is how many of those features there are.
+    """
+    if not len(lengths):
+        return 0, 0
+    ordered = numpy.sort(lengths)[::-1]
+    cumulative = numpy.cumsum(ordered)
+    index = numpy.searchsorted(cumulative, cumulative[-1] / 2.0)
+    return int(ordered[index]), int(index) + 1
+
+def summarize(lengths):
+    """Returns a dict of count, percentiles, N50 and L50 for a NumPy array of lengths."""
+    result = {"Count": len(lengths)}
+    if len(lengths):
+        values = numpy.percentile(lengths, PERCENTILES)
+    else:
+        values = [0] * len(PERCENTILES)
+    for percentile, value in zip(PERCENTILES, values):
+        result[PERCENTILE_NAMES[percentile]] = int(round(value))
+    result["N50"], result["L50"] = n50(lengths)
+    return result
+
+def decade_label(power):
+    if power == 0:
+        return "1-9"
+    return str(10**power) + "-" + str(10**(power+1) - 1)
+
+def histograms(columns):
+    """Returns (row labels, one dict per column) counting lengths by power of ten."""
+    longest = max([int(lengths.max()) for lengths in columns if len(lengths)] or [1])
+    edges = [10**power for power in range(len(str(longest)) + 1)]
+    labels = [decade_label(power) for power in range(len(edges) - 1)]
+    counts = []
+    for lengths in columns:
+        bins = numpy.searchsorted(edges, lengths, side='right') - 1
+        column = numpy.bincount(bins, minlength=len(labels))
+        counts.append(dict(zip(labels, [int(count) for count in column])))
+    return labels, counts
+
+def format_distributions(lengths):
+    """Returns tables of length distributions and histograms.
+
+    Args:
+        lengths: a dict of array('l') by kind in LENGTH_KINDS, as collected
+            by a StatsAccumulator
+    """
+    columns = [as_numpy(lengths[kind]) for kind in LENGTH_KINDS]
+    result = format_columns(COLUMN_NAMES, SUMMARY_ORDER, [summarize(column) for column in columns], 5)
+    labels, counts = histograms(columns)
+    result += "\nNumber of features by length (bp)\n"
+    result += format_columns(COLUMN_NAMES, labels, counts, 5)
+    return result
+
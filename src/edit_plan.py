@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+import bisect
+import sys
+
+def overlap(indices1, indices2):
+    """Returns a boolean indicating whether two pairs of indices overlap."""
+    if not (len(indices1) == 2 and len(indices2) ==2):
+        return False
+    if indices1[0] > indices2[0] and indices1[0] < indices2[1]:
+        return True
+    elif indices1[1] > indices2[0] and indices1[1] < indices2[1]:
+        return True
+    else:
+        return False
+
+
+class OffsetMap:
+    """Maps coordinates from before a set of deletions to after them.
+
+    Holds the deleted regions' starts and the running total of bases
+    deleted, so each lookup is a bisect.
+    """
+
+    def __init__(self, regions):
+        self.starts = [region[0] for region in regions]
+        self.removed = []
+        total = 0
+        for start, stop in regions:
+            total += stop - start + 1
+            self.removed.append(total)
+
+    def removed_before(self, index, inclusive=True):
+        """Returns how many bases were deleted in regions starting at or before 'index'.
+
+        With inclusive=False, only regions starting strictly before it count,
+        matching MRNA.adjust_indices.
+        """
+        if inclusive:
+            count = bisect.bisect_right(self.starts, index)
+        else:
+            count = bisect.bisect_left(self.starts, index)
+        if not count:
+            return 0
+        return self.removed[count-1]
+
+    def map(self, index, inclusive=True):
+        """Returns the coordinate 'index' moves to once the deletions are made."""
+        return index - self.removed_before(index, inclusive)
+
+
+def overlaps_deletion(regions, stops, indices):
+    """Returns True if any of the sorted, disjoint regions overlap()s the given indices.
+
+    'stops' holds the regions' stops, for bisecting.
+    """
+    if len(indices) != 2:
+        return False
+    # overlap() needs an end of the region strictly inside the indices
+    i = bisect.bisect_right(stops, indices[0])
+    while i < len(regions) and regions[i][0] < indices[1]:
+        if overlap(regions[i], indices):
+            return True
+        i += 1
+    return False
+
+
+class EditPlan:
+    """A batch of deletions from a Sequence, all given in its current coordinates.
+
+    apply() cuts every region out of the bases in one join and moves each
+    feature's coordinates once, through an OffsetMap. Genes that
+    overlap() a deleted region are dropped, as Sequence.trim_region does.
+    For features outside the deleted regions the result is the same as
+    trimming the regions one at a time.
+    """
+
+    def __init__(self, regions=None):
+        self.deletions = []
+        for region in regions or []:
+            self.delete(region[0], region[1])
+
+    def delete(self, start, stop):
+        """Adds the 1-based, inclusive region start..stop to the plan."""
+        if start > stop:
+            raise ValueError("EditPlan.delete: start " + str(start) + " is after stop " + str(stop))
+        self.deletions.append([start, stop])
+
+    def regions(self):
+        """Returns the planned deletions sorted, with overlapping ones merged."""
+        merged = []
+        for start, stop in sorted(self.deletions):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], stop)
+            else:
+                merged.append([start, stop])
+        return merged
+
+    def offset_map(self):
+        return OffsetMap(self.regions())
+
+    def apply(self, seq):
+        """Makes the planned deletions on seq. Returns the number of bases deleted."""
+        regions = self.regions()
+        if not regions:
+            return 0
+        if regions[-1][1] > len(seq.bases):
+            sys.stderr.write("EditPlan.apply called with a region past the end of the sequence;"+\
+                    " doing nothing.")
+            return 0
+        # Keep the stretches between deletions, joined once
+        pieces = []
+        previous = 0
+        for start, stop in regions:
+            pieces.append(seq.bases[previous:start-1])
+            previous = stop
+        pieces.append(seq.bases[previous:])
+        seq.bases = ''.join(pieces)
+        # Drop genes hit by a deletion and move the rest
+        stops = [region[1] for region in regions]
+        seq.genes = [g for g in seq.genes if not overlaps_deletion(regions, stops, g.indices)]
+        offsets = OffsetMap(regions)
+        for gene in seq.genes:
+            gene.remap_indices(offsets)
+        seq.interval_index = None
+        return offsets.removed[-1]
@@ -5,6 +5,8 @@ from src.gene_part import *
 
 class Exon(GenePart):
 
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         kwargs['feature_type'] = 'exon'
         GenePart.__init__(self, **kwargs)
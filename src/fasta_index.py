@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+import os
+import sys
+from src.lazy_bases import LazyBases
+
+# Characters str.strip() would remove from the ends of a sequence line
+WHITESPACE = ' \t\r\n\x0b\x0c'
+
+def header_to_name(line):
+    """Returns the sequence name from a fasta header line, the same way FastaReader does."""
+    return line[1:].strip().split()[0]
+
+def read_fai(path):
+    """Returns a list of FastaIndexEntry objects read from a .fai file."""
+    entries = []
+    with open(path, 'r') as fai:
+        for line in fai:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 5:
+                continue
+            entries.append(FastaIndexEntry(fields[0], int(fields[1]),\
+                    int(fields[2]), int(fields[3]), int(fields[4])))
+    return entries
+
+def write_fai(path, entries):
+    """Writes a list of FastaIndexEntry objects to a .fai file."""
+    with open(path, 'w') as fai:
+        for entry in entries:
+            fai.write(entry.to_fai())
+
+class FastaIndexEntry:
+
+    def __init__(self, name, length, offset, line_bases, line_width):
+        self.name = name
+        self.length = length
+        self.offset = offset          # byte offset of the first base
+        self.line_bases = line_bases  # bases per full line
+        self.line_width = line_width  # bytes per full line, newline included
+
+    def to_fai(self):
+        fields = [self.name, self.length, self.offset, self.line_bases, self.line_width]
+        return "\t".join([str(field) for field in fields]) + "\n"
+
+    def byte_offset(self, position):
+        """Returns the file offset of a 0-based position in the sequence."""
+        if self.line_bases == 0:
+            return self.offset
+        lines, column = divmod(position, self.line_bases)
+        return self.offset + lines * self.line_width + column
+
+
+class FastaIndex:
+    """A samtools-style .fai index over a fasta file.
+
+    Each entry records where a sequence's bases start in the file and how
+    its lines are laid out, so any range of bases can be read with one
+    seek instead of loading the whole file.
+    """
+
+    def __init__(self, fasta_path):
+        self.fasta_path = fasta_path
+        self.index_path = fasta_path + '.fai'
+        self.entries = []
+        self.handle = None
+
+    def load(self):
+        """Reads the .fai next to the fasta if it is current, otherwise builds and saves one."""
+        if self.index_is_current():
+            self.read_index()
+        else:
+            sys.stderr.write("Indexing " + self.fasta_path + "...\n")
+            self.build()
+            try:
+                self.write_index()
+            except IOError:
+                sys.stderr.write("Couldn't write " + self.index_path + "; continuing without it.\n")
+        return self.entries
+
+    def index_is_current(self):
+        if not os.path.isfile(self.index_path):
+            return False
+        return os.path.getmtime(self.index_path) >= os.path.getmtime(self.fasta_path)
+
+    def read_index(self):
+        self.entries = read_fai(self.index_path)
+
+    def write_index(self):
+        write_fai(self.index_path, self.entries)
+
+    def build(self):
+        """Scans the fasta once, recording offsets and line geometry for each sequence.
+
+        Raises ValueError if a sequence has lines of uneven length, since
+        such a file can't be addressed by offset arithmetic. As in samtools,
+        every line but the last must match the first in both bases and bytes,
+        and the last may be shorter in either but not longer.
+        """
+        self.entries = []
+        entry = None
+        offset = 0
+        short_line_seen = False
+        with open(self.fasta_path, 'rb') as fasta:
+            for line in fasta:
+                line_length = len(line)
+                if line.startswith('>'):
+                    entry = FastaIndexEntry(header_to_name(line), 0, offset + line_length, 0, 0)
+                    self.entries.append(entry)
+                    short_line_seen = False
+                elif entry is not None:
+                    bases = len(line.rstrip('\r\n'))
+                    if bases == 0:
+                        offset += line_length
+                        continue
+                    if entry.line_bases == 0:
+                        entry.line_bases = bases
+                        entry.line_width = line_length
+                    elif short_line_seen or bases > entry.line_bases or line_length > entry.line_width:
+                        raise ValueError("Can't index " + self.fasta_path + ": sequence " +\
+                                entry.name + " has lines of different lengths.")
+                    elif bases < entry.line_bases or line_length < entry.line_width:
+                        short_line_seen = True
+                    entry.length += bases
+                offset += line_length
+        return self.entries
+
+    def get_handle(self):
+        if self.handle is None:
+            self.handle = open(self.fasta_path, 'rb')
+        return self.handle
+
+    def read_bases(self, entry, start, stop):
+        """Returns bases [start, stop) (0-based) of an indexed sequence."""
+        if stop <= start:
+            return ''
+        first = entry.byte_offset(start)
+        last = entry.byte_offset(stop - 1)
+        handle = self.get_handle()
+        handle.seek(first)
+        raw = handle.read(last - first + 1)
+        return raw.translate(None, '\r\n')
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+
+class IndexedBases(LazyBases):
+    """The bases of one sequence in an indexed fasta, read from disk as they're needed."""
+
+    def __init__(self, index, entry):
+        self.index = index
+        self.entry = entry
+
+    def __len__(self):
+        return self.entry.length
+
+    def fetch(self, start, stop):
+        return self.index.read_bases(self.entry, start, stop)
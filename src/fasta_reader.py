@@ -1,25 +1,225 @@
 #!/usr/bin/env python
 
+import gc
+import os
+import time
+from array import array
+from contextlib import contextmanager
+from cStringIO import StringIO
+from multiprocessing import Pool
 from src.sequence import Sequence
+from src.fasta_index import FastaIndex, IndexedBases, WHITESPACE
+from src.mapped_genome import MappedGenome, MappedBases
+from src.twobit import TwoBitBases
+
+@contextmanager
+def gc_paused():
+    """Turns off the cyclic garbage collector for the duration of a bulk load.
+
+    Reading a fasta creates hundreds of thousands of objects that can't
+    form cycles; letting the collector rescan them repeatedly can cost
+    more than the parsing itself.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+def find_record_offsets(fasta_path, block_size=1 << 22):
+    """Returns the byte offset of every '>' that starts a line in a fasta file."""
+    offsets = []
+    position = 0
+    previous = '\n'
+    with open(fasta_path, 'rb') as fasta:
+        while True:
+            block = fasta.read(block_size)
+            if not block:
+                break
+            # Prefix the last byte of the previous block so a header at a block edge is found
+            text = previous + block
+            found = text.find('\n>')
+            while found != -1:
+                offsets.append(position + found)
+                found = text.find('\n>', found + 1)
+            previous = block[-1]
+            position += len(block)
+    return offsets
+
+def split_ranges(offsets, file_size, pieces):
+    """Groups consecutive records into about `pieces` byte ranges of similar size.
+
+    Returns a list of (start, stop) pairs; every range starts at a header.
+    """
+    target = max(1, (file_size - offsets[0]) // pieces)
+    ranges = []
+    start = offsets[0]
+    for offset in offsets[1:]:
+        if offset - start >= target:
+            ranges.append((start, offset))
+            start = offset
+    ranges.append((start, file_size))
+    return ranges
+
+def parse_range(args):
+    """Parses the records in one byte range of a fasta file.
+
+    Runs in a worker process. To keep pickling cheap the result is just
+    three objects: the headers joined by newlines, all of the bases
+    concatenated, and an array of each record's length.
+    """
+    fasta_path, start, stop = args
+    with open(fasta_path, 'rb') as fasta:
+        fasta.seek(start)
+        text = fasta.read(stop - start)
+    seqs = FastaReader().read(StringIO(text))
+    headers = '\n'.join([seq.header for seq in seqs])
+    lengths = array('l', [len(seq.bases) for seq in seqs])
+    return headers, ''.join([seq.bases for seq in seqs]), lengths
+
+def unpack_range(result):
+    """Yields the (header, bases) pairs packed up by parse_range."""
+    headers, bases, lengths = result
+    position = 0
+    for header, length in zip(headers.split('\n'), lengths):
+        yield header, bases[position:position+length]
+        position += length
 
 class FastaReader:
 
-    def __init__(self):
+    # Bytes read from the file at a time
+    block_size = 1 << 22
+
+    def __init__(self, pack_bases=False):
         self.seqs = []
+        self.bytes_read = 0
+        self.seconds = 0.0
+        # If True, store each sequence 2-bit packed as soon as it's read
+        self.pack_bases = pack_bases
+
+    def make_sequence(self, header, bases):
+        if self.pack_bases:
+            bases = TwoBitBases(bases)
+        return Sequence(header, bases)
 
     def read(self, io_buffer):
-        header = ''
-        bases = ''
-        for line in io_buffer:
-            if line[0] == '>':
-                if len(header) > 0:
-                    # Save the data
-                    self.seqs.append(Sequence(header, bases))
-                header = line[1:].strip().split()[0] # Get the next header
-                bases = ''
-            else:
-                bases += line.strip()
+        """Reads sequences from a fasta file object, appending them to self.seqs.
+
+        The file is read in large blocks. Each record's sequence lines are
+        collected as whole-block pieces with the line breaks deleted in one
+        translate call, then joined once when the record ends.
+        """
+        with gc_paused():
+            return self.read_blocks(io_buffer)
+
+    def read_blocks(self, io_buffer):
+        start_time = time.time()
+        self.bytes_read = 0
+        record = {'header': '', 'pieces': []}
+        leftover = ''
+        while True:
+            block = io_buffer.read(self.block_size)
+            if not block:
+                break
+            self.bytes_read += len(block)
+            block = leftover + block
+            # Only hand complete lines to the parser
+            last_newline = block.rfind('\n')
+            if last_newline == -1:
+                leftover = block
+                continue
+            leftover = block[last_newline+1:]
+            self.parse_lines(block[:last_newline+1], record)
+        if leftover:
+            self.parse_lines(leftover + '\n', record)
         # Add the last sequence
-        self.seqs.append(Sequence(header, bases))
+        self.seqs.append(self.make_sequence(record['header'], ''.join(record['pieces'])))
+        self.seconds = time.time() - start_time
+        return self.seqs
+
+    def parse_lines(self, text, record):
+        """Parses a run of complete fasta lines, saving any records that end inside it."""
+        pos = 0
+        if text[0] == '>':
+            header_pos = 0
+        else:
+            header_pos = text.find('\n>')
+            if header_pos != -1:
+                header_pos += 1
+        while header_pos != -1:
+            record['pieces'].append(text[pos:header_pos].translate(None, WHITESPACE))
+            if len(record['header']) > 0:
+                # Save the data
+                self.seqs.append(self.make_sequence(record['header'], ''.join(record['pieces'])))
+            end_of_header = text.find('\n', header_pos)
+            record['header'] = text[header_pos+1:end_of_header].strip().split()[0] # Get the next header
+            record['pieces'] = []
+            pos = end_of_header + 1
+            header_pos = text.find('\n>', end_of_header)
+            if header_pos != -1:
+                header_pos += 1
+        record['pieces'].append(text[pos:].translate(None, WHITESPACE))
+
+    def read_parallel(self, fasta_path, workers):
+        """Reads an uncompressed fasta file with a pool of worker processes.
+
+        A quick scan finds where each record starts; the records are then
+        grouped into byte ranges that the workers parse independently.
+        Sequences are returned in file order. Files with a single record
+        are read the usual way.
+        """
+        start_time = time.time()
+        offsets = find_record_offsets(fasta_path)
+        file_size = os.path.getsize(fasta_path)
+        if workers < 2 or len(offsets) < 2:
+            with open(fasta_path, 'rb') as fasta:
+                return self.read(fasta)
+        # A few ranges per worker keeps them busy when record sizes vary
+        ranges = split_ranges(offsets, file_size, workers * 4)
+        pool = Pool(workers)
+        try:
+            jobs = [(fasta_path, start, stop) for start, stop in ranges]
+            with gc_paused():
+                for result in pool.imap(parse_range, jobs):
+                    for header, bases in unpack_range(result):
+                        self.seqs.append(self.make_sequence(header, bases))
+        finally:
+            pool.close()
+            pool.join()
+        self.bytes_read = file_size
+        self.seconds = time.time() - start_time
         return self.seqs
 
+    def throughput_message(self):
+        """Returns a line reporting how much fasta the last read() parsed and how fast."""
+        megabytes = self.bytes_read / float(1 << 20)
+        if self.seconds > 0:
+            rate = megabytes / self.seconds
+        else:
+            rate = 0.0
+        return "Read %.1f MB of fasta in %.2f s (%.1f MB/s)\n" % (megabytes, self.seconds, rate)
+
+    def read_indexed(self, fasta_path):
+        """Returns Sequences whose bases stay on disk until they're asked for.
+
+        Builds (or reuses) a .fai index next to the fasta file; raises
+        ValueError if the file's line lengths don't allow indexing.
+        """
+        index = FastaIndex(fasta_path)
+        for entry in index.load():
+            self.seqs.append(Sequence(entry.name, IndexedBases(index, entry)))
+        return self.seqs
+
+    def read_mapped(self, fasta_path, threads=None):
+        """Returns Sequences whose bases are slices of a memory-mapped flat copy of the fasta.
+
+        The flat file is written next to the fasta the first time and
+        reused afterward for as long as it is newer than the fasta. The
+        fasta may be gzipped; threads is passed on to the decompressor.
+        """
+        genome = MappedGenome(fasta_path, threads)
+        for entry in genome.load():
+            self.seqs.append(Sequence(entry.name, MappedBases(genome, entry)))
+        return self.seqs
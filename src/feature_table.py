@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+
+import copy
+from src.sequence import Sequence
+from src.alt_stats import has_duplicate_ids
+from src.gff_attributes import stored_attribute
+
+# NumPy is only needed for the feature table, so GAG runs without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STRAND_CODES = {'+': 1, '-': -1}
+# Stored in the phase column for features that have none
+NO_PHASE = -1
+# The FilterManager filters that have a vectorized version here
+MRNA_FILTERS = ['cds_shorter_than', 'cds_longer_than', 'exon_shorter_than', 'exon_longer_than',\
+        'intron_shorter_than', 'intron_longer_than']
+GENE_FILTERS = ['gene_shorter_than', 'gene_longer_than']
+
+def require_numpy():
+    if numpy is None:
+        raise ImportError("The feature table needs NumPy; please install it (pip install numpy).")
+
+def fold_shortest(values, groups, count):
+    """Returns, for each of 'count' groups, the fold GAG uses for its shortest
+    exon and intron stats over that group's values, taken in order.
+
+    The fold keeps the smaller of the current value and the next one, except
+    that a current value of 0 is always replaced, and a 0 in the values
+    therefore restarts it: the result is the minimum of the values after a
+    group's last 0, or 0 if the group is empty or ends with one.
+    """
+    positions = numpy.arange(len(values))
+    last_zero = numpy.full(count, -1, dtype=numpy.int64)
+    zero = values == 0
+    numpy.maximum.at(last_zero, groups[zero], positions[zero])
+    live = positions > last_zero[groups]
+    return group_min(values[live], groups[live], count)
+
+def group_sum(values, groups, count):
+    """Returns the sum of values in each of 'count' groups."""
+    return numpy.bincount(groups, weights=values, minlength=count).astype(numpy.int64)
+
+def group_max(values, groups, count):
+    """Returns the largest value in each of 'count' groups, or 0 for empty groups."""
+    result = numpy.zeros(count, dtype=numpy.int64)
+    numpy.maximum.at(result, groups, values)
+    return result
+
+def group_min(values, groups, count):
+    """Returns the smallest value in each of 'count' groups, or 0 for empty groups."""
+    highest = numpy.iinfo(numpy.int64).max
+    result = numpy.full(count, highest, dtype=numpy.int64)
+    numpy.minimum.at(result, groups, values)
+    result[result == highest] = 0
+    return result
+
+
+class FeatureColumns:
+    """Parallel arrays describing one kind of feature, one row per feature
+    (or per segment, for exons and CDSs).
+
+    'parent' is the row of the parent feature in the next table up: the seq
+    for genes, the gene for mRNAs and the mRNA for exons and CDSs. Strand is
+    1, -1 or 0 and phase is NO_PHASE where a feature has none.
+    """
+
+    def __init__(self, rows):
+        columns = zip(*rows) if rows else [[]] * 6
+        self.seq, self.start, self.end, self.strand, self.phase, self.parent = \
+                [numpy.array(column, dtype=numpy.int64) for column in columns]
+
+    def __len__(self):
+        return len(self.start)
+
+    def lengths(self):
+        return numpy.abs(self.end - self.start) + 1
+
+
+class FeatureTable:
+    """A columnar copy of the genes, mRNAs, exons and CDSs on a list of Sequences.
+
+    Built by build_feature_table(). Genome-wide stats and filter decisions run
+    as array operations over it, and to_seqs() turns it back into objects.
+    Masks passed to its methods are boolean arrays over gene or mRNA rows
+    selecting the features that are kept.
+    """
+
+    def __init__(self, seqs, genes, mrnas, exons, cds, gene_objects, mrna_objects):
+        self.seqs = seqs
+        self.seq_lengths = numpy.array([len(seq.bases) for seq in seqs], dtype=numpy.int64)
+        self.genes = genes
+        self.mrnas = mrnas
+        self.exons = exons
+        self.cds = cds
+        self.gene_objects = gene_objects
+        self.mrna_objects = mrna_objects
+        # Per-mRNA facts the stats need that aren't coordinates
+        self.has_exon = numpy.array([bool(m.exon) for m in mrna_objects], dtype=bool)
+        self.has_cds = numpy.array([bool(m.cds) for m in mrna_objects], dtype=bool)
+        self.has_start = numpy.array([m.has_start() for m in mrna_objects], dtype=bool)
+        self.has_stop = numpy.array([m.has_stop() for m in mrna_objects], dtype=bool)
+        # Which features already carry a gag_flag
+        self.gene_flagged = numpy.array([g.gagflagged() for g in gene_objects], dtype=bool)
+        self.exon_flagged = numpy.array([bool(m.exon) and m.exon.gagflagged() for m in mrna_objects],\
+                dtype=bool)
+        self.cds_flagged = numpy.array([bool(m.cds) and m.cds.gagflagged() for m in mrna_objects],\
+                dtype=bool)
+        self.exon_counts = numpy.bincount(exons.parent, minlength=len(mrnas)).astype(numpy.int64)
+        self.cds_lengths = group_sum(cds.lengths(), cds.parent, len(mrnas))
+
+    def mrnas_kept(self, gene_mask=None, mrna_mask=None):
+        """Returns a boolean array over mRNA rows: kept, with a kept parent gene."""
+        kept = numpy.ones(len(self.mrnas), dtype=bool)
+        if mrna_mask is not None:
+            kept &= mrna_mask
+        if gene_mask is not None:
+            kept &= gene_mask[self.mrnas.parent]
+        return kept
+
+    def introns(self):
+        """Returns (lengths, parent mRNA rows) for the introns MRNA's stats count.
+
+        An intron lies between consecutive exon segments of an mRNA, unless the
+        earlier segment ends at 0, which MRNA.get_longest_intron skips.
+        """
+        exons = self.exons
+        counted = (exons.parent[1:] == exons.parent[:-1]) & (exons.end[:-1] != 0)
+        lengths = numpy.abs(exons.start[1:] - exons.end[:-1]) + 1
+        return lengths[counted], exons.parent[1:][counted]
+
+    def seq_stats(self, gene_mask=None, mrna_mask=None):
+        """Returns one dict per seq with the same numbers as Sequence.stats(),
+        counting only the kept genes and mRNAs."""
+        count = len(self.seqs)
+        gene_kept = numpy.ones(len(self.genes), dtype=bool) if gene_mask is None else gene_mask
+        mrna_kept = self.mrnas_kept(gene_mask, mrna_mask)
+        genes, mrnas, exons = self.genes, self.mrnas, self.exons
+        gene_seq = genes.seq[gene_kept]
+        gene_lengths = genes.lengths()[gene_kept]
+        mrna_seq = mrnas.seq[mrna_kept]
+        mrna_lengths = mrnas.lengths()[mrna_kept]
+        exon_kept = mrna_kept[exons.parent]
+        exon_lengths = exons.lengths()[exon_kept]
+        exon_parent = exons.parent[exon_kept]
+        exon_seq = exons.seq[exon_kept]
+        intron_lengths, intron_parent = self.introns()
+        intron_kept = mrna_kept[intron_parent]
+        intron_seq = mrnas.seq[intron_parent][intron_kept]
+        with_exon = mrna_kept & self.has_exon
+        with_cds = mrna_kept & self.has_cds
+        cds_seq = mrnas.seq[with_cds]
+        cds_lengths = self.cds_lengths[with_cds]
+        starts = self.has_start[mrna_kept]
+        stops = self.has_stop[mrna_kept]
+
+        # Shortest exon and intron fold per mRNA, then per gene, then per seq
+        mrna_rows = len(mrnas)
+        shortest = {}
+        for name, lengths, parents in [("exon", exon_lengths, exon_parent),\
+                ("intron", intron_lengths[intron_kept], intron_parent[intron_kept])]:
+            per_mrna = group_min(lengths, parents, mrna_rows)[mrna_kept]
+            per_gene = fold_shortest(per_mrna, mrnas.parent[mrna_kept], len(genes))[gene_kept]
+            shortest[name] = fold_shortest(per_gene, gene_seq, count)
+
+        columns = {}
+        columns["Total sequence length"] = self.seq_lengths
+        columns["Number of genes"] = numpy.bincount(gene_seq, minlength=count)
+        columns["Number of mRNAs"] = numpy.bincount(mrna_seq, minlength=count)
+        columns["Number of exons"] = numpy.bincount(exon_seq, minlength=count)
+        columns["Number of introns"] = group_sum(self.exon_counts[with_exon] - 1, mrnas.seq[with_exon], count)
+        columns["Number of CDS"] = numpy.bincount(cds_seq, minlength=count)
+        columns["CDS: complete"] = numpy.bincount(mrna_seq[starts & stops], minlength=count)
+        columns["CDS: start, no stop"] = numpy.bincount(mrna_seq[starts & ~stops], minlength=count)
+        columns["CDS: stop, no start"] = numpy.bincount(mrna_seq[~starts & stops], minlength=count)
+        columns["CDS: no stop, no start"] = numpy.bincount(mrna_seq[~starts & ~stops], minlength=count)
+        columns["Longest gene"] = group_max(gene_lengths, gene_seq, count)
+        columns["Longest mRNA"] = group_max(mrna_lengths, mrna_seq, count)
+        columns["Longest exon"] = group_max(exon_lengths, exon_seq, count)
+        columns["Longest intron"] = group_max(intron_lengths[intron_kept], intron_seq, count)
+        columns["Longest CDS"] = group_max(cds_lengths, cds_seq, count)
+        columns["Shortest gene"] = group_min(gene_lengths, gene_seq, count)
+        columns["Shortest mRNA"] = group_min(mrna_lengths, mrna_seq, count)
+        columns["Shortest exon"] = shortest["exon"]
+        columns["Shortest intron"] = shortest["intron"]
+        columns["Shortest CDS"] = group_min(cds_lengths, cds_seq, count)
+        columns["Total gene length"] = group_sum(gene_lengths, gene_seq, count)
+        columns["Total mRNA length"] = group_sum(mrna_lengths, mrna_seq, count)
+        columns["Total exon length"] = group_sum(exon_lengths, exon_seq, count)
+        columns["Total intron length"] = group_sum(intron_lengths[intron_kept], intron_seq, count)
+        columns["Total CDS length"] = group_sum(cds_lengths, cds_seq, count)
+        return [dict((key, int(values[i])) for key, values in columns.items()) for i in xrange(count)]
+
+    def mrna_flags(self, filter_name, arg):
+        """Returns a boolean array over mRNA rows: flagged by the named mRNA filter
+        (see FilterManager) at this arg, by the same test as its flags_mrna."""
+        intron_lengths, intron_parent = self.introns()
+        mrna_rows = len(self.mrnas)
+        if filter_name == 'cds_shorter_than':
+            return self.has_cds & (self.cds_lengths < arg)
+        if filter_name == 'cds_longer_than':
+            return self.has_cds & (arg > 0) & (self.cds_lengths > arg)
+        if filter_name == 'exon_shorter_than':
+            shortest = group_min(self.exons.lengths(), self.exons.parent, mrna_rows)
+            return self.has_exon & (shortest < arg)
+        if filter_name == 'exon_longer_than':
+            longest = group_max(self.exons.lengths(), self.exons.parent, mrna_rows)
+            return self.has_exon & (arg > 0) & (longest > arg)
+        if filter_name == 'intron_shorter_than':
+            shortest = group_min(intron_lengths, intron_parent, mrna_rows)
+            return self.has_exon & (shortest < arg) & (shortest != 0)
+        if filter_name == 'intron_longer_than':
+            longest = group_max(intron_lengths, intron_parent, mrna_rows)
+            return self.has_exon & (arg > 0) & (longest > arg)
+        raise KeyError(filter_name)
+
+    def gene_flags(self, filter_name, arg):
+        """Returns a boolean array over gene rows: flagged by the named gene filter at this arg."""
+        if filter_name == 'gene_shorter_than':
+            return self.genes.lengths() < arg
+        if filter_name == 'gene_longer_than':
+            return (arg > 0) & (self.genes.lengths() > arg)
+        raise KeyError(filter_name)
+
+    def handles(self, filter_mgr):
+        """Returns True if filter_masks and gagflags can stand in for filter_mgr.apply_filters:
+        every filter has a vectorized version and no gene or mRNA ids repeat."""
+        for name in filter_mgr.filters:
+            if name not in MRNA_FILTERS and name not in GENE_FILTERS:
+                return False
+        return not has_duplicate_ids(self.seqs)
+
+    def filter_masks(self, filter_mgr):
+        """Returns (gene mask, mRNA mask) of what survives filter_mgr.apply_filters.
+
+        Flagged mRNAs and genes are dropped when their filter removes, and genes
+        left without mRNAs are dropped too. Sequence.remove_gene drops genes by
+        id, so this only matches when ids are unique; see handles().
+        """
+        mrna_mask = numpy.ones(len(self.mrnas), dtype=bool)
+        gene_mask = numpy.ones(len(self.genes), dtype=bool)
+        for name, filt in filter_mgr.filters.items():
+            if not filt.remove:
+                continue
+            if name.startswith('gene_'):
+                gene_mask &= ~self.gene_flags(name, filt.arg)
+            else:
+                mrna_mask &= ~self.mrna_flags(name, filt.arg)
+        mrnas_left = numpy.bincount(self.mrnas.parent[mrna_mask], minlength=len(self.genes))
+        gene_mask &= mrnas_left > 0
+        return gene_mask, mrna_mask
+
+    def gagflags(self, filter_mgr, gene_mask=None, mrna_mask=None):
+        """Returns the number of gag flags on each seq's kept features, once filter_mgr's
+        filters that don't remove have added theirs, counted as Sequence.number_of_gagflags does."""
+        gene_flagged = self.gene_flagged.copy()
+        exon_flagged = self.exon_flagged.copy()
+        cds_flagged = self.cds_flagged.copy()
+        for name, filt in filter_mgr.filters.items():
+            if filt.remove:
+                continue
+            if filt.flagged_part == 'gene':
+                gene_flagged |= self.gene_flags(name, filt.arg)
+            elif filt.flagged_part == 'exon':
+                exon_flagged |= self.mrna_flags(name, filt.arg)
+            else:
+                cds_flagged |= self.mrna_flags(name, filt.arg)
+        if gene_mask is not None:
+            gene_flagged &= gene_mask
+        mrna_kept = self.mrnas_kept(gene_mask, mrna_mask)
+        per_mrna = exon_flagged.astype(numpy.int64) + cds_flagged
+        count = len(self.seqs)
+        return numpy.bincount(self.genes.seq[gene_flagged], minlength=count) +\
+                group_sum(per_mrna[mrna_kept], self.mrnas.seq[mrna_kept], count)
+
+    def to_seqs(self, gene_mask=None, mrna_mask=None):
+        """Returns new Sequences holding the kept features, rebuilt as objects.
+
+        Coordinates come from the columns; everything else (ids, names,
+        annotations, scores, phases and start/stop codons) is copied from the
+        objects the table was built from.
+        """
+        mrna_kept = self.mrnas_kept(gene_mask, mrna_mask)
+        exon_first = numpy.concatenate([[0], numpy.cumsum(self.exon_counts)])
+        cds_counts = numpy.bincount(self.cds.parent, minlength=len(self.mrnas))
+        cds_first = numpy.concatenate([[0], numpy.cumsum(cds_counts)])
+        result = []
+        for seq in self.seqs:
+            new_seq = Sequence(seq.header, seq.bases)
+            new_seq.removed_genes = list(seq.removed_genes)
+            result.append(new_seq)
+        genes = {}
+        for row, gene in enumerate(self.gene_objects):
+            if gene_mask is not None and not gene_mask[row]:
+                continue
+            new_gene = copy_feature(gene)
+            new_gene.indices = [int(self.genes.start[row]), int(self.genes.end[row])]
+            new_gene.mrnas = []
+            new_gene.removed_mrnas = list(gene.removed_mrnas)
+            result[self.genes.seq[row]].genes.append(new_gene)
+            genes[row] = new_gene
+        for row, mrna in enumerate(self.mrna_objects):
+            if not mrna_kept[row]:
+                continue
+            new_mrna = copy_feature(mrna)
+            new_mrna.indices = [int(self.mrnas.start[row]), int(self.mrnas.end[row])]
+            new_mrna.other_features = list(mrna.other_features)
+            if mrna.exon:
+                new_mrna.exon = copy_part(mrna.exon, self.exons, exon_first[row], exon_first[row+1])
+            if mrna.cds:
+                new_mrna.cds = copy_part(mrna.cds, self.cds, cds_first[row], cds_first[row+1])
+            genes[self.mrnas.parent[row]].mrnas.append(new_mrna)
+        return result
+
+
+def copy_feature(feature):
+    """Returns a shallow copy of a Gene or MRNA with its own annotations list."""
+    new_feature = copy.copy(feature)
+    annotations = stored_attribute(feature, 'annotations')
+    if annotations is not None:
+        new_feature.annotations = list(annotations)
+    return new_feature
+
+def copy_part(part, columns, first, last):
+    """Returns a copy of an Exon or CDS taking its index pairs from rows first..last-1."""
+    new_part = copy.copy(part)
+    new_part.indices = [[int(columns.start[i]), int(columns.end[i])] for i in xrange(first, last)]
+    new_part.identifier = list(part.identifier)
+    new_part.score = list(part.score)
+    new_part.annotations = list(part.annotations)
+    if hasattr(part, 'phase'):
+        new_part.phase = list(part.phase)
+    return new_part
+
+def strand_code(strand):
+    return STRAND_CODES.get(strand, 0)
+
+def phase_code(phase):
+    if phase == '.' or phase is None:
+        return NO_PHASE
+    return int(phase)
+
+def build_feature_table(seqs):
+    """Returns a FeatureTable of the genes, mRNAs, exons and CDSs on a list of Sequences."""
+    require_numpy()
+    gene_rows, mrna_rows, exon_rows, cds_rows = [], [], [], []
+    gene_objects, mrna_objects = [], []
+    for seq_row, seq in enumerate(seqs):
+        for gene in seq.genes:
+            gene_row = len(gene_objects)
+            gene_objects.append(gene)
+            gene_rows.append((seq_row, gene.indices[0], gene.indices[1], strand_code(gene.strand),\
+                    NO_PHASE, seq_row))
+            for mrna in gene.mrnas:
+                mrna_row = len(mrna_objects)
+                mrna_objects.append(mrna)
+                mrna_rows.append((seq_row, mrna.indices[0], mrna.indices[1], strand_code(mrna.strand),\
+                        NO_PHASE, gene_row))
+                if mrna.exon:
+                    strand = strand_code(mrna.exon.strand)
+                    for pair in mrna.exon.indices:
+                        exon_rows.append((seq_row, pair[0], pair[1], strand, NO_PHASE, mrna_row))
+                if mrna.cds:
+                    strand = strand_code(mrna.cds.strand)
+                    for i, pair in enumerate(mrna.cds.indices):
+                        cds_rows.append((seq_row, pair[0], pair[1], strand,\
+                                phase_code(mrna.cds.get_phase(i)), mrna_row))
+    return FeatureTable(seqs, FeatureColumns(gene_rows), FeatureColumns(mrna_rows),\
+            FeatureColumns(exon_rows), FeatureColumns(cds_rows), gene_objects, mrna_objects)
@@ -21,15 +21,27 @@ class FilterManager:
         
         # Starts out dirty
         self.dirty = False
+        # Bumped on every settings change, so cached results can tell they're stale
+        self.version = 0
 
     def apply_filters(self, seq):
         for filt in self.filters.values():
             filt.apply(seq)
+
+    def changes(self, gene):
+        """Returns True if apply_filters would flag, trim or remove anything in this gene."""
+        if gene.death_flagged:
+            return True
+        for filt in self.filters.values():
+            if filt.changes(gene):
+                return True
+        return False
     
     def set_filter_arg(self, filter_name, val):
         val = ast.literal_eval(val)
         if self.filters[filter_name].arg != val:
             self.dirty = True
+            self.version += 1
         self.filters[filter_name].arg = val
     
     def get_filter_arg(self, filter_name):
@@ -38,5 +50,6 @@ class FilterManager:
     def set_filter_remove(self, filter_name, remove):
         if self.filters[filter_name].remove != remove:
             self.dirty = True
+            self.version += 1
         self.filters[filter_name].remove = remove
    
@@ -4,15 +4,32 @@
 
 class MinCDSLengthFilter:
 
+    # flags_mrna is true when measure() is below arg; flags go on the cds
+    flags_below = True
+    flagged_part = 'cds'
+
     def __init__(self, min_length = 0):
         self.arg = min_length
         self.remove = True
         return
+
+    def measure(self, mrna):
+        """Returns the length flags_mrna compares with arg, or None if it never flags this mRNA."""
+        if mrna.cds:
+            return mrna.cds.length()
+        return None
         
+    def flags_mrna(self, mrna):
+        return mrna.cds and mrna.cds.length() < self.arg
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove anything in this gene."""
+        return not gene.mrnas or any(self.flags_mrna(mrna) for mrna in gene.mrnas)
+
     def apply(self, seq):
         for gene in seq.genes:
             for mrna in gene.mrnas:
-                if mrna.cds and mrna.cds.length() < self.arg:
+                if self.flags_mrna(mrna):
                     mrna.cds.add_annotation('gag_flag', "cds_min_length:"+str(self.arg))
                     mrna.death_flagged = True # Destroy the mRNA that the cds lives on?
             if self.remove:
@@ -31,15 +48,32 @@ class MinCDSLengthFilter:
         
 class MaxCDSLengthFilter:
 
+    # flags_mrna is true when arg is set and measure() is above it; flags go on the cds
+    flags_below = False
+    flagged_part = 'cds'
+
     def __init__(self, max_length=0):
         self.arg = max_length
         self.remove = True
         return
+
+    def measure(self, mrna):
+        """Returns the length flags_mrna compares with arg, or None if it never flags this mRNA."""
+        if mrna.cds:
+            return mrna.cds.length()
+        return None
         
+    def flags_mrna(self, mrna):
+        return mrna.cds and self.arg > 0 and mrna.cds.length() > self.arg
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove anything in this gene."""
+        return not gene.mrnas or any(self.flags_mrna(mrna) for mrna in gene.mrnas)
+
     def apply(self, seq):
         for gene in seq.genes:
             for mrna in gene.mrnas:
-                if mrna.cds and self.arg > 0 and mrna.cds.length() > self.arg:
+                if self.flags_mrna(mrna):
                     mrna.cds.add_annotation('gag_flag', "cds_max_length:"+str(self.arg))
                     mrna.death_flagged = True # Destroy the mRNA that the cds lives on?
             if self.remove:
@@ -60,15 +94,32 @@ class MaxCDSLengthFilter:
                     
 class MinExonLengthFilter:
 
+    # flags_mrna is true when measure() is below arg; flags go on the exon
+    flags_below = True
+    flagged_part = 'exon'
+
     def __init__(self, min_length = 0):
         self.arg = min_length
         self.remove = True
         return
+
+    def measure(self, mrna):
+        """Returns the length flags_mrna compares with arg, or None if it never flags this mRNA."""
+        if mrna.exon:
+            return mrna.get_shortest_exon()
+        return None
         
+    def flags_mrna(self, mrna):
+        return mrna.exon and mrna.get_shortest_exon() < self.arg
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove anything in this gene."""
+        return not gene.mrnas or any(self.flags_mrna(mrna) for mrna in gene.mrnas)
+
     def apply(self, seq):
         for gene in seq.genes:
             for mrna in gene.mrnas:
-                if mrna.exon and mrna.get_shortest_exon() < self.arg:
+                if self.flags_mrna(mrna):
                     mrna.exon.add_annotation("gag_flag", "exon_min_length:"+str(self.arg))
                     mrna.death_flagged = True # Destroy the mRNA that the exon lives on?
             if self.remove:
@@ -87,15 +138,32 @@ class MinExonLengthFilter:
         
 class MaxExonLengthFilter:
 
+    # flags_mrna is true when arg is set and measure() is above it; flags go on the exon
+    flags_below = False
+    flagged_part = 'exon'
+
     def __init__(self, max_length=0):
         self.arg = max_length
         self.remove = True
         return
+
+    def measure(self, mrna):
+        """Returns the length flags_mrna compares with arg, or None if it never flags this mRNA."""
+        if mrna.exon:
+            return mrna.get_longest_exon()
+        return None
         
+    def flags_mrna(self, mrna):
+        return mrna.exon and self.arg > 0 and mrna.get_longest_exon() > self.arg
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove anything in this gene."""
+        return not gene.mrnas or any(self.flags_mrna(mrna) for mrna in gene.mrnas)
+
     def apply(self, seq):
         for gene in seq.genes:
             for mrna in gene.mrnas:
-                if mrna.exon and self.arg > 0 and mrna.get_longest_exon() > self.arg:
+                if self.flags_mrna(mrna):
                     mrna.exon.add_annotation("gag_flag", "exon_max_length:"+str(self.arg))
                     mrna.death_flagged = True # Destroy the mRNA that the exon lives on?
             if self.remove:
@@ -116,15 +184,32 @@ class MaxExonLengthFilter:
 
 class MinIntronLengthFilter:
 
+    # flags_mrna is true when measure() is below arg; flags go on the exon
+    flags_below = True
+    flagged_part = 'exon'
+
     def __init__(self, min_length = 0, max_length=0):
         self.arg = min_length
         self.remove = True
         return
+
+    def measure(self, mrna):
+        """Returns the length flags_mrna compares with arg, or None if it never flags this mRNA."""
+        if mrna.exon and mrna.get_shortest_intron() != 0:
+            return mrna.get_shortest_intron()
+        return None
         
+    def flags_mrna(self, mrna):
+        return mrna.exon and mrna.get_shortest_intron() < self.arg and mrna.get_shortest_intron() != 0
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove anything in this gene."""
+        return not gene.mrnas or any(self.flags_mrna(mrna) for mrna in gene.mrnas)
+
     def apply(self, seq):
         for gene in seq.genes:
             for mrna in gene.mrnas:
-                if mrna.exon and mrna.get_shortest_intron() < self.arg and mrna.get_shortest_intron() != 0:
+                if self.flags_mrna(mrna):
                     mrna.exon.add_annotation("gag_flag", "intron_min_length:"+str(self.arg))
                     mrna.death_flagged = True # Destroy the mRNA that the intron lives on?
             if self.remove:
@@ -143,15 +228,32 @@ class MinIntronLengthFilter:
 
 class MaxIntronLengthFilter:
 
+    # flags_mrna is true when arg is set and measure() is above it; flags go on the exon
+    flags_below = False
+    flagged_part = 'exon'
+
     def __init__(self, max_length=0):
         self.arg = max_length
         self.remove = True
         return
+
+    def measure(self, mrna):
+        """Returns the length flags_mrna compares with arg, or None if it never flags this mRNA."""
+        if mrna.exon:
+            return mrna.get_longest_intron()
+        return None
         
+    def flags_mrna(self, mrna):
+        return mrna.exon and self.arg > 0 and mrna.get_longest_intron() > self.arg
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove anything in this gene."""
+        return not gene.mrnas or any(self.flags_mrna(mrna) for mrna in gene.mrnas)
+
     def apply(self, seq):
         for gene in seq.genes:
             for mrna in gene.mrnas:
-                if mrna.exon and self.arg > 0 and mrna.get_longest_intron() > self.arg:
+                if self.flags_mrna(mrna):
                     mrna.exon.add_annotation("gag_flag", "intron_max_length:"+str(self.arg))
                     mrna.death_flagged = True # Destroy the mRNA that the intron lives on?
             if self.remove:
@@ -172,14 +274,29 @@ class MaxIntronLengthFilter:
 
 class MinGeneLengthFilter:
 
+    # flags_gene is true when measure() is below arg; flags go on the gene
+    flags_below = True
+    flagged_part = 'gene'
+
     def __init__(self, min_length = 0):
         self.arg = min_length
         self.remove = True
         return
+
+    def measure(self, gene):
+        """Returns the length flags_gene compares with arg."""
+        return gene.length()
         
+    def flags_gene(self, gene):
+        return gene.length() < self.arg
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove this gene."""
+        return self.flags_gene(gene)
+
     def apply(self, seq):
         for gene in seq.genes:
-            if gene.length() < self.arg:
+            if self.flags_gene(gene):
                 gene.add_annotation("gag_flag", "gene_min_length:"+str(self.arg))
                 gene.death_flagged = True # Destroy the gene?
         if self.remove:
@@ -189,14 +306,29 @@ class MinGeneLengthFilter:
 
 class MaxGeneLengthFilter:
 
+    # flags_gene is true when arg is set and measure() is above it; flags go on the gene
+    flags_below = False
+    flagged_part = 'gene'
+
     def __init__(self, max_length=0):
         self.arg = max_length
         self.remove = True
         return
+
+    def measure(self, gene):
+        """Returns the length flags_gene compares with arg."""
+        return gene.length()
         
+    def flags_gene(self, gene):
+        return self.arg > 0 and gene.length() > self.arg
+
+    def changes(self, gene):
+        """Returns True if apply() would flag or remove this gene."""
+        return self.flags_gene(gene)
+
     def apply(self, seq):
         for gene in seq.genes:
-            if self.arg > 0 and gene.length() > self.arg:
+            if self.flags_gene(gene):
                 gene.add_annotation("gag_flag", "gene_max_length:"+str(self.arg))
                 gene.death_flagged = True # Destroy the gene?
         if self.remove:
@@ -1,28 +1,51 @@
 #!/usr/bin/env python
 
 import math
+from src.gff_attributes import decode_attributes, other_attributes
+from src.gene_part import deepcopy_slots
 
 def length_of_segment(index_pair):
     return math.fabs(index_pair[1] - index_pair[0]) + 1
 
-class Gene:
+class Gene(object):
 
-    def __init__(self, seq_name, source, indices, strand, identifier, name="", annotations=None, score=None):
+    # No per-instance dict; genomes hold hundreds of thousands of these
+    __slots__ = ('seq_name', 'source', 'indices', 'score', 'strand', 'identifier', 'mrnas',\
+            'removed_mrnas', 'raw_attributes', 'name', 'annotations', 'death_flagged')
+
+    def __init__(self, seq_name, source, indices, strand, identifier, name="", annotations=None, score=None,\
+            raw_attributes=None):
         self.seq_name = seq_name
         self.source = source
         self.indices = indices
         self.score = score
         self.strand = strand
         self.identifier = identifier
-        self.name = name
         self.mrnas = []
         self.removed_mrnas = []
-        if not annotations:
-            self.annotations = []
-        else:
-            self.annotations = annotations
+        # The gff attribute column, if the gene was read from a file
+        self.raw_attributes = raw_attributes
+        if raw_attributes is None:
+            self.name = name
+            if not annotations:
+                self.annotations = []
+            else:
+                self.annotations = annotations
+        # Otherwise name and annotations are decoded from it when first used
         self.death_flagged = False
 
+    def __getattr__(self, attr):
+        """Decodes name and annotations from the raw attribute column on first access."""
+        if attr in ('name', 'annotations') and self.raw_attributes is not None:
+            decoded = decode_attributes(self.raw_attributes)
+            self.name = decoded.get('name', "")
+            self.annotations = decoded.get('annotations', [])
+            return getattr(self, attr)
+        raise AttributeError(attr)
+
+    def __deepcopy__(self, memo):
+        return deepcopy_slots(self, memo)
+
     def __str__(self):
         """Returns string representation of a gene.
 
@@ -174,6 +197,12 @@ class Gene:
         for mrna in self.mrnas:
             mrna.adjust_indices(n, start_index)
 
+    def remap_indices(self, offsets):
+        """Moves indices and child features' indices through an OffsetMap (see EditPlan)."""
+        self.indices = [offsets.map(i) for i in self.indices]
+        for mrna in self.mrnas:
+            mrna.remap_indices(offsets)
+
     def get_partial_info(self):
         """Returns a dictionary containing counts for complete/incomplete CDSs."""
         results = {"complete": 0, "start_no_stop": 0, "stop_no_start": 0, "no_stop_no_start": 0}
@@ -264,6 +293,8 @@ class Gene:
             result += ";Name=" + self.name
         for annot in self.annotations:
             result += ';'+annot[0]+'='+annot[1]
+        if self.raw_attributes is not None:
+            result += other_attributes(self.raw_attributes)
         result += '\n'
         for mrna in self.mrnas:
             result += mrna.to_gff(self.seq_name, self.source)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import copy
 import math
 import src.translator as translate
 
@@ -76,7 +77,36 @@ def write_tbl_entry(indices, strand, has_start, has_stop, is_cds, annotations =
         output += "\t\t\tcodon_start\t" + str(phase+1) + "\n"
     return output
 
-class GenePart:
+# Class -> its slots and those it inherits; see slot_names()
+SLOT_NAMES = {}
+
+def slot_names(cls):
+    """Returns the __slots__ of cls and the classes it inherits from."""
+    if cls not in SLOT_NAMES:
+        names = []
+        for base in cls.__mro__:
+            names.extend(base.__dict__.get('__slots__', ()))
+        SLOT_NAMES[cls] = names
+    return SLOT_NAMES[cls]
+
+def deepcopy_slots(feature, memo):
+    """Returns a deep copy of a slotted feature, copying its slots directly rather than
+    through the pickle protocol that copy.deepcopy falls back on. Unset slots stay unset."""
+    result = object.__new__(type(feature))
+    memo[id(feature)] = result
+    for name in slot_names(type(feature)):
+        try:
+            value = object.__getattribute__(feature, name)
+        except AttributeError:
+            continue
+        object.__setattr__(result, name, copy.deepcopy(value, memo))
+    return result
+
+class GenePart(object):
+
+    # No per-instance dict; every exon and CDS is one of these
+    __slots__ = ('feature_type', 'identifier', 'indices', 'score', 'strand', 'parent_id', 'annotations')
+
     def __init__(self, feature_type=None, identifier=None,\
                  indices=None, score=None, strand='+', parent_id=None):
         self.feature_type = feature_type
@@ -93,6 +123,9 @@ class GenePart:
         self.parent_id = parent_id
         self.annotations = []
 
+    def __deepcopy__(self, memo):
+        return deepcopy_slots(self, memo)
+
     def __str__(self):
         """Returns string representation of a GenePart.
 
@@ -181,6 +214,10 @@ class GenePart:
             elif index_pair[1] >= start_index:
                 self.indices[i][1] += n
 
+    def remap_indices(self, offsets):
+        """Moves each index pair through an OffsetMap (see EditPlan)."""
+        self.indices = [[offsets.map(pair[0]), offsets.map(pair[1])] for pair in self.indices]
+
     def generate_attribute_entry(self, i):
         """Returns a string representing a GenePart's .gff attribute entry.
 
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+class GenomeIndex:
+    """Hash indexes over a list of Sequences, for constant-time lookups by id.
+
+    Maps seq header -> Sequence, gene id -> (Sequence, Gene) and
+    mRNA id -> (Gene, MRNA). When ids repeat, the first one seen wins,
+    matching the first-match-in-order scans the lookups replace.
+    Gene id -> [Sequence] keeps every seq holding a gene with that id.
+    """
+
+    def __init__(self, seqs=None):
+        self.seqs = None
+        self.seq_count = 0
+        self.seqs_by_header = {}
+        self.genes_by_id = {}
+        self.mrnas_by_id = {}
+        self.seqs_by_gene_id = {}
+        # Sequence -> its position in seqs, so seqs_by_gene_id stays in seq order
+        self.seq_positions = {}
+        if seqs is not None:
+            self.build(seqs)
+
+    def build(self, seqs):
+        self.seqs = seqs
+        self.seq_count = len(seqs)
+        self.seqs_by_header = {}
+        self.genes_by_id = {}
+        self.mrnas_by_id = {}
+        self.seqs_by_gene_id = {}
+        self.seq_positions = {}
+        for position, seq in enumerate(seqs):
+            self.seq_positions[seq] = position
+            self.seqs_by_header.setdefault(seq.header, seq)
+            for gene in seq.genes:
+                self.add_gene(seq, gene)
+
+    def covers(self, seqs):
+        """Returns True if the index was built over this list and its length hasn't changed."""
+        return self.seqs is seqs and self.seq_count == len(seqs)
+
+    def add_gene(self, seq, gene):
+        self.genes_by_id.setdefault(gene.identifier, (seq, gene))
+        holding = self.seqs_by_gene_id.setdefault(gene.identifier, [])
+        if seq not in holding:
+            holding.append(seq)
+            if len(holding) > 1:
+                holding.sort(key=lambda held: self.seq_positions.get(held, len(self.seq_positions)))
+        for mrna in gene.mrnas:
+            self.add_mrna(gene, mrna)
+
+    def add_mrna(self, gene, mrna):
+        self.mrnas_by_id.setdefault(mrna.identifier, (gene, mrna))
+
+    def get_seq(self, header):
+        """Returns the Sequence with this header, or None."""
+        return self.seqs_by_header.get(header)
+
+    def get_gene(self, gene_id):
+        """Returns (Sequence, Gene) for a gene id, or None."""
+        return self.genes_by_id.get(gene_id)
+
+    def get_seqs_with_gene(self, gene_id):
+        """Returns the Sequences holding a gene with this id, in seq order."""
+        return self.seqs_by_gene_id.get(gene_id, [])
+
+    def get_mrna(self, mrna_id):
+        """Returns (Gene, MRNA) for an mRNA id, or None."""
+        return self.mrnas_by_id.get(mrna_id)
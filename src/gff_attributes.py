@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+# Characters trimmed from both ends of a gff attribute column
+ATTRIBUTE_PADDING = ' \t\n;'
+# Keys of the dict decode_attributes returns, by gff attribute name
+ATTRIBUTE_NAMES = {'ID': 'identifier', 'Name': 'name', 'Parent': 'parent_id'}
+# Attributes decode_attributes reads; other_attributes passes the rest through
+DECODED_KEYS = ['ID', 'Name', 'Parent', 'Dbxref', 'Ontology_term']
+
+def decode_attributes(attr):
+    """Returns a dict with whichever of identifier, name, parent_id
+    and annotations are present in a gff attribute column.
+
+    Pairs that aren't exactly 'key=value' are ignored. Only Dbxref and
+    Ontology_term pairs are kept as annotations.
+    """
+    result = {}
+    annotations = []
+    for pair in attr.strip(ATTRIBUTE_PADDING).split(';'):
+        splitpair = pair.split('=')
+        if len(splitpair) != 2:
+            continue
+        if splitpair[0] == "ID":
+            result['identifier'] = splitpair[1]
+        elif splitpair[0] == "Name":
+            result['name'] = splitpair[1]
+        elif splitpair[0] == "Parent":
+            result['parent_id'] = splitpair[1]
+        elif splitpair[0] == "Dbxref" or splitpair[0] == "Ontology_term":
+            annotations.append(splitpair)
+    if annotations:
+        result['annotations'] = annotations
+    return result
+
+def other_attributes(attr):
+    """Returns ';key=value' for each pair in a gff attribute column that
+    decode_attributes doesn't read, such as Note, in the order they appear."""
+    result = ""
+    for pair in attr.strip(ATTRIBUTE_PADDING).split(';'):
+        splitpair = pair.split('=')
+        if len(splitpair) == 2 and splitpair[0] and splitpair[0] not in DECODED_KEYS:
+            result += ';' + pair
+    return result
+
+def stored_attribute(feature, name):
+    """Returns an attribute of a slotted feature as it's stored, or None if it isn't set,
+    without decoding it from the raw attribute column."""
+    try:
+        return object.__getattribute__(feature, name)
+    except AttributeError:
+        return None
+
+def find_attribute(attr, key):
+    """Returns the value of one key in a gff attribute column, or None.
+
+    Looks the key up directly instead of splitting the whole column, but
+    gives the same answer decode_attributes would.
+    """
+    text = ';' + attr.strip(ATTRIBUTE_PADDING)
+    start = text.rfind(';' + key + '=')
+    if start == -1:
+        return None
+    start += len(key) + 2
+    end = text.find(';', start)
+    if end == -1:
+        end = len(text)
+    value = text[start:end]
+    if '=' in value:
+        # decode_attributes skips malformed pairs, so an earlier one may count
+        return decode_attributes(attr).get(ATTRIBUTE_NAMES[key])
+    return value
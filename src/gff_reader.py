@@ -1,20 +1,124 @@
 #!/usr/bin/env python
 
 import sys
-import copy
 from src.gene_part import GenePart
 from src.cds import CDS
 from src.exon import Exon
 from src.mrna import MRNA
 from src.gene import Gene
+from src.gff_attributes import decode_attributes, find_attribute
+from src.diagnostic_sinks import DEFAULT_SINKS, SINK_NAMES, CountingSink, NullSink, open_sink
+from cStringIO import StringIO
+from multiprocessing import Pool
+
+def find_seqid_runs(gff_path, comments):
+    """Scans a gff file for runs of consecutive lines with the same seqid.
+
+    Returns a list of (seqid, start, stop) byte ranges in file order.
+    Comment lines are written to comments (unless it's None) and left out
+    of the runs.
+    """
+    runs = []
+    seqid = None
+    start = 0
+    offset = 0
+    with open(gff_path, 'rb') as gff:
+        for line in gff:
+            if line[0] == '#':
+                if seqid is not None:
+                    runs.append((seqid, start, offset))
+                    seqid = None
+                if comments is not None:
+                    comments.write(line)
+            else:
+                line_seqid = line.split('\t', 1)[0]
+                if line_seqid != seqid:
+                    if seqid is not None:
+                        runs.append((seqid, start, offset))
+                    seqid = line_seqid
+                    start = offset
+            offset += len(line)
+    if seqid is not None:
+        runs.append((seqid, start, offset))
+    return runs
+
+def make_shards(runs, count):
+    """Groups seqid runs into at most count shards of similar size.
+
+    All runs for one seqid go into the same shard. Seqids are handed out
+    largest first, each to the shard with the fewest bytes so far. Returns
+    a list of dicts with 'seqids' and 'ranges' (in file order).
+    """
+    sizes = {}
+    ranges = {}
+    for seqid, start, stop in runs:
+        sizes[seqid] = sizes.get(seqid, 0) + stop - start
+        ranges.setdefault(seqid, []).append((start, stop))
+    shards = [{'seqids': [], 'ranges': [], 'size': 0} for i in range(min(count, len(sizes)))]
+    for seqid in sorted(sizes, key=lambda seqid: -sizes[seqid]):
+        shard = min(shards, key=lambda shard: shard['size'])
+        shard['seqids'].append(seqid)
+        shard['ranges'].extend(ranges[seqid])
+        shard['size'] += sizes[seqid]
+    for shard in shards:
+        shard['ranges'].sort()
+    return shards
+
+class AssignmentLog(dict):
+    """A dict that also keeps every assignment made to it, in order, in self.log."""
+
+    def __init__(self):
+        dict.__init__(self)
+        self.log = []
+
+    def __setitem__(self, key, value):
+        self.log.append((key, value))
+        dict.__setitem__(self, key, value)
+
+def parse_shard(args):
+    """Parses the byte ranges of one shard of a gff file in a worker process.
+
+    Genes and mRNAs aren't linked here. Instead, for each range, the shard
+    returns (range start, gene assignments, mRNA assignments) in the order
+    they were made, so the parent can replay the whole file's assignments
+    in file order. Also returns the child features left without a parent
+    mRNA in this shard, the count of skipped features and the text of the
+    invalid and ignored lines (empty unless asked for).
+    """
+    gff_path, ranges, keep_invalid, keep_ignored = args
+    reader = GFFReader()
+    reader.genes = AssignmentLog()
+    reader.mrnas = AssignmentLog()
+    invalid = StringIO() if keep_invalid else None
+    ignored = StringIO() if keep_ignored else None
+    assignments = []
+    with open(gff_path, 'rb') as gff:
+        for start, stop in ranges:
+            genes_before = len(reader.genes.log)
+            mrnas_before = len(reader.mrnas.log)
+            gff.seek(start)
+            reader.read_lines(StringIO(gff.read(stop - start)), None, invalid, ignored)
+            assignments.append((start, reader.genes.log[genes_before:], reader.mrnas.log[mrnas_before:]))
+    reader.place_orphans()
+    texts = [sink.getvalue() if sink is not None else '' for sink in [invalid, ignored]]
+    return assignments, reader.orphans, reader.skipped_features, texts[0], texts[1]
 
 class GFFReader:
 
-    def __init__(self):
+    def __init__(self, sinks=None):
         self.genes = {}
         self.mrnas = {}
-        self.orphans = []
+        # Child features whose parent mRNA hasn't been seen yet, keyed by parent id
+        self.orphans = {}
         self.skipped_features = 0
+        # Per-shard counts from the last read_file_parallel
+        self.shards = []
+        # Where comments, invalid and ignored lines go: 'off', 'count' or a file path
+        self.sinks = dict(DEFAULT_SINKS)
+        if sinks:
+            self.sinks.update(sinks)
+        # Line counts from the sinks set to 'count'
+        self.sink_counts = {}
 
     def validate_line(self, line):
         """Returns list of fields if valid, empty list if not."""
@@ -40,82 +144,79 @@ class GFFReader:
         If not, returns empty dict
         Also adds annotations if present
         """
-        result = {}
-        annotations = []
-        # Sanitize and split attributes up
-        split_attr = attr.strip(' \t\n;').split(';')
-        for pair in split_attr:
-            splitpair = pair.split('=')
-            if len(splitpair) != 2:
-                continue
-            if splitpair[0] == "ID":
-                result['identifier'] = splitpair[1]
-            elif splitpair[0] == "Name":
-                result['name'] = splitpair[1]
-            elif splitpair[0] == "Parent":
-                result['parent_id'] = splitpair[1]
-            elif splitpair[0] == "Dbxref" or splitpair[0] == "Ontology_term":
-                annotations.append(splitpair)
+        result = decode_attributes(attr)
         # Make sure we found an ID
         if "identifier" not in result:
             return {}
-        # Add annotations if we found any
-        if annotations:
-            result["annotations"] = annotations
+        return result
+
+    def parse_key_attributes(self, attr, is_parent=False):
+        """Returns a dict with id and parent_id (if present), or an empty dict if there's no id.
+
+        Only looks for 'ID=' and 'Parent=' rather than splitting up the
+        whole attribute column; features keep the column itself and decode
+        the rest of it if they need to.
+
+        Parent ids are interned, so every child of a feature shares one
+        string; pass is_parent=True for genes and mRNAs so their own ids
+        are that same string.
+        """
+        identifier = find_attribute(attr, "ID")
+        if identifier is None:
+            return {}
+        if is_parent:
+            identifier = intern(identifier)
+        result = {'identifier': identifier}
+        parent_id = find_attribute(attr, "Parent")
+        if parent_id is not None:
+            result['parent_id'] = intern(parent_id)
         return result
 
     def extract_cds_args(self, line):
         """Pulls CDS arguments from a gff line and returns them in a dictionary."""
         result = {'indices': [int(line[3]), int(line[4])], \
-                'strand': line[6], 'phase': int(line[7])}
+                'strand': intern(line[6]), 'phase': int(line[7])}
         if isinstance(line[7], float):
             result['score'] = line[7]
-        attribs = self.parse_attributes(line[8])
+        attribs = self.parse_key_attributes(line[8])
 
         if not attribs:
             return None
 
-        if 'name' in attribs:
-            del attribs['name']
-        
         result.update(attribs)
         return result
 
     def extract_exon_args(self, line):
         """Pulls Exon arguments from a gff line and returns them in a dictionary."""
-        result = {'indices': [int(line[3]), int(line[4])], 'strand': line[6]}
+        result = {'indices': [int(line[3]), int(line[4])], 'strand': intern(line[6])}
         if line[5] != '.':
             result['score'] = float(line[5])
-        attribs = self.parse_attributes(line[8])
+        attribs = self.parse_key_attributes(line[8])
 
         if not attribs:
             return None
 
-        if 'name' in attribs:
-            del attribs['name']
-
         result.update(attribs)
         return result
 
     def extract_mrna_args(self, line):
         """Pulls MRNA arguments from a gff line and returns them in a dictionary."""
-        result = {'indices': [int(line[3]), int(line[4])], 'strand': line[6]}
-        attribs = self.parse_attributes(line[8])
+        result = {'indices': [int(line[3]), int(line[4])], 'strand': intern(line[6]),\
+                'raw_attributes': line[8]}
+        attribs = self.parse_key_attributes(line[8], True)
 
         if not attribs:
             return None
 
-        if 'name' in attribs:
-            del attribs['name']
-        
         result.update(attribs)
-        return result        
+        return result
 
     def extract_gene_args(self, line):  
         """Pulls Gene arguments from a gff line and returns them in a dictionary."""
-        result = {'seq_name': line[0], 'source': line[1], \
-                  'indices': [int(line[3]), int(line[4])], 'strand': line[6]}
-        attribs = self.parse_attributes(line[8])
+        result = {'seq_name': intern(line[0]), 'source': intern(line[1]), \
+                  'indices': [int(line[3]), int(line[4])], 'strand': intern(line[6]),\
+                  'raw_attributes': line[8]}
+        attribs = self.parse_key_attributes(line[8], True)
 
         if not attribs:
             return None
@@ -125,23 +226,31 @@ class GFFReader:
 
     def extract_other_feature_args(self, line):
         """Pulls GenePart arguments from a gff line and returns them in a dictionary."""
-        result = {'feature_type': line[2], 'indices': [int(line[3]), int(line[4])]}
-        attribs = self.parse_attributes(line[8])
+        result = {'feature_type': intern(line[2]), 'indices': [int(line[3]), int(line[4])]}
+        attribs = self.parse_key_attributes(line[8])
         result.update(attribs)
         return result
 
-    def update_cds(self, line, cds):
-        """Adds the fields of a gff line to an existing CDS object."""
-        args = self.extract_cds_args(line)
+    def update_cds(self, line, cds, args=None):
+        """Adds the fields of a gff line to an existing CDS object.
+
+        args may be passed in if the line's arguments were already extracted.
+        """
+        if args is None:
+            args = self.extract_cds_args(line)
         cds.add_indices(args['indices'])
         cds.add_phase(args['phase'])
         cds.add_identifier(args['identifier'])
         if 'score' in args:
             cds.add_score(args['score'])
 
-    def update_exon(self, line, exon):
-        """Adds the fields of a gff line to an existing Exon object."""
-        args = self.extract_exon_args(line)
+    def update_exon(self, line, exon, args=None):
+        """Adds the fields of a gff line to an existing Exon object.
+
+        args may be passed in if the line's arguments were already extracted.
+        """
+        if args is None:
+            args = self.extract_exon_args(line)
         exon.add_indices(args['indices'])
         exon.add_identifier(args['identifier'])
         if 'score' in args:
@@ -194,13 +303,16 @@ class GFFReader:
         kwargs = self.extract_cds_args(line)
         if not kwargs:
             return
-        parent_id = kwargs['parent_id']
-        if parent_id not in self.mrnas:
-            self.orphans.append(line)
+        if kwargs['parent_id'] not in self.mrnas:
+            self.defer_orphan(line, kwargs)
             return
-        parent_mrna = self.mrnas[parent_id]
+        self.place_cds(line, kwargs)
+
+    def place_cds(self, line, kwargs):
+        """Adds a CDS line to its parent mRNA, which must already have been read."""
+        parent_mrna = self.mrnas[kwargs['parent_id']]
         if parent_mrna.cds:
-            self.update_cds(line, parent_mrna.cds)
+            self.update_cds(line, parent_mrna.cds, kwargs)
         else:
             parent_mrna.cds = CDS(**kwargs)
 
@@ -209,13 +321,16 @@ class GFFReader:
         kwargs = self.extract_exon_args(line)
         if not kwargs:
             return
-        parent_id = kwargs['parent_id']
-        if parent_id not in self.mrnas:
-            self.orphans.append(line)
+        if kwargs['parent_id'] not in self.mrnas:
+            self.defer_orphan(line, kwargs)
             return
-        parent_mrna = self.mrnas[parent_id]
+        self.place_exon(line, kwargs)
+
+    def place_exon(self, line, kwargs):
+        """Adds an exon line to its parent mRNA, which must already have been read."""
+        parent_mrna = self.mrnas[kwargs['parent_id']]
         if parent_mrna.exon:
-            self.update_exon(line, parent_mrna.exon)
+            self.update_exon(line, parent_mrna.exon, kwargs)
         else:
             parent_mrna.exon = Exon(**kwargs)
 
@@ -224,28 +339,92 @@ class GFFReader:
         kwargs = self.extract_other_feature_args(line)
         if not kwargs:
             return
-        parent_id = kwargs['parent_id']
-        if parent_id not in self.mrnas:
-            self.orphans.append(line)
+        if kwargs['parent_id'] not in self.mrnas:
+            self.defer_orphan(line, kwargs)
             return
-        parent_mrna = self.mrnas[parent_id]
+        self.place_other_feature(line, kwargs)
+
+    def place_other_feature(self, line, kwargs):
+        """Adds a GenePart to its parent mRNA, which must already have been read."""
+        parent_mrna = self.mrnas[kwargs['parent_id']]
         parent_mrna.other_features.append(GenePart(**kwargs))
 
+    def defer_orphan(self, line, kwargs):
+        """Saves an already-parsed child line until its parent mRNA is read."""
+        self.orphans.setdefault(kwargs['parent_id'], []).append((line, kwargs))
+
+    def place_orphans(self):
+        """Attaches each bucket of deferred child lines to its parent mRNA.
+
+        Called once the whole file has been read, so the children land after
+        any that followed their parent, as they always have. Buckets whose
+        parent never turned up are left in self.orphans; returns how many
+        lines they hold.
+        """
+        placers = {'CDS': self.place_cds, 'exon': self.place_exon,\
+                'start_codon': self.place_other_feature, 'stop_codon': self.place_other_feature}
+        for parent_id in self.orphans.keys():
+            if parent_id not in self.mrnas:
+                continue
+            for line, kwargs in self.orphans.pop(parent_id):
+                placers[self.line_type(line)](line, kwargs)
+        return sum([len(bucket) for bucket in self.orphans.values()])
+
     def read_file(self, reader):
         """GFFReader's public method, takes a reader and returns a list of Genes.
 
-        Writes comments to 'genome.comments.gff',
-        invalid lines to 'genome.invalid.gff' and
-        ignored features to 'genome.ignored.gff'.
+        Writes comments, invalid lines and ignored features to the sinks
+        set up in self.sinks; by default 'genome.comments.gff',
+        'genome.invalid.gff' and 'genome.ignored.gff'.
         """
-        # Open files to write comments, invalid and ignored entries
-        comments = open('genome.comments.gff', 'w')
-        invalid = open('genome.invalid.gff', 'w')
-        ignored = open('genome.ignored.gff', 'w')
-
-        # First pass, pulling out all genes and mRNAs
-        #  and placing child features if possible
-        for line in reader:
+        comments, invalid, ignored = self.open_sinks()
+        try:
+            self.read_lines(reader, comments, invalid, ignored)
+        finally:
+            self.close_sinks([comments, invalid, ignored])
+        genes, unplaced = self.link_features()
+
+        if self.skipped_features > 0:
+            sys.stderr.write("Warning: skipped "+str(self.skipped_features)+" uninteresting features.\n")
+        if unplaced > 0:
+            sys.stderr.write("Warning: skipped "+str(unplaced)+" features with no parent mRNA.\n")
+        return genes
+
+    def open_sinks(self):
+        """Returns the comments, invalid and ignored sinks, opened as self.sinks says; None if off."""
+        self.sink_counts = {}
+        return [open_sink(self.sinks[name]) for name in SINK_NAMES]
+
+    def close_sinks(self, sinks):
+        """Flushes and closes sinks from open_sinks, saving the counting sinks' totals in self.sink_counts."""
+        for name, sink in zip(SINK_NAMES, sinks):
+            if sink is None:
+                continue
+            sink.close()
+            if isinstance(sink, CountingSink):
+                self.sink_counts[name] = sink.count
+
+    def read_lines(self, lines, comments, invalid, ignored):
+        """Processes gff lines, writing the ones that aren't features to the given sinks.
+
+        Pulls out all genes and mRNAs, placing child features if possible
+        and setting aside those that come before their parents. A sink may
+        be None to drop those lines.
+        """
+        if comments is None and invalid is None and ignored is None:
+            # Nothing to record, so skip the bookkeeping
+            for line in lines:
+                if len(line) == 0 or line[0] == '#':
+                    continue
+                splitline = self.validate_line(line)
+                if splitline:
+                    self.process_line(splitline)
+            return
+        null_sink = NullSink()
+        comments = comments or null_sink
+        invalid = invalid or null_sink
+        ignored = ignored or null_sink
+        for line in lines:
             if len(line) == 0 or line[0].startswith('#'):
                 comments.write(line)
                 continue
@@ -257,18 +436,131 @@ class GFFReader:
                 if not line_added:
                     ignored.write(line)
 
-        # Second pass, placing child features which 
-        # preceded their parents in the first pass
-        orphans = copy.deepcopy(self.orphans)
-        for splitline in orphans:
-            self.process_line(splitline)
-           
+    def read_file_parallel(self, gff_path, workers):
+        """Reads an uncompressed gff file with a pool of worker processes; returns a list of Genes.
+
+        A quick scan splits the file into runs of lines with the same seqid.
+        Every run for a seqid goes to the same shard, so each worker sees all
+        of a gene's lines, and the shards are parsed independently. Comments
+        are written as they're found; invalid and ignored lines are written
+        shard by shard. self.shards records each shard's seqids and counts of
+        skipped features and children left without a parent in the shard.
+
+        The shards' genes and mRNAs are put into self.genes and self.mrnas in
+        file order, just as read_file would have put them, so genes, their
+        mRNAs and the stats that depend on their order come out the same as
+        from read_file. Children whose parent mRNA is in another shard are
+        placed once all shards are in.
+        """
+        comments, invalid, ignored = self.open_sinks()
+        assignments = []
+        pool = Pool(workers)
+        try:
+            runs = find_seqid_runs(gff_path, comments)
+            shards = make_shards(runs, workers * 2)
+            jobs = [(gff_path, shard['ranges'], invalid is not None, ignored is not None) for shard in shards]
+            for shard, result in zip(shards, pool.imap(parse_shard, jobs)):
+                shard_assignments, orphans, skipped, invalid_text, ignored_text = result
+                assignments.extend(shard_assignments)
+                for parent_id, bucket in orphans.items():
+                    self.orphans.setdefault(parent_id, []).extend(bucket)
+                shard_unplaced = sum([len(bucket) for bucket in orphans.values()])
+                self.skipped_features += skipped
+                if invalid is not None:
+                    invalid.write(invalid_text)
+                if ignored is not None:
+                    ignored.write(ignored_text)
+                self.shards.append({'seqids': shard['seqids'], 'skipped_features': skipped,\
+                        'unplaced': shard_unplaced})
+        finally:
+            pool.close()
+            pool.join()
+            self.close_sinks([comments, invalid, ignored])
+
+        # Replay the assignments in file order, so the dicts end up as read_file leaves them
+        assignments.sort(key=lambda assignment: assignment[0])
+        for start, gene_log, mrna_log in assignments:
+            for gene_id, gene in gene_log:
+                self.genes[gene_id] = gene
+            for mrna_id, mrna in mrna_log:
+                self.mrnas[mrna_id] = mrna
+        genes, unplaced = self.link_features()
+
+        if self.skipped_features > 0:
+            sys.stderr.write("Warning: skipped "+str(self.skipped_features)+" uninteresting features.\n")
+        if unplaced > 0:
+            sys.stderr.write("Warning: skipped "+str(unplaced)+" features with no parent mRNA.\n")
+        return genes
+
+    def read_by_seqid(self, reader):
+        """Takes a reader over a gff sorted by seqid and yields (seqid, list of Genes) for each seqid.
+
+        Only one seqid's features are held at a time, so memory use is set
+        by the largest sequence rather than the whole file. Raises
+        ValueError if a seqid turns up again after its genes were yielded.
+        Writes comments, invalid lines and ignored features to the same
+        sinks as read_file.
+        """
+        sinks = self.open_sinks()
+        null_sink = NullSink()
+        comments, invalid, ignored = [sink or null_sink for sink in sinks]
+
+        seqid = None
+        finished = set()
+        unplaced = 0
+        try:
+            for line in reader:
+                if len(line) == 0 or line[0].startswith('#'):
+                    comments.write(line)
+                    continue
+                splitline = self.validate_line(line)
+                if not splitline:
+                    invalid.write(line)
+                    continue
+                if splitline[0] != seqid:
+                    if seqid is not None:
+                        genes, seq_unplaced = self.take_features()
+                        unplaced += seq_unplaced
+                        finished.add(seqid)
+                        yield seqid, genes
+                    if splitline[0] in finished:
+                        raise ValueError("Can't stream gff: features on " + splitline[0] +\
+                                " aren't all together. Sort the file by seqid first.")
+                    seqid = splitline[0]
+                if not self.process_line(splitline):
+                    ignored.write(line)
+            if seqid is not None:
+                genes, seq_unplaced = self.take_features()
+                unplaced += seq_unplaced
+                yield seqid, genes
+        finally:
+            self.close_sinks(sinks)
+
+        if self.skipped_features > 0:
+            sys.stderr.write("Warning: skipped "+str(self.skipped_features)+" uninteresting features.\n")
+        if unplaced > 0:
+            sys.stderr.write("Warning: skipped "+str(unplaced)+" features with no parent mRNA.\n")
+
+    def link_features(self):
+        """Places deferred child features and adds mRNAs to their genes.
+
+        Returns the list of Genes read so far and the number of child
+        features whose parent mRNA never turned up.
+        """
+        # Place child features which preceded their parents
+        unplaced = self.place_orphans()
+
         # Add mRNAs to their parent genes
         for mrna in self.mrnas.values():
             parent_gene = self.genes[mrna.parent_id]
             parent_gene.mrnas.append(mrna)
 
-        if self.skipped_features > 0:
-            sys.stderr.write("Warning: skipped "+str(self.skipped_features)+" uninteresting features.\n")
-        return self.genes.values()
+        return self.genes.values(), unplaced
 
+    def take_features(self):
+        """Links the features read so far and returns them as link_features does, then forgets them."""
+        result = self.link_features()
+        self.genes = {}
+        self.mrnas = {}
+        self.orphans = {}
+        return result
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+import bisect
+
+class FeatureHit:
+    """One indexed coordinate pair: a gene, an mRNA, or one segment of an exon or CDS."""
+
+    def __init__(self, kind, feature, gene, mrna=None, segment=None):
+        self.kind = kind
+        self.feature = feature
+        self.gene = gene
+        self.mrna = mrna
+        self.segment = segment
+
+    def indices(self):
+        """Returns the current [start, stop] of this hit, read from the feature itself."""
+        if self.segment is None:
+            return self.feature.indices
+        return self.feature.indices[self.segment]
+
+    def is_current(self):
+        """Returns False if the feature has been removed from its gene since it was indexed."""
+        if self.mrna is None:
+            return True
+        if self.mrna not in self.gene.mrnas:
+            return False
+        if self.kind == 'exon':
+            return self.mrna.exon is self.feature
+        if self.kind == 'CDS':
+            return self.mrna.cds is self.feature
+        return True
+
+
+def gene_hits(gene):
+    """Returns a FeatureHit for a gene and for each of its mRNAs, exon segments and CDS segments."""
+    hits = [FeatureHit('gene', gene, gene)]
+    for mrna in gene.mrnas:
+        hits.append(FeatureHit('mRNA', mrna, gene, mrna))
+        if mrna.exon:
+            for i in xrange(len(mrna.exon.indices)):
+                hits.append(FeatureHit('exon', mrna.exon, gene, mrna, i))
+        if mrna.cds:
+            for i in xrange(len(mrna.cds.indices)):
+                hits.append(FeatureHit('CDS', mrna.cds, gene, mrna, i))
+    return hits
+
+
+class IntervalIndex:
+    """Feature coordinates sorted by start, with a running maximum of stops.
+
+    A query bisects for the last feature starting at or before the end
+    of the region and walks back until the running maximum stop drops
+    below the region's start; nothing earlier can reach the region.
+    """
+
+    def __init__(self, genes):
+        self.genes = genes
+        self.gene_count = len(genes)
+        hits = []
+        for gene in genes:
+            hits.extend(gene_hits(gene))
+        self.set_hits(hits)
+
+    def set_hits(self, hits):
+        pairs = [(hit.indices()[0], hit) for hit in hits]
+        pairs.sort(key=lambda pair: pair[0])
+        self.hits = [pair[1] for pair in pairs]
+        self.starts = [pair[0] for pair in pairs]
+        self.stops = [hit.indices()[1] for hit in self.hits]
+        self.max_stops = []
+        self.update_max_stops(0)
+
+    def update_max_stops(self, first):
+        """Recomputes the running maximum of stops from position 'first' on."""
+        del self.max_stops[first:]
+        highest = self.max_stops[-1] if self.max_stops else 0
+        for stop in self.stops[first:]:
+            if stop > highest:
+                highest = stop
+            self.max_stops.append(highest)
+
+    def covers(self, genes):
+        """Returns True if the index was built over this gene list and its length hasn't changed."""
+        return self.genes is genes and self.gene_count == len(genes)
+
+    def query(self, start, stop, kinds=None):
+        """Returns FeatureHits overlapping [start, stop] (inclusive), ordered by start.
+
+        Optionally only hits whose kind ('gene', 'mRNA', 'exon', 'CDS') is in kinds.
+        """
+        result = []
+        i = bisect.bisect_right(self.starts, stop) - 1
+        while i >= 0 and self.max_stops[i] >= start:
+            hit = self.hits[i]
+            if self.stops[i] >= start and (kinds is None or hit.kind in kinds) and hit.is_current():
+                result.append(hit)
+            i -= 1
+        result.reverse()
+        return result
+
+    def genes_overlapping(self, start, stop):
+        """Returns the genes whose own indices overlap [start, stop], ordered by start."""
+        return [hit.gene for hit in self.query(start, stop, ['gene'])]
+
+    def trim(self, start, stop, removed, genes):
+        """Updates the index after the bases start..stop were cut out of the sequence.
+
+        'removed' holds the genes dropped by the trim and 'genes' is the sequence's
+        new gene list; the remaining features must already have had their indices
+        adjusted. Features ending before the cut keep their place untouched.
+        """
+        self.genes = genes
+        self.gene_count = len(genes)
+        first = bisect.bisect_left(self.starts, start)
+        # Everything before 'changed' is untouched, so the running maximum holds there
+        changed = first
+        # Features starting before the cut keep their start and stay sorted
+        head = []
+        for i in xrange(first):
+            hit = self.hits[i]
+            if hit.gene in removed:
+                changed = min(changed, i)
+                continue
+            if self.stops[i] >= start:
+                changed = min(changed, i)
+            head.append((self.starts[i], hit))
+        # Features at or after the cut moved left by the same amount, except at the
+        # boundary where genes and mRNAs shift differently
+        tail = [(hit.indices()[0], hit) for hit in self.hits[first:] if hit.gene not in removed]
+        tail.sort(key=lambda pair: pair[0])
+        if tail:
+            # A kept feature that started inside the cut can now start before some of the head
+            changed = min(changed, bisect.bisect_right([pair[0] for pair in head], tail[0][0]))
+        # Two sorted runs, which timsort merges in linear time
+        pairs = head + tail
+        pairs.sort(key=lambda pair: pair[0])
+        self.hits = [pair[1] for pair in pairs]
+        self.starts = [pair[0] for pair in pairs]
+        self.stops = [hit.indices()[1] for hit in self.hits]
+        self.update_max_stops(changed)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+class LazyBases(object):
+    """Base class for nucleotide storage that isn't a plain Python string.
+
+    Subclasses supply __len__ and fetch(start, stop); this class fills in
+    enough of the str interface (indexing, slicing, concatenation, iteration)
+    that a Sequence can hold one in place of its 'bases' string.
+    """
+
+    # Size of the pieces handed out when iterating over the bases
+    chunk_size = 1 << 16
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def fetch(self, start, stop):
+        """Returns the bases from 0-based start up to (not including) stop as a str."""
+        raise NotImplementedError()
+
+    def __getitem__(self, key):
+        length = len(self)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(length)
+            if step == 1:
+                if stop <= start:
+                    return ''
+                return self.fetch(start, stop)
+            # Odd steps (e.g. reversed slices) are rare; fetch the span and let str do the work
+            if step > 0:
+                if stop <= start:
+                    return ''
+                return self.fetch(start, stop)[::step]
+            if start <= stop:
+                return ''
+            span = self.fetch(stop+1, start+1)
+            return span[::step]
+        if key < 0:
+            key += length
+        if key < 0 or key >= length:
+            raise IndexError("bases index out of range")
+        return self.fetch(key, key+1)
+
+    def __iter__(self):
+        length = len(self)
+        for start in xrange(0, length, self.chunk_size):
+            for base in self.fetch(start, min(start+self.chunk_size, length)):
+                yield base
+
+    def __str__(self):
+        return self.fetch(0, len(self))
+
+    def __repr__(self):
+        return self.__class__.__name__ + " of length " + str(len(self))
+
+    def __add__(self, other):
+        return str(self) + other
+
+    def __radd__(self, other):
+        return other + str(self)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyBases):
+            other = str(other)
+        if not isinstance(other, str):
+            return False
+        return len(self) == len(other) and str(self) == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __nonzero__(self):
+        return len(self) > 0
+
+    def __deepcopy__(self, memo):
+        # Stored bases are never modified in place, so copies can share them
+        return self
+
+    def __copy__(self):
+        return self
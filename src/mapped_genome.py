@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+import mmap
+import os
+import sys
+from contextlib import closing
+from src.lazy_bases import LazyBases
+from src.compressed_file import open_input, is_gzipped
+from src.fasta_index import FastaIndexEntry, header_to_name, read_fai, write_fai, WHITESPACE
+
+# Bytes of fasta copied to the flat file at a time
+BLOCK_SIZE = 1 << 22
+
+class MappedGenome:
+    """A fasta file's bases, rewritten to a flat file and memory-mapped.
+
+    The fasta may be gzipped. The flat file ('<fasta>.flat') holds each sequence on one line with no
+    other newlines, so a range of bases is a single contiguous slice of the
+    map. '<fasta>.flat.fai' records where each sequence starts. Because the
+    map is read-only and backed by the file, every GAG process on a machine
+    that opens the same genome shares one page-cached copy of it.
+    """
+
+    def __init__(self, fasta_path, threads=None):
+        self.fasta_path = fasta_path
+        self.threads = threads
+        self.flat_path = fasta_path + '.flat'
+        self.index_path = self.flat_path + '.fai'
+        self.entries = []
+        self.handle = None
+        self.map = None
+
+    def load(self):
+        """Maps the flat file, (re)writing it first if it's missing or older than the fasta."""
+        if self.flat_file_is_current():
+            self.read_index()
+        else:
+            sys.stderr.write("Writing flat genome file " + self.flat_path + "...\n")
+            self.build()
+        self.open_map()
+        return self.entries
+
+    def flat_file_is_current(self):
+        for path in [self.flat_path, self.index_path]:
+            if not os.path.isfile(path):
+                return False
+            if os.path.getmtime(path) < os.path.getmtime(self.fasta_path):
+                return False
+        return True
+
+    def build(self):
+        """Writes the fasta's bases to the flat file, one line of bases per sequence."""
+        if is_gzipped(self.fasta_path):
+            self.build_from_stream()
+        else:
+            self.build_from_map()
+        for entry in self.entries:
+            entry.line_bases = entry.length
+            entry.line_width = entry.length + 1
+        self.write_index()
+        return self.entries
+
+    def build_from_map(self):
+        """Finds each record by searching a map of the fasta for headers, then copies its
+        bases out a block at a time with the whitespace taken out, rather than line by line."""
+        self.entries = []
+        offset = 0
+        with open(self.fasta_path, 'rb') as fasta:
+            if os.path.getsize(self.fasta_path) == 0:
+                text = ''
+            else:
+                text = mmap.mmap(fasta.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                with open(self.flat_path, 'wb') as flat:
+                    if text[:1] == '>':
+                        header_pos = 0
+                    else:
+                        header_pos = text.find('\n>')
+                        if header_pos != -1:
+                            header_pos += 1
+                    while header_pos != -1:
+                        end_of_header = text.find('\n', header_pos)
+                        if end_of_header == -1:
+                            end_of_header = len(text)
+                        entry = FastaIndexEntry(header_to_name(text[header_pos:end_of_header]), 0, offset, 0, 0)
+                        self.entries.append(entry)
+                        header_pos = text.find('\n>', end_of_header)
+                        if header_pos != -1:
+                            header_pos += 1
+                            stop = header_pos
+                        else:
+                            stop = len(text)
+                        for start in xrange(end_of_header + 1, stop, BLOCK_SIZE):
+                            bases = text[start:min(start + BLOCK_SIZE, stop)].replace('\n', '')
+                            if not bases.isalpha():
+                                # Carriage returns, spaces and so on are rare; taking out just
+                                # the newlines first is much quicker
+                                bases = bases.translate(None, WHITESPACE)
+                            flat.write(bases)
+                            entry.length += len(bases)
+                        flat.write('\n')
+                        offset += entry.length + 1
+            finally:
+                if not isinstance(text, str):
+                    text.close()
+
+    def build_from_stream(self):
+        """Like build_from_map, for a gzipped fasta, which has to be read through in order."""
+        self.entries = []
+        entry = None
+        offset = 0
+        with closing(open_input(self.fasta_path, self.threads)) as fasta:
+            with open(self.flat_path, 'wb') as flat:
+                for line in fasta:
+                    if line.startswith('>'):
+                        if entry is not None:
+                            flat.write('\n')
+                            offset += 1
+                        entry = FastaIndexEntry(header_to_name(line), 0, offset, 0, 0)
+                        self.entries.append(entry)
+                    elif entry is not None:
+                        bases = line.translate(None, WHITESPACE)
+                        flat.write(bases)
+                        entry.length += len(bases)
+                        offset += len(bases)
+                if entry is not None:
+                    flat.write('\n')
+
+    def read_index(self):
+        self.entries = read_fai(self.index_path)
+
+    def write_index(self):
+        write_fai(self.index_path, self.entries)
+
+    def open_map(self):
+        self.close()
+        self.handle = open(self.flat_path, 'rb')
+        if os.path.getsize(self.flat_path) == 0:
+            # mmap refuses empty files; an empty genome has no bases to map anyway
+            self.map = ''
+        else:
+            self.map = mmap.mmap(self.handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_bases(self, entry, start, stop):
+        """Returns bases [start, stop) (0-based) of a sequence, sliced straight from the map."""
+        if stop <= start:
+            return ''
+        return self.map[entry.offset+start:entry.offset+stop]
+
+    def close(self):
+        if self.map is not None and not isinstance(self.map, str):
+            self.map.close()
+        self.map = None
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+
+class MappedBases(LazyBases):
+    """The bases of one sequence in a MappedGenome."""
+
+    def __init__(self, genome, entry):
+        self.genome = genome
+        self.entry = entry
+
+    def __len__(self):
+        return self.entry.length
+
+    def fetch(self, start, stop):
+        return self.genome.read_bases(self.entry, start, stop)
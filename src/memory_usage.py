@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import sys
+from array import array
+from src.gff_attributes import stored_attribute
+
+def deep_size(obj, seen=None):
+    """Returns the bytes used by obj and everything it refers to, counting shared objects once.
+
+    Follows lists, tuples, sets, dicts, arrays, instance dicts and __slots__;
+    pass the same 'seen' set to several calls to measure what they hold together.
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, (str, unicode, int, long, float, bool, array)):
+            continue
+        if isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            pending.extend(current)
+        else:
+            if hasattr(current, '__dict__'):
+                pending.append(current.__dict__)
+            for cls in type(current).__mro__:
+                for slot in cls.__dict__.get('__slots__', ()):
+                    pending.append(stored_attribute(current, slot))
+    return total
+
+def annotation_size(seqs):
+    """Returns the bytes used by the genes on the given seqs, leaving out the bases."""
+    seen = set()
+    total = 0
+    for seq in seqs:
+        total += deep_size(seq.genes, seen)
+        total += deep_size(seq.removed_genes, seen)
+    return total
+
+# The string attributes GFFReader interns, by kind of feature
+SHARED_FIELDS = {'gene': ['seq_name', 'source', 'strand', 'identifier'],\
+        'mRNA': ['strand', 'identifier', 'parent_id'],\
+        'part': ['feature_type', 'strand', 'parent_id']}
+
+def features_by_kind(seqs):
+    """Yields (kind, feature) for every gene, mRNA and gene part on the given seqs."""
+    for seq in seqs:
+        for gene in seq.genes:
+            yield 'gene', gene
+            for mrna in gene.mrnas:
+                yield 'mRNA', mrna
+                for part in [mrna.exon, mrna.cds] + mrna.other_features:
+                    if part:
+                        yield 'part', part
+
+def shared_strings(seqs):
+    """Returns (references, distinct) counts for the string fields of the genes
+    on the given seqs that interning should share.
+    """
+    references = 0
+    distinct = set()
+    for kind, feature in features_by_kind(seqs):
+        for field in SHARED_FIELDS[kind]:
+            value = getattr(feature, field, None)
+            if isinstance(value, str):
+                distinct.add(id(value))
+                references += 1
+    return references, len(distinct)
+
+def format_bytes(count):
+    """Returns a byte count as a short human-readable string, e.g. '12.3 MB'."""
+    for unit in ['bytes', 'KB', 'MB']:
+        if count < 1024:
+            if unit == 'bytes':
+                return str(count) + " " + unit
+            return "%.1f %s" % (count, unit)
+        count /= 1024.0
+    return "%.1f GB" % count
+
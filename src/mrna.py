@@ -1,15 +1,20 @@
 #!/usr/bin/env python
 
 import math
-from src.gene_part import GenePart
+from src.gene_part import GenePart, deepcopy_slots
+from src.gff_attributes import decode_attributes, other_attributes
 import src.translator as translate
 
 def length_of_segment(index_pair):
     return math.fabs(index_pair[1] - index_pair[0]) + 1
 
-class MRNA:
+class MRNA(object):
 
-    def __init__(self, identifier, indices, parent_id, strand='+', annotations=None):
+    # No per-instance dict; genomes hold hundreds of thousands of these
+    __slots__ = ('identifier', 'indices', 'parent_id', 'strand', 'exon', 'cds', 'other_features',\
+            'raw_attributes', 'annotations', 'death_flagged')
+
+    def __init__(self, identifier, indices, parent_id, strand='+', annotations=None, raw_attributes=None):
         self.identifier = identifier
         self.indices = indices
         self.parent_id = parent_id
@@ -17,12 +22,26 @@ class MRNA:
         self.exon = None
         self.cds = None
         self.other_features = []
-        if not annotations:
-            self.annotations = []
-        else:
-            self.annotations = annotations
+        # The gff attribute column, if the mRNA was read from a file
+        self.raw_attributes = raw_attributes
+        if raw_attributes is None:
+            if not annotations:
+                self.annotations = []
+            else:
+                self.annotations = annotations
+        # Otherwise annotations are decoded from it when first used
         self.death_flagged = False
 
+    def __getattr__(self, attr):
+        """Decodes annotations from the raw attribute column on first access."""
+        if attr == 'annotations' and self.raw_attributes is not None:
+            self.annotations = decode_attributes(self.raw_attributes).get('annotations', [])
+            return self.annotations
+        raise AttributeError(attr)
+
+    def __deepcopy__(self, memo):
+        return deepcopy_slots(self, memo)
+
     def __str__(self):
         """Returns string representation of the mRNA.
 
@@ -71,6 +90,17 @@ class MRNA:
         for feature in self.other_features:
             feature.adjust_indices(n, start_index)
 
+    def remap_indices(self, offsets):
+        """Moves indices of mRNA and its child features through an OffsetMap (see EditPlan)."""
+        # adjust_indices only moves mRNA indices lying strictly after a trim
+        self.indices = [offsets.map(i, False) for i in self.indices]
+        if self.exon:
+            self.exon.remap_indices(offsets)
+        if self.cds:
+            self.cds.remap_indices(offsets)
+        for feature in self.other_features:
+            feature.remap_indices(offsets)
+
     def number_of_gagflags(self):
         """Returns the number of flagged features contained by mRNA.
 
@@ -194,6 +224,8 @@ class MRNA:
         result += ";Parent=" + str(self.parent_id)
         for annot in self.annotations:
             result += ';'+annot[0]+'='+annot[1]
+        if self.raw_attributes is not None:
+            result += other_attributes(self.raw_attributes)
         result += '\n'
         if self.exon:
             result += self.exon.to_gff(seq_name, source)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+from multiprocessing import Pool
+from src.fasta_index import IndexedBases
+from src.seq_view import fixed_view
+
+# What the workers compute stats on. It's set before the pool starts, so forked
+# workers inherit the seqs instead of having them pickled over.
+JOBS = {}
+
+def largest_first(seqs):
+    """Returns the positions of seqs, longest sequence first."""
+    return sorted(range(len(seqs)), key=lambda i: len(seqs[i].bases), reverse=True)
+
+def start_worker():
+    """Gives a new worker its own handles on indexed fasta files, since a handle
+    shared with other processes shares their seek position too."""
+    for seq in JOBS['seqs']:
+        if isinstance(seq.bases, IndexedBases):
+            seq.bases.index.close()
+
+def seq_stats(position):
+    """Returns (stats, number of gagflags) for one seq, in a worker process."""
+    seq = JOBS['seqs'][position]
+    if JOBS['fixer'] is not None:
+        seq = fixed_view(seq, JOBS['fixer'], JOBS['filter_mgr'])
+    accumulator = seq.stats_accumulator()
+    return accumulator.stats(len(seq.bases)), accumulator.gagflags
+
+def parallel_seq_stats(seqs, workers, fixer=None, filter_mgr=None):
+    """Yields (stats, number of gagflags) for each seq, computed by a pool of worker processes.
+
+    With a fixer and filter_mgr the stats are for the seqs with fixes and
+    filters applied. The longest seqs are handed out first, one at a time, so
+    a big chromosome doesn't start last and leave the other workers idle.
+    Results come in the order they're finished, which StatsManager.update_stats
+    doesn't mind.
+    """
+    JOBS['seqs'] = seqs
+    JOBS['fixer'] = fixer
+    JOBS['filter_mgr'] = filter_mgr
+    pool = Pool(workers, start_worker)
+    try:
+        for result in pool.imap_unordered(seq_stats, largest_first(seqs)):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+        JOBS.clear()
+
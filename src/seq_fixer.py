@@ -7,15 +7,39 @@ class SeqFixer:
         self.terminal_ns = False
         self.start_stop_codons = False
         self.dirty = False
+        # Bumped on every settings change, so cached results can tell they're stale
+        self.version = 0
 
     def fix_terminal_ns(self):
+        if not self.terminal_ns:
+            self.version += 1
         self.terminal_ns = True
         self.dirty = True
 
     def fix_start_stop_codons(self):
+        if not self.start_stop_codons:
+            self.version += 1
         self.start_stop_codons = True
         self.dirty = True
 
+    def terminal_n_counts(self, seq):
+        """Returns how many Ns fix() would trim from the start and from the end of seq."""
+        if not self.terminal_ns or not seq.bases:
+            return 0, 0
+        return seq.how_many_Ns_forward(1), seq.how_many_Ns_backward(len(seq.bases))
+
+    def first_changed_base(self, seq):
+        """Returns the lowest coordinate at which fix() may change features on seq, or None
+        if it leaves every feature alone."""
+        if self.start_stop_codons:
+            return 1
+        leading, trailing = self.terminal_n_counts(seq)
+        if leading:
+            return 1
+        if trailing:
+            return len(seq.bases) - trailing + 1
+        return None
+
     def fix(self, seq):
         if self.terminal_ns:
             seq.remove_terminal_ns()
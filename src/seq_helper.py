@@ -50,11 +50,13 @@ class SeqHelper:
         return result
 
     def get_sequence_from_indices(self, strand, indices):
-        result = ""
+        # Collect the slices and join once rather than growing a string
+        pieces = []
         for index_pair in indices:
             start = index_pair[0]-1
             stop = index_pair[1]
-            result += self.full_sequence[start:stop]
+            pieces.append(self.full_sequence[start:stop])
+        result = "".join(pieces)
         if strand == '-':
             result = reverse_complement(result)
         return result
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import copy
+from src.sequence import Sequence
+
+def last_base(gene):
+    """Returns the highest coordinate of any feature in a gene."""
+    highest = gene.indices[1]
+    for mrna in gene.mrnas:
+        highest = max(highest, mrna.indices[1])
+        parts = [mrna.exon, mrna.cds] + mrna.other_features
+        for part in parts:
+            if part and part.indices:
+                highest = max(highest, max(pair[1] for pair in part.indices))
+    return highest
+
+def with_shared_ids(seq, genes):
+    """Returns the genes on seq that share an id with any of the given genes, in seq order.
+
+    Sequence.remove_gene drops the last gene with a matching id, so genes
+    sharing an id have to be fixed and filtered together.
+    """
+    ids = set(gene.identifier for gene in genes)
+    return [gene for gene in seq.genes if gene.identifier in ids]
+
+def fix_and_filter(seq, genes, fixer, filter_mgr):
+    """Returns a new Sequence sharing seq's bases, holding the given genes with
+    fixes and filters applied to them.
+
+    Fixes and filters act on each gene separately, so the genes come out
+    the same as they would from fixing and filtering all of seq.
+    """
+    view = Sequence(seq.header, seq.bases)
+    view.genes = genes
+    view.removed_genes = list(seq.removed_genes)
+    fixer.fix(view)
+    filter_mgr.apply_filters(view)
+    return view
+
+def fixed_copy(seq, genes, fixer, filter_mgr):
+    """Like fix_and_filter, but works on copies of the genes, which must be in seq order."""
+    return fix_and_filter(seq, copy.deepcopy(genes), fixer, filter_mgr)
+
+def fixed_view(seq, fixer, filter_mgr):
+    """Returns seq as it looks with fixes and filters applied, leaving seq untouched.
+
+    Genes the fixes and filters would leave alone are shared with seq rather
+    than copied; only the others are copied and put through the real fixes
+    and filters. Callers must treat the shared genes as read-only.
+    """
+    first_changed = fixer.first_changed_base(seq)
+    touched = [gene for gene in seq.genes if filter_mgr.changes(gene) or \
+            (first_changed is not None and last_base(gene) >= first_changed)]
+    if len(touched) == len(seq.genes):
+        return fixed_copy(seq, seq.genes, fixer, filter_mgr)
+    touched = with_shared_ids(seq, touched)
+    copies = copy.deepcopy(touched)
+    view = fix_and_filter(seq, list(copies), fixer, filter_mgr)
+    # Put the surviving copies back among the untouched genes, in seq order
+    survivors = set(view.genes)
+    copy_of = dict(zip([id(gene) for gene in touched], copies))
+    genes = []
+    for gene in seq.genes:
+        if id(gene) not in copy_of:
+            genes.append(gene)
+        elif copy_of[id(gene)] in survivors:
+            genes.append(copy_of[id(gene)])
+    view.genes = genes
+    return view
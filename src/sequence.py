@@ -2,6 +2,10 @@
 
 import sys
 from src.seq_helper import SeqHelper
+from src.twobit import TwoBitBases
+from src.interval_index import IntervalIndex
+from src.edit_plan import EditPlan, overlap
+from src.stats_accumulator import StatsAccumulator
 
 class Sequence:
 
@@ -10,6 +14,14 @@ class Sequence:
         self.bases = bases
         self.genes = []
         self.removed_genes = []
+        # Built on the first region query; see feature_index()
+        self.interval_index = None
+
+    def __getstate__(self):
+        # The interval index is cheap to rebuild; don't pickle or deepcopy it
+        state = self.__dict__.copy()
+        state['interval_index'] = None
+        return state
 
     def __str__(self):
         result = "Sequence " + self.header
@@ -21,6 +33,7 @@ class Sequence:
 
     def add_gene(self, gene):
         self.genes.append(gene)
+        self.interval_index = None
 
     def contains_gene(self, gene_id):
         for gene in self.genes:
@@ -43,6 +56,7 @@ class Sequence:
         if to_remove:
             self.genes.remove(to_remove)
             self.removed_genes.append(to_remove)
+            self.interval_index = None
             return True
         return False # Return false if gene wasn't removed
 
@@ -77,21 +91,25 @@ class Sequence:
         return result
 
     def remove_terminal_ns(self):
-        # Remove any Ns at the beginning of the sequence
+        # Remove any Ns at the beginning and end of the sequence in one pass
+        plan = EditPlan()
         initial_ns = self.how_many_Ns_forward(1)
         if initial_ns:
-            self.trim_region(1, initial_ns)
-        # Remove any Ns at the end of the sequence
+            plan.delete(1, initial_ns)
         length = len(self.bases)
         terminal_ns = self.how_many_Ns_backward(length)
         if terminal_ns:
-            self.trim_region(length-terminal_ns+1, length)
+            plan.delete(length-terminal_ns+1, length)
+        plan.apply(self)
 
     # Given a position in the sequence, returns the number of Ns 
     # from that position forward 
     # (returns 0 if the base at that position is not N)
     def how_many_Ns_forward(self, position):
         index = position-1
+        if isinstance(self.bases, TwoBitBases):
+            # Packed bases keep a table of N runs; no need to walk the string
+            return self.bases.n_run_forward(index)
         if self.bases[index] != 'N' and self.bases[index] != 'n':
             return 0
         else:
@@ -109,6 +127,8 @@ class Sequence:
     # (returns 0 if the base at that position is not N)
     def how_many_Ns_backward(self, position):
         index = position-1
+        if isinstance(self.bases, TwoBitBases):
+            return self.bases.n_run_backward(index)
         if self.bases[index] != 'N' and self.bases[index] != 'n':
             return 0
         else:
@@ -128,12 +148,52 @@ class Sequence:
             return
         # Remove bases from sequence
         self.bases = self.bases[:start-1] + self.bases[stop:]
-        to_remove = []
+        index = self.current_interval_index()
         # Remove any genes that are overlap the trimmed region
-        self.genes = [g for g in self.genes if not overlap([start, stop], g.indices)]
+        if index:
+            candidates = index.genes_overlapping(start, stop)
+        else:
+            candidates = self.genes
+        removed = set([g for g in candidates if overlap([start, stop], g.indices)])
+        if removed:
+            self.genes = [g for g in self.genes if g not in removed]
         # Adjust indices of remaining genes
         bases_removed = stop - start + 1
         [g.adjust_indices(-bases_removed, start) for g in self.genes]
+        if index:
+            index.trim(start, stop, removed, self.genes)
+
+    def current_interval_index(self):
+        """Returns the interval index if one has been built and still matches self.genes, else None."""
+        if self.interval_index and self.interval_index.covers(self.genes):
+            return self.interval_index
+        return None
+
+    def feature_index(self):
+        """Returns the IntervalIndex over this sequence's features, building it if needed."""
+        if not self.current_interval_index():
+            self.interval_index = IntervalIndex(self.genes)
+        return self.interval_index
+
+    def features_in_region(self, start, stop, kinds=None):
+        """Returns FeatureHits for genes, mRNAs, exon and CDS segments overlapping start..stop."""
+        return self.feature_index().query(start, stop, kinds)
+
+    def genes_in_region(self, start, stop):
+        """Returns the genes with any part overlapping start..stop, ordered by start."""
+        genes = []
+        seen = set()
+        for hit in self.features_in_region(start, stop):
+            if hit.gene not in seen:
+                seen.add(hit.gene)
+                genes.append(hit.gene)
+        return genes
+
+    def region_to_gff(self, start, stop):
+        result = ""
+        for gene in self.genes_in_region(start, stop):
+            result += gene.to_gff()
+        return result
         
     def get_subseq(self, start=1, stop=None):
         if not stop:
@@ -386,45 +446,11 @@ class Sequence:
                     length += mrna.cds.length()
         return length
         
-    def stats(self):
-        stats = dict()
-        cds_partial_info = self.get_cds_partial_info()
-        
-        stats["Total sequence length"] = len(self.bases)
-        stats["Number of genes"] = len(self.genes)
-        stats["Number of mRNAs"] = int(self.get_num_mrna())
-        stats["Number of exons"] = int(self.get_num_exons())
-        stats["Number of introns"] = int(self.get_num_introns())
-        stats["Number of CDS"] = int(self.get_num_cds())
-        stats["CDS: complete"] = int(cds_partial_info["CDS: complete"])
-        stats["CDS: start, no stop"] = int(cds_partial_info["CDS: start, no stop"])
-        stats["CDS: stop, no start"] = int(cds_partial_info["CDS: stop, no start"])
-        stats["CDS: no stop, no start"] = int(cds_partial_info["CDS: no stop, no start"])
-        stats["Longest gene"] = int(self.get_longest_gene())
-        stats["Longest mRNA"] = int(self.get_longest_mrna())
-        stats["Longest exon"] = int(self.get_longest_exon())
-        stats["Longest intron"] = int(self.get_longest_intron())
-        stats["Longest CDS"] = int(self.get_longest_cds())
-        stats["Shortest gene"] = int(self.get_shortest_gene())
-        stats["Shortest mRNA"] = int(self.get_shortest_mrna())
-        stats["Shortest exon"] = int(self.get_shortest_exon())
-        stats["Shortest intron"] = int(self.get_shortest_intron())
-        stats["Shortest CDS"] = int(self.get_shortest_cds())
-        stats["Total gene length"] = int(self.get_total_gene_length())
-        stats["Total mRNA length"] = int(self.get_total_mrna_length())
-        stats["Total exon length"] = int(self.get_total_exon_length())
-        stats["Total intron length"] = int(self.get_total_intron_length())
-        stats["Total CDS length"] = int(self.get_total_cds_length())
-        
-        return stats
+    def stats_accumulator(self):
+        """Returns a StatsAccumulator filled in from one pass over the genes."""
+        accumulator = StatsAccumulator()
+        accumulator.add_genes(self.genes)
+        return accumulator
 
-def overlap(indices1, indices2):
-    """Returns a boolean indicating whether two pairs of indices overlap."""
-    if not (len(indices1) == 2 and len(indices2) ==2):
-        return False
-    if indices1[0] > indices2[0] and indices1[0] < indices2[1]:
-        return True
-    elif indices1[1] > indices2[0] and indices1[1] < indices2[1]:
-        return True
-    else:
-        return False
+    def stats(self):
+        return self.stats_accumulator().stats(len(self.bases))
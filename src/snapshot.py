@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+import cPickle
+import hashlib
+import os
+import sys
+from src.fasta_reader import gc_paused
+
+# Bump this whenever the classes that get pickled change shape
+SNAPSHOT_VERSION = 3
+SNAPSHOT_SUFFIX = '.gag_snapshot'
+
+def snapshot_dir():
+    """Returns the per-user directory snapshots are kept in, creating it if needed.
+
+    It's $XDG_CACHE_HOME/gag (by default ~/.cache/gag), made readable and
+    writable by its owner only.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    path = os.path.join(base, 'gag')
+    if not os.path.isdir(path):
+        os.makedirs(path, 0700)
+    return path
+
+def snapshot_path(folder):
+    """Returns where the snapshot of an input folder is kept, named after the folder's
+    absolute path, or None if the snapshot directory can't be made."""
+    name = hashlib.md5(os.path.abspath(folder)).hexdigest() + SNAPSHOT_SUFFIX
+    try:
+        return os.path.join(snapshot_dir(), name)
+    except OSError as error:
+        sys.stderr.write("Couldn't make a directory for snapshots (" + str(error) + ").\n")
+        return None
+
+def is_private(path):
+    """Returns True if path and the directory holding it belong to this user and
+    nobody else can write to them.
+
+    A snapshot is unpickled, which can run code, so only files no one else
+    could have planted are read.
+    """
+    for checked in [os.path.dirname(os.path.abspath(path)), path]:
+        info = os.stat(checked)
+        if info.st_uid != os.getuid() or info.st_mode & 0022:
+            return False
+    return True
+
+def file_signature(path):
+    """Returns (name, size, mtime, md5 hex digest) for a file."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as infile:
+        while True:
+            block = infile.read(1 << 20)
+            if not block:
+                break
+            digest.update(block)
+    info = os.stat(path)
+    return (os.path.basename(path), info.st_size, info.st_mtime, digest.hexdigest())
+
+def snapshot_key(paths, options):
+    """Returns the key a snapshot of the given input files is stored under.
+
+    options is a dict of the load options that affect what's parsed (such
+    as the fasta mode); a snapshot is only restored for the same options.
+    The number of workers doesn't change the parsed genome, so it's left out.
+    """
+    return [sorted(options.items())] + [file_signature(path) for path in paths]
+
+def load_snapshot(path, key):
+    """Returns the data saved in a snapshot file, or None if it's missing, stale,
+    unreadable or could have been written by another user."""
+    if not os.path.isfile(path):
+        return None
+    if not is_private(path):
+        sys.stderr.write("Not reading snapshot " + path + ": others can write to it or its directory.\n")
+        return None
+    try:
+        with open(path, 'rb') as infile:
+            with gc_paused():
+                header = cPickle.load(infile)
+                if header.get('version') != SNAPSHOT_VERSION or header.get('key') != key:
+                    return None
+                return cPickle.load(infile)
+    except Exception as error:
+        sys.stderr.write("Couldn't read snapshot " + path + " (" + str(error) + "); ignoring it.\n")
+        return None
+
+def save_snapshot(path, key, data):
+    """Pickles data to a snapshot file readable by this user only, replacing any old
+    one only once the new one is complete."""
+    temp_path = path + '.tmp'
+    try:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        handle = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0600)
+        with os.fdopen(handle, 'wb') as outfile:
+            cPickle.dump({'version': SNAPSHOT_VERSION, 'key': key}, outfile, cPickle.HIGHEST_PROTOCOL)
+            cPickle.dump(data, outfile, cPickle.HIGHEST_PROTOCOL)
+        os.rename(temp_path, path)
+    except (IOError, OSError, cPickle.PicklingError) as error:
+        sys.stderr.write("Couldn't write snapshot " + path + " (" + str(error) + ").\n")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+from array import array
+
+# Kinds of feature whose lengths a StatsAccumulator can collect
+LENGTH_KINDS = ['gene', 'mRNA', 'exon', 'intron', 'CDS']
+
+def segment_length(index_pair):
+    return abs(index_pair[1] - index_pair[0]) + 1
+
+def shorter(current, length):
+    """The fold GAG uses for shortest exon and intron stats.
+
+    A current value of 0 means 'none yet' and is always replaced, even
+    when an mRNA without exons or introns reports 0 itself.
+    """
+    if current == 0 or length < current:
+        return length
+    return current
+
+def shortest_of(current, length):
+    """Plain minimum, with None for 'none yet'; used for genes, mRNAs and CDSs."""
+    if current is None or length < current:
+        return length
+    return current
+
+
+class StatsAccumulator:
+    """Collects everything in Sequence.stats() in one pass over the genes.
+
+    Each gene, mRNA, exon and CDS is visited once. The numbers are the
+    same as the old per-statistic get_* methods give, including their
+    order-dependent 'shortest exon' and 'shortest intron' folds, which
+    run per gene over its mRNAs and then over the genes.
+    Also counts gagflagged features, as Sequence.number_of_gagflags does.
+
+    With collect_lengths=True, also keeps every length seen in
+    self.lengths, an array('l') per kind in LENGTH_KINDS, for
+    distribution stats.
+    """
+
+    def __init__(self, collect_lengths=False):
+        self.genes = 0
+        self.mrnas = 0
+        self.exons = 0
+        self.introns = 0
+        self.cds = 0
+        self.complete = 0
+        self.start_no_stop = 0
+        self.stop_no_start = 0
+        self.no_stop_no_start = 0
+        self.longest_gene = 0
+        self.longest_mrna = 0
+        self.longest_exon = 0
+        self.longest_intron = 0
+        self.longest_cds = 0
+        self.shortest_gene = None
+        self.shortest_mrna = None
+        self.shortest_exon = 0
+        self.shortest_intron = 0
+        self.shortest_cds = None
+        self.total_gene_length = 0
+        self.total_mrna_length = 0
+        self.total_exon_length = 0
+        self.total_intron_length = 0
+        self.total_cds_length = 0
+        self.gagflags = 0
+        self.lengths = None
+        if collect_lengths:
+            self.lengths = dict((kind, array('l')) for kind in LENGTH_KINDS)
+
+    def add_genes(self, genes):
+        for gene in genes:
+            self.add_gene(gene)
+
+    def add_gene(self, gene):
+        length = segment_length(gene.indices)
+        self.genes += 1
+        self.total_gene_length += length
+        self.longest_gene = max(self.longest_gene, length)
+        self.shortest_gene = shortest_of(self.shortest_gene, length)
+        if self.lengths is not None:
+            self.lengths['gene'].append(length)
+        if gene.gagflagged():
+            self.gagflags += 1
+        gene_shortest_exon = 0
+        gene_shortest_intron = 0
+        for mrna in gene.mrnas:
+            shortest_exon, shortest_intron = self.add_mrna(mrna)
+            gene_shortest_exon = shorter(gene_shortest_exon, shortest_exon)
+            gene_shortest_intron = shorter(gene_shortest_intron, shortest_intron)
+        self.shortest_exon = shorter(self.shortest_exon, gene_shortest_exon)
+        self.shortest_intron = shorter(self.shortest_intron, gene_shortest_intron)
+
+    def add_mrna(self, mrna):
+        """Adds an mRNA and its exons and CDS; returns its shortest exon and intron (0 if none)."""
+        length = segment_length(mrna.indices)
+        self.mrnas += 1
+        self.total_mrna_length += length
+        self.longest_mrna = max(self.longest_mrna, length)
+        self.shortest_mrna = shortest_of(self.shortest_mrna, length)
+        if self.lengths is not None:
+            self.lengths['mRNA'].append(length)
+        self.add_partial_info(mrna)
+        if mrna.cds:
+            length = 0
+            for index_pair in mrna.cds.indices:
+                length += segment_length(index_pair)
+            self.cds += 1
+            self.total_cds_length += length
+            self.longest_cds = max(self.longest_cds, length)
+            self.shortest_cds = shortest_of(self.shortest_cds, length)
+            if self.lengths is not None:
+                self.lengths['CDS'].append(length)
+            if mrna.cds.gagflagged():
+                self.gagflags += 1
+        if not mrna.exon:
+            return 0, 0
+        if mrna.exon.gagflagged():
+            self.gagflags += 1
+        return self.add_exons(mrna.exon.indices)
+
+    def add_exons(self, indices):
+        """Adds an mRNA's exon segments and the introns between them; returns the shortest of each."""
+        self.exons += len(indices)
+        self.introns += len(indices) - 1
+        shortest_exon = 0
+        shortest_intron = 0
+        last_end = 0
+        if self.lengths is not None:
+            exon_lengths = self.lengths['exon']
+            intron_lengths = self.lengths['intron']
+        for index_pair in indices:
+            length = segment_length(index_pair)
+            self.total_exon_length += length
+            self.longest_exon = max(self.longest_exon, length)
+            shortest_exon = shorter(shortest_exon, length)
+            if self.lengths is not None:
+                exon_lengths.append(length)
+            if last_end != 0:
+                intron = abs(index_pair[0] - last_end) + 1
+                self.total_intron_length += intron
+                self.longest_intron = max(self.longest_intron, intron)
+                shortest_intron = shorter(shortest_intron, intron)
+                if self.lengths is not None:
+                    intron_lengths.append(intron)
+            last_end = index_pair[1]
+        return shortest_exon, shortest_intron
+
+    def add_partial_info(self, mrna):
+        has_start = False
+        has_stop = False
+        for feature in mrna.other_features:
+            if feature.feature_type == 'start_codon':
+                has_start = True
+            elif feature.feature_type == 'stop_codon':
+                has_stop = True
+        if has_start and has_stop:
+            self.complete += 1
+        elif has_start:
+            self.start_no_stop += 1
+        elif has_stop:
+            self.stop_no_start += 1
+        else:
+            self.no_stop_no_start += 1
+
+    def stats(self, sequence_length):
+        """Returns the dict Sequence.stats() returns, for a sequence of the given length."""
+        stats = dict()
+        stats["Total sequence length"] = sequence_length
+        stats["Number of genes"] = self.genes
+        stats["Number of mRNAs"] = self.mrnas
+        stats["Number of exons"] = self.exons
+        stats["Number of introns"] = self.introns
+        stats["Number of CDS"] = self.cds
+        stats["CDS: complete"] = self.complete
+        stats["CDS: start, no stop"] = self.start_no_stop
+        stats["CDS: stop, no start"] = self.stop_no_start
+        stats["CDS: no stop, no start"] = self.no_stop_no_start
+        stats["Longest gene"] = self.longest_gene
+        stats["Longest mRNA"] = self.longest_mrna
+        stats["Longest exon"] = self.longest_exon
+        stats["Longest intron"] = self.longest_intron
+        stats["Longest CDS"] = self.longest_cds
+        stats["Shortest gene"] = self.shortest_gene or 0
+        stats["Shortest mRNA"] = self.shortest_mrna or 0
+        stats["Shortest exon"] = self.shortest_exon
+        stats["Shortest intron"] = self.shortest_intron
+        stats["Shortest CDS"] = self.shortest_cds or 0
+        stats["Total gene length"] = self.total_gene_length
+        stats["Total mRNA length"] = self.total_mrna_length
+        stats["Total exon length"] = self.total_exon_length
+        stats["Total intron length"] = self.total_intron_length
+        stats["Total CDS length"] = self.total_cds_length
+        return stats
+
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+
+import string
+from array import array
+from binascii import unhexlify
+from bisect import bisect_right
+from src.lazy_bases import LazyBases
+
+# NumPy packs bases faster, but GAG packs them without it too
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Same base order as UCSC .2bit files
+PACKED_BASES = 'TCAG'
+# How many bases are packed at a time. A multiple of 4, so only the last chunk is padded.
+CHUNK_SIZE = 1 << 20
+# Bases that don't need an entry in the exception list of other IUPAC codes
+PLAIN_BASES = 'ACGTNacgtn'
+
+def code_table(code):
+    """Returns a translate table mapping each base, in either case, to code(its 2-bit value).
+    Every non-ACGT character is stored as T (0) and restored from the run tables."""
+    codes = []
+    for byte in range(256):
+        base = chr(byte).upper()
+        codes.append(code(PACKED_BASES.index(base) if base in PACKED_BASES else 0))
+    return ''.join(codes)
+
+def mark_table(chars):
+    """Returns a translate table mapping chars to chr(1) and everything else to chr(0)."""
+    return ''.join(['\x01' if chr(byte) in chars else '\x00' for byte in range(256)])
+
+BASE_CODES = code_table(chr)
+# The codes as base-4 digits, for packing without NumPy
+BASE_DIGITS = code_table(str)
+N_MARKS = mark_table('Nn')
+MASK_MARKS = mark_table(string.ascii_lowercase)
+OTHER_MARKS = mark_table([chr(byte) for byte in range(256) if chr(byte) not in PLAIN_BASES])
+
+def build_unpack_table():
+    """Returns a list mapping each byte value to the 4 bases it packs."""
+    table = []
+    for byte in range(256):
+        table.append(''.join([PACKED_BASES[(byte >> shift) & 3] for shift in (6, 4, 2, 0)]))
+    return table
+
+UNPACK_TABLE = build_unpack_table()
+
+def pack_chunk(chunk):
+    """Returns chunk packed four bases to a byte, the first base in the high bits."""
+    if numpy is not None:
+        codes = numpy.frombuffer(chunk.translate(BASE_CODES), numpy.uint8)
+        if len(codes) % 4:
+            codes = numpy.concatenate((codes, numpy.zeros(4 - len(codes) % 4, numpy.uint8)))
+        codes = codes.reshape(-1, 4)
+        return ((codes[:, 0] << 6) | (codes[:, 1] << 4) | (codes[:, 2] << 2) | codes[:, 3]).tostring()
+    digits = chunk.translate(BASE_DIGITS)
+    if len(digits) % 4:
+        digits += '0' * (4 - len(digits) % 4)
+    # Read as one base-4 number and written in hex, every 4 bases become 2 hex digits.
+    # The leading 1 keeps leading zeros.
+    return unhexlify(('%x' % long('1' + digits, 4))[1:])
+
+def marked_runs(marks, offset):
+    """Returns arrays of the starts (plus offset) and sizes of the runs of chr(1) in marks."""
+    starts = array('l')
+    sizes = array('l')
+    if marks.find('\x01') == -1:
+        return starts, sizes
+    if numpy is not None:
+        flags = numpy.frombuffer(marks, numpy.int8)
+        edge = numpy.zeros(1, numpy.int8)
+        steps = numpy.diff(numpy.concatenate((edge, flags, edge)))
+        run_starts = numpy.flatnonzero(steps == 1)
+        starts.fromstring((run_starts + offset).astype('l').tostring())
+        sizes.fromstring((numpy.flatnonzero(steps == -1) - run_starts).astype('l').tostring())
+        return starts, sizes
+    start = marks.find('\x01')
+    while start != -1:
+        stop = marks.find('\x00', start)
+        if stop == -1:
+            stop = len(marks)
+        starts.append(start + offset)
+        sizes.append(stop - start)
+        start = marks.find('\x01', stop)
+    return starts, sizes
+
+def marked_positions(marks, offset):
+    """Returns an array of the positions (plus offset) of each chr(1) in marks."""
+    if numpy is not None:
+        positions = numpy.flatnonzero(numpy.frombuffer(marks, numpy.int8)) + offset
+        return array('l', positions.astype('l').tostring())
+    positions = array('l')
+    position = marks.find('\x01')
+    while position != -1:
+        positions.append(position + offset)
+        position = marks.find('\x01', position + 1)
+    return positions
+
+def extend_runs(starts, sizes, chunk_starts, chunk_sizes):
+    """Adds a chunk's runs to starts and sizes, joining a run carried over from the last chunk."""
+    if len(starts) and len(chunk_starts) and starts[-1] + sizes[-1] == chunk_starts[0]:
+        sizes[-1] += chunk_sizes[0]
+        chunk_starts = chunk_starts[1:]
+        chunk_sizes = chunk_sizes[1:]
+    starts.extend(chunk_starts)
+    sizes.extend(chunk_sizes)
+
+def runs_overlapping(starts, sizes, start, stop):
+    """Yields (run_start, run_stop) for runs intersecting [start, stop), clipped to it."""
+    i = bisect_right(starts, start) - 1
+    if i < 0:
+        i = 0
+    while i < len(starts) and starts[i] < stop:
+        run_start = max(starts[i], start)
+        run_stop = min(starts[i] + sizes[i], stop)
+        if run_start < run_stop:
+            yield run_start, run_stop
+        i += 1
+
+
+class TwoBitBases(LazyBases):
+    """Nucleotides packed four to a byte, in the style of UCSC .2bit files.
+
+    A, C, G and T are stored at 2 bits per base. N runs and soft-masked
+    (lowercase) runs are kept as sorted (start, size) interval arrays, and
+    the rare other IUPAC codes as a sparse exception list, so decoding
+    returns exactly the string that was packed.
+    """
+
+    def __init__(self, bases=''):
+        bases = str(bases)
+        self.length = len(bases)
+        self.n_starts, self.n_sizes = array('l'), array('l')
+        self.mask_starts, self.mask_sizes = array('l'), array('l')
+        self.other_positions = array('l')
+        other_bases = []
+        # Padded to a whole number of bytes; the padding is never decoded
+        self.packed = bytearray((self.length + 3) // 4)
+        for start in xrange(0, self.length, CHUNK_SIZE):
+            chunk = bases[start:start+CHUNK_SIZE]
+            extend_runs(self.n_starts, self.n_sizes, *marked_runs(chunk.translate(N_MARKS), start))
+            extend_runs(self.mask_starts, self.mask_sizes,\
+                    *marked_runs(chunk.translate(MASK_MARKS), start))
+            others = chunk.translate(None, PLAIN_BASES)
+            if others:
+                self.other_positions.extend(marked_positions(chunk.translate(OTHER_MARKS), start))
+                other_bases.append(others)
+            packed = pack_chunk(chunk)
+            self.packed[start//4:start//4+len(packed)] = packed
+        self.other_bases = ''.join(other_bases)
+
+    def __len__(self):
+        return self.length
+
+    def fetch(self, start, stop):
+        if stop <= start:
+            return ''
+        first_byte = start // 4
+        last_byte = (stop - 1) // 4
+        table = UNPACK_TABLE
+        unpacked = ''.join([table[byte] for byte in self.packed[first_byte:last_byte+1]])
+        offset = first_byte * 4
+        result = unpacked[start-offset:stop-offset]
+        if not (self.n_starts or self.mask_starts or self.other_positions):
+            return result
+        chars = bytearray(result)
+        for run_start, run_stop in runs_overlapping(self.n_starts, self.n_sizes, start, stop):
+            chars[run_start-start:run_stop-start] = 'N' * (run_stop - run_start)
+        i = bisect_right(self.other_positions, start - 1)
+        while i < len(self.other_positions) and self.other_positions[i] < stop:
+            chars[self.other_positions[i]-start] = self.other_bases[i]
+            i += 1
+        for run_start, run_stop in runs_overlapping(self.mask_starts, self.mask_sizes, start, stop):
+            chars[run_start-start:run_stop-start] = str(chars[run_start-start:run_stop-start]).lower()
+        return str(chars)
+
+    def n_run_at(self, index):
+        """Returns the (start, size) of the N run covering 0-based index, or None."""
+        i = bisect_right(self.n_starts, index) - 1
+        if i < 0:
+            return None
+        if index < self.n_starts[i] + self.n_sizes[i]:
+            return self.n_starts[i], self.n_sizes[i]
+        return None
+
+    def n_run_forward(self, index):
+        """Returns how many Ns there are from 0-based index to the end of its run."""
+        run = self.n_run_at(index)
+        if not run:
+            return 0
+        return run[0] + run[1] - index
+
+    def n_run_backward(self, index):
+        """Returns how many Ns there are from 0-based index back to the start of its run."""
+        run = self.n_run_at(index)
+        if not run:
+            return 0
+        return index - run[0] + 1
+
+    def n_count(self):
+        return sum(self.n_sizes)
+
+    def masked_count(self):
+        return sum(self.mask_sizes)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+import copy
+import unittest
+from src.alt_stats import *
+from src.filter_manager import FilterManager
+from src.stats_manager import StatsManager
+from src.sequence import Sequence
+from test.fixtures import make_gene, add_mrna
+
+def filtered_stats(seqs, filter_mgr):
+    """Returns the alt stats and flag count the old way, by filtering copies of seqs."""
+    stats_mgr = StatsManager()
+    flags = 0
+    for seq in seqs:
+        cseq = copy.deepcopy(seq)
+        filter_mgr.apply_filters(cseq)
+        stats_mgr.update_alt(cseq.stats())
+        flags += cseq.number_of_gagflags()
+    return stats_mgr.alt_stats, flags
+
+class TestAltStats(unittest.TestCase):
+
+    def setUp(self):
+        self.seq1 = Sequence("seq1", "A" * 500)
+        # Each mRNA has a CDS over its first exon
+        gene1 = make_gene("gene1", [[1, 50], [61, 100]], [[1, 50]])
+        add_mrna(gene1, [[1, 20], [91, 100]], [[1, 20]])
+        self.seq1.genes = [gene1, make_gene("gene2", [[150, 160], [200, 300], [320, 330]], [[150, 160]]),\
+                make_gene("gene3", [[400, 405]], [[400, 405]])]
+        self.seq2 = Sequence("seq2", "A" * 300)
+        gene5 = make_gene("gene5", [[200, 210], [213, 230]], [[200, 210]])
+        add_mrna(gene5, [[200, 250]], [[200, 250]])
+        self.seq2.genes = [make_gene("gene4", [[1, 100], [131, 160]], [[1, 100]]), gene5]
+        self.seqs = [self.seq1, self.seq2]
+        self.filter_mgr = FilterManager()
+
+    def test_heap_multiset(self):
+        lowest = HeapMultiset()
+        self.assertEquals(0, lowest.top())
+        for value in [5, 3, 3, 8]:
+            lowest.add(value)
+        lowest.remove(3)
+        self.assertEquals(3, lowest.top())
+        lowest.remove(3)
+        self.assertEquals(5, lowest.top())
+        highest = HeapMultiset(True)
+        highest.add(5)
+        highest.add(8)
+        highest.remove(8)
+        self.assertEquals(5, highest.top())
+
+    def test_shortest_fold_matches_shorter(self):
+        values = [7, 0, 9, 4, 0, 6, 5]
+        fold = ShortestFold(len(values))
+        for position, value in enumerate(values):
+            fold.set(position, value)
+        self.assertEquals(reduce(shorter, values, 0), fold.result())
+        fold.set(4, None)
+        self.assertEquals(reduce(shorter, [7, 0, 9, 4, 6, 5], 0), fold.result())
+        fold.set(6, 0)
+        self.assertEquals(0, fold.result())
+
+    def test_flagged_range(self):
+        values = [5, 10, 10, 20]
+        self.assertEquals((0, 1), flagged_range(values, True, 10))
+        self.assertEquals((3, 4), flagged_range(values, False, 10))
+        self.assertEquals((4, 4), flagged_range(values, False, 0))
+
+    def test_changed_range(self):
+        values = [5, 10, 10, 20]
+        self.assertEquals((1, 3), changed_range(values, True, (10, True), (15, True)))
+        self.assertEquals((0, 3), changed_range(values, True, (10, True), (15, False)))
+        self.assertEquals((1, 4), changed_range(values, False, (0, True), (5, True)))
+
+    def test_has_duplicate_ids(self):
+        self.assertFalse(has_duplicate_ids(self.seqs))
+        self.seq2.genes.append(make_gene("gene4", [[260, 270]], [[260, 270]]))
+        self.assertTrue(has_duplicate_ids(self.seqs))
+        self.assertFalse(IncrementalAltStats(self.seqs, self.filter_mgr).usable)
+
+    def test_stats_without_filters(self):
+        engine = IncrementalAltStats(self.seqs, self.filter_mgr)
+        self.assertTrue(engine.usable)
+        expected, flags = filtered_stats(self.seqs, self.filter_mgr)
+        stats_mgr = StatsManager()
+        stats_mgr.update_alt(engine.stats())
+        self.assertEquals(expected, stats_mgr.alt_stats)
+        self.assertEquals(flags, engine.gagflags())
+
+    def test_update_matches_filtering_copies(self):
+        engine = IncrementalAltStats(self.seqs, self.filter_mgr)
+        changes = [('exon_shorter_than', '12', True), ('intron_longer_than', '40', False),\
+                ('gene_shorter_than', '50', True), ('exon_shorter_than', '12', False),\
+                ('cds_longer_than', '45', True), ('intron_shorter_than', '5', True),\
+                ('gene_longer_than', '150', False), ('exon_shorter_than', '0', True),\
+                ('cds_longer_than', '0', True)]
+        for name, arg, remove in changes:
+            self.filter_mgr.set_filter_arg(name, arg)
+            self.filter_mgr.set_filter_remove(name, remove)
+            engine.update(self.filter_mgr)
+            expected, flags = filtered_stats(self.seqs, self.filter_mgr)
+            stats_mgr = StatsManager()
+            stats_mgr.update_alt(engine.stats())
+            self.assertEquals(expected, stats_mgr.alt_stats, name)
+            self.assertEquals(flags, engine.gagflags(), name)
+
+    def test_update_only_rescores_changed_genes(self):
+        engine = IncrementalAltStats(self.seqs, self.filter_mgr)
+        self.filter_mgr.set_filter_arg('gene_shorter_than', '10')
+        self.assertEquals(1, engine.update(self.filter_mgr))
+        self.assertEquals(0, engine.update(self.filter_mgr))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestAltStats))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import unittest
+import src.assembly_stats
+from src.assembly_stats import *
+from src.twobit import TwoBitBases
+
+BASES = ["ACGTNNNNacgtNNAAGGcc", "NNGCATnnnnS", "GGGG"]
+
+class TestAssemblyStats(unittest.TestCase):
+
+    def setUp(self):
+        self.chunk_size = src.assembly_stats.CHUNK_SIZE
+
+    def tearDown(self):
+        src.assembly_stats.CHUNK_SIZE = self.chunk_size
+
+    def count(self, sequences):
+        counts = AssemblyStats()
+        for bases in sequences:
+            counts.add_sequence(bases)
+        return counts
+
+    def test_scaffold_n50(self):
+        self.assertEquals((0, 0), scaffold_n50([]))
+        self.assertEquals((8, 2), scaffold_n50([2, 10, 8, 3]))
+        self.assertEquals((10, 1), scaffold_n50([10, 5, 5]))
+
+    def test_counts(self):
+        counts = self.count(BASES)
+        self.assertEquals(22, counts.acgt)
+        self.assertEquals(14, counts.gc)
+        self.assertEquals(12, counts.ns)
+        self.assertEquals(10, counts.masked)
+        self.assertEquals(4, counts.gaps)
+        self.assertEquals(4, counts.longest_gap)
+
+    def test_gaps_across_chunks(self):
+        src.assembly_stats.CHUNK_SIZE = 3
+        counts = self.count(BASES)
+        self.assertEquals(4, counts.gaps)
+        self.assertEquals(12, counts.gap_length)
+        self.assertEquals(4, counts.longest_gap)
+
+    def test_twobit_counts_match(self):
+        plain = self.count(BASES)
+        packed = self.count([TwoBitBases(bases) for bases in BASES])
+        self.assertEquals(plain.stats(), packed.stats())
+
+    def test_stats(self):
+        stats = self.count(BASES).stats()
+        self.assertEquals(3, stats["Number of sequences"])
+        self.assertEquals(35, stats["Total sequence length"])
+        self.assertEquals(20, stats["Scaffold N50"])
+        self.assertEquals(1, stats["Scaffold L50"])
+        self.assertEquals(63.64, stats["GC content (%)"])
+        self.assertEquals(3, stats["Mean N gap length"])
+        self.assertEquals(sorted(REPORT_ORDER), sorted(stats.keys()))
+
+    def test_stats_empty(self):
+        stats = AssemblyStats().stats()
+        self.assertEquals(0, stats["Scaffold N50"])
+        self.assertEquals(0.0, stats["GC content (%)"])
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestAssemblyStats))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+import unittest
+import gzip
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from src.compressed_file import find_input, is_gzipped, is_bgzf, open_input, BgzfReader
+
+def bgzf_block(data):
+    """Returns one BGZF block holding data, laid out as bgzip writes it."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    block_size = 12 + 6 + len(payload) + 8 - 1
+    header = '\x1f\x8b\x08\x04' + '\x00' * 4 + '\x00\xff' + struct.pack('<H', 6)
+    extra = 'BC' + struct.pack('<H', 2) + struct.pack('<H', block_size)
+    trailer = struct.pack('<I', zlib.crc32(data) & 0xffffffff) + struct.pack('<I', len(data))
+    return header + extra + payload + trailer
+
+def write_bgzf(path, data, block_length=10):
+    with open(path, 'wb') as out:
+        for start in range(0, len(data), block_length):
+            out.write(bgzf_block(data[start:start+block_length]))
+        out.write(bgzf_block(''))
+
+class TestCompressedFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.text = ">seq_1\nGATTACA\nGATTACA\n>seq_2\nNNNNACGT\n"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def test_find_input_prefers_uncompressed(self):
+        open(self.path('genome.fasta.gz'), 'w').close()
+        self.assertEquals(self.path('genome.fasta.gz'), find_input(self.tmpdir, 'genome.fasta'))
+        open(self.path('genome.fasta'), 'w').close()
+        self.assertEquals(self.path('genome.fasta'), find_input(self.tmpdir, 'genome.fasta'))
+        self.assertEquals(None, find_input(self.tmpdir, 'genome.gff'))
+
+    def test_open_plain_file(self):
+        with open(self.path('genome.fasta'), 'wb') as out:
+            out.write(self.text)
+        self.assertFalse(is_gzipped(self.path('genome.fasta')))
+        infile = open_input(self.path('genome.fasta'))
+        self.assertEquals(self.text, infile.read())
+        infile.close()
+
+    def test_open_gzip_file(self):
+        out = gzip.open(self.path('genome.fasta.gz'), 'wb')
+        out.write(self.text)
+        out.close()
+        self.assertTrue(is_gzipped(self.path('genome.fasta.gz')))
+        self.assertFalse(is_bgzf(self.path('genome.fasta.gz')))
+        infile = open_input(self.path('genome.fasta.gz'))
+        self.assertEquals(self.text, infile.read())
+        infile.close()
+
+    def test_open_bgzf_file(self):
+        write_bgzf(self.path('genome.fasta.gz'), self.text)
+        self.assertTrue(is_bgzf(self.path('genome.fasta.gz')))
+        infile = open_input(self.path('genome.fasta.gz'), 2)
+        self.assertTrue(isinstance(infile, BgzfReader))
+        self.assertEquals(self.text, infile.read())
+        infile.close()
+
+    def test_bgzf_reader_lines_across_blocks_and_batches(self):
+        write_bgzf(self.path('genome.gff.bgz'), self.text, 3)
+        reader = BgzfReader(self.path('genome.gff.bgz'), 3)
+        reader.batch_size = 2
+        self.assertEquals(self.text.splitlines(True), list(reader))
+        reader.close()
+
+    def test_bgzf_reader_read_in_pieces(self):
+        write_bgzf(self.path('genome.fasta.gz'), self.text, 4)
+        reader = BgzfReader(self.path('genome.fasta.gz'), 2)
+        reader.batch_size = 3
+        pieces = []
+        piece = reader.read(5)
+        while piece:
+            pieces.append(piece)
+            piece = reader.read(5)
+        self.assertEquals(self.text, ''.join(pieces))
+        reader.close()
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestCompressedFile))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
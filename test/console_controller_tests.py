@@ -4,8 +4,15 @@ import unittest
 from mock import Mock, patch, PropertyMock
 import sys
 import os
-from src.console_controller import ConsoleController, format_list_with_strings
+import shutil
+import tempfile
+from src.console_controller import ConsoleController, format_list_with_strings, parse_load_args,\
+        FIXED_SEQ_CACHE_SIZE
 from src.sequence import Sequence
+from src.gene import Gene
+from src.mrna import MRNA
+import src.distributions as distributions
+import src.feature_table as feature_table
 
 class TestConsoleController(unittest.TestCase):
 
@@ -52,19 +59,34 @@ class TestConsoleController(unittest.TestCase):
         self.ctrlr.clear_seqs()
         self.assertEquals(0, len(self.ctrlr.seqs))
 
+    def setup_real_genes(self):
+        self.setup_seqs()
+        gene = Gene("seq2", "maker", [1, 5], "+", "gene1")
+        gene.mrnas.append(MRNA("gene1-RA", [1, 5], "gene1"))
+        self.ctrlr.add_gene(gene)
+
     def test_contains_mrna(self):
-        mockseq = Mock()
-        mockseq.contains_mrna.return_value = True
-        self.ctrlr.seqs = [mockseq]
-        self.assertTrue(self.ctrlr.contains_mrna("foo_mrna"))
-        mockseq.contains_mrna.assert_called_with("foo_mrna")
+        self.setup_real_genes()
+        self.assertTrue(self.ctrlr.contains_mrna("gene1-RA"))
+        self.assertFalse(self.ctrlr.contains_mrna("foo_mrna"))
 
     def test_contains_gene(self):
-        mockseq = Mock()
-        mockseq.contains_gene.return_value = True
-        self.ctrlr.seqs = [mockseq]
-        self.assertTrue(self.ctrlr.contains_gene("foo_gene"))
-        mockseq.contains_gene.assert_called_with("foo_gene")
+        self.setup_real_genes()
+        self.assertTrue(self.ctrlr.contains_gene("gene1"))
+        self.assertFalse(self.ctrlr.contains_gene("foo_gene"))
+
+    def test_contains_gene_after_add_gene(self):
+        self.setup_real_genes()
+        self.assertFalse(self.ctrlr.contains_gene("gene2"))
+        self.ctrlr.add_gene(Gene("seq3", "maker", [2, 6], "+", "gene2"))
+        self.assertTrue(self.ctrlr.contains_gene("gene2"))
+
+    def test_contains_seq_after_seqs_replaced(self):
+        self.setup_seqs()
+        self.assertTrue(self.ctrlr.contains_seq("seq1"))
+        self.ctrlr.seqs = [Sequence("seq4", "ACGT")]
+        self.assertFalse(self.ctrlr.contains_seq("seq1"))
+        self.assertTrue(self.ctrlr.contains_seq("seq4"))
 
     def test_contains_seq(self):
         self.setup_seqs()
@@ -120,6 +142,84 @@ class TestConsoleController(unittest.TestCase):
         self.ctrlr.read_gff("walkthrough/basic/genome.gff")
         self.assertTrue(self.ctrlr.seqs[0].genes)
 
+    def test_stream_seqs(self):
+        self.ctrlr.load_folder("walkthrough/basic gff=stream")
+        self.assertTrue(self.ctrlr.genome_is_loaded())
+        self.assertFalse(self.ctrlr.seqs[0].genes)
+        streamed = list(self.ctrlr.stream_seqs())
+        self.assertEquals(len(self.ctrlr.seqs), len(streamed))
+        self.assertTrue(streamed[0].genes)
+
+        loaded = ConsoleController()
+        loaded.load_folder("walkthrough/basic snapshot=off")
+        self.assertEquals(loaded.stats(), self.ctrlr.stats())
+
+    def write_multi_seq_genome(self, folder, copies):
+        """Writes the basic walkthrough into folder as several seqs, renaming seqids and ids."""
+        fasta = open("walkthrough/basic/genome.fasta").read()
+        gff = open("walkthrough/basic/genome.gff").read()
+        header = fasta.split("\n")[0][1:].split()[0]
+        bases = fasta.split("\n", 1)[1].rstrip("\n") + "\n"
+        with open(os.path.join(folder, "genome.fasta"), "w") as out:
+            for i in range(copies):
+                out.write(">seq" + str(i) + "\n" + bases)
+        with open(os.path.join(folder, "genome.gff"), "w") as out:
+            for i in range(copies):
+                prefix = "seq" + str(i) + "_"
+                out.write(gff.replace(header + "\t", "seq" + str(i) + "\t")\
+                        .replace("ID=", "ID=" + prefix).replace("Parent=", "Parent=" + prefix))
+
+    def test_parallel_load_matches_serial_load(self):
+        folder = tempfile.mkdtemp()
+        try:
+            self.write_multi_seq_genome(folder, 4)
+            results = []
+            for workers in ["1", "3"]:
+                ctrlr = ConsoleController()
+                ctrlr.load_folder(folder + " snapshot=off workers=" + workers)
+                out = os.path.join(folder, "out" + workers)
+                ctrlr.barf_folder(out)
+                written = {}
+                for name in os.listdir(out):
+                    written[name] = open(os.path.join(out, name)).read()
+                results.append((ctrlr.stats(), written))
+            self.assertEquals(4, len(ctrlr.seqs))
+            self.assertEquals(results[0][0], results[1][0])
+            self.assertEquals(sorted(results[0][1].keys()), sorted(results[1][1].keys()))
+            for name in results[0][1]:
+                self.assertEquals(results[0][1][name], results[1][1][name], name)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_incremental_stats_match_streamed_stats(self):
+        self.ctrlr.load_folder("walkthrough/basic gff=stream")
+        self.assertEquals(None, self.ctrlr.incremental_stats())
+        loaded = ConsoleController()
+        loaded.load_folder("walkthrough/basic snapshot=off")
+        engine = loaded.incremental_stats()
+        self.assertTrue(engine)
+        for ctrlr in [loaded, self.ctrlr]:
+            ctrlr.set_filter_arg('cds_shorter_than', '150')
+            ctrlr.set_filter_remove('exon_shorter_than', False)
+            ctrlr.set_filter_arg('exon_shorter_than', '40')
+        self.assertEquals(self.ctrlr.stats(), loaded.stats())
+        self.assertTrue(engine is loaded.incremental_stats())
+
+    def test_table_stats_match_object_stats(self):
+        table = ConsoleController()
+        table.load_folder("walkthrough/basic snapshot=off stats=table")
+        loaded = ConsoleController()
+        loaded.load_folder("walkthrough/basic snapshot=off")
+        changes = [('cds_shorter_than', '150', True), ('exon_shorter_than', '40', False),\
+                ('intron_longer_than', '200', False), ('gene_shorter_than', '600', True)]
+        for name, arg, remove in changes:
+            for ctrlr in [table, loaded]:
+                ctrlr.set_filter_remove(name, remove)
+                ctrlr.set_filter_arg(name, arg)
+            self.assertEquals(loaded.stats(), table.stats())
+        if feature_table.numpy is not None:
+            self.assertTrue(table.table_stats())
+
     def test_barfseq_no_args(self):
         pass
         line = ""
@@ -131,6 +231,107 @@ class TestConsoleController(unittest.TestCase):
         result = self.ctrlr.barf_seq("seq1 1 3")
         self.assertEquals("GAT", result)
 
+    def test_barf_gene_tbl_covers_every_seq_with_the_gene(self):
+        self.setup_real_genes()
+        gene = Gene("seq3", "maker", [2, 6], "+", "gene1")
+        gene.mrnas.append(MRNA("gene1-RA", [2, 6], "gene1"))
+        self.ctrlr.add_gene(gene)
+        output = self.ctrlr.barf_gene_tbl("gene1")
+        self.assertTrue(output.startswith(">Feature SeqId\n"))
+        self.assertTrue("1\t5\tgene\n" in output)
+        self.assertTrue("2\t6\tgene\n" in output)
+
+    def test_barf_region(self):
+        self.setup_real_genes()
+        self.assertTrue("gene1-RA" in self.ctrlr.barf_region("seq2 5 9"))
+        self.assertEquals("", self.ctrlr.barf_region("seq2 6 9"))
+        self.assertEquals("Usage: region <seq_id> <start_index> <end_index>\n", self.ctrlr.barf_region("seq2 5"))
+
+    def test_distributions_report(self):
+        self.setup_real_genes()
+        report = self.ctrlr.distributions_report()
+        if distributions.numpy is None:
+            self.assertTrue("NumPy" in report)
+        else:
+            self.assertTrue("Median" in report)
+
+    def test_assembly_report(self):
+        self.setup_seqs()
+        report = self.ctrlr.assembly_report()
+        self.assertTrue("GC content (%)" in report)
+        self.assertTrue("Scaffold N50" in report)
+
+    def test_memory_report(self):
+        self.setup_real_genes()
+        report = self.ctrlr.memory_report()
+        self.assertTrue("Annotation memory" in report)
+        self.assertTrue("Number of mRNAs" in report)
+
+    def test_fixed_seq_is_cached_until_settings_change(self):
+        self.setup_real_genes()
+        seq = self.ctrlr.seqs[1]
+        view = self.ctrlr.fixed_seq(seq)
+        self.assertTrue(view is self.ctrlr.fixed_seq(seq))
+        self.ctrlr.set_filter_arg('gene_shorter_than', '10')
+        self.assertEquals([], self.ctrlr.fixed_seq(seq).genes)
+        self.ctrlr.set_filter_arg('gene_shorter_than', '0')
+        self.ctrlr.add_gene(Gene("seq2", "maker", [2, 4], "+", "gene2"))
+        self.assertEquals(1, len(self.ctrlr.fixed_seq(seq).genes))
+
+    def test_gene_and_mrna_views_copy_only_that_gene(self):
+        self.setup_real_genes()
+        gene = Gene("seq2", "maker", [2, 4], "+", "gene2")
+        gene.mrnas.append(MRNA("gene2-RA", [2, 4], "gene2"))
+        self.ctrlr.add_gene(gene)
+        # Codon fixes can change every gene on the seq
+        self.ctrlr.fix_start_stop_codons()
+        view = self.ctrlr.fixed_gene_view("gene2")
+        self.assertEquals(["gene2"], [g.identifier for g in view.genes])
+        self.assertFalse(view.genes[0] is gene)
+        view = self.ctrlr.fixed_mrna_view("gene1-RA")
+        self.assertEquals(["gene1"], [g.identifier for g in view.genes])
+        self.assertEquals({}, dict(self.ctrlr.fixed_seqs))
+
+    def test_gene_view_uses_cached_seq_view(self):
+        self.setup_real_genes()
+        view = self.ctrlr.fixed_seq(self.ctrlr.seqs[1])
+        self.assertTrue(view is self.ctrlr.fixed_gene_view("gene1"))
+        self.assertTrue(view is self.ctrlr.fixed_mrna_view("gene1-RA"))
+
+    def test_fixed_seq_cache_keeps_most_recently_used(self):
+        self.ctrlr.seqs = [Sequence("seq" + str(i), "ACGT") for i in range(FIXED_SEQ_CACHE_SIZE + 1)]
+        first = self.ctrlr.fixed_seq(self.ctrlr.seqs[0])
+        for seq in self.ctrlr.seqs[1:]:
+            self.ctrlr.fixed_seq(seq)
+            self.ctrlr.fixed_seq(self.ctrlr.seqs[0])
+        self.assertEquals(FIXED_SEQ_CACHE_SIZE, len(self.ctrlr.fixed_seqs))
+        self.assertTrue(first is self.ctrlr.fixed_seq(self.ctrlr.seqs[0]))
+        self.assertFalse(self.ctrlr.seqs[1] in self.ctrlr.fixed_seqs)
+
+    def test_fixed_and_filtered_seqs_leave_cache_alone(self):
+        self.setup_real_genes()
+        view = self.ctrlr.fixed_seq(self.ctrlr.seqs[1])
+        views = list(self.ctrlr.fixed_and_filtered_seqs())
+        self.assertTrue(view is views[1])
+        self.assertEquals([self.ctrlr.seqs[1]], list(self.ctrlr.fixed_seqs))
+
+    def test_fixed_unfiltered_seqs_reused_until_genes_change(self):
+        self.setup_real_genes()
+        views = self.ctrlr.fixed_unfiltered_seqs()
+        self.assertEquals(views, self.ctrlr.fixed_unfiltered_seqs())
+        gene = Gene("seq2", "maker", [2, 4], "+", "gene2")
+        gene.mrnas.append(MRNA("gene2-RA", [2, 4], "gene2"))
+        self.ctrlr.add_gene(gene)
+        again = self.ctrlr.fixed_unfiltered_seqs()
+        self.assertTrue(views[0] is again[0])
+        self.assertFalse(views[1] is again[1])
+        self.assertEquals(2, len(again[1].genes))
+
+    def test_parse_load_args(self):
+        self.assertEquals((".", {}), parse_load_args(""))
+        self.assertEquals(("genome_dir", {}), parse_load_args("genome_dir"))
+        self.assertEquals(("genome_dir", {"fasta": "indexed"}), parse_load_args("genome_dir fasta=indexed"))
+
     def test_can_write_to_path(self):
         self.assertFalse(self.ctrlr.can_write_to_path("src/"))
         self.assertFalse(self.ctrlr.can_write_to_path("gag.py"))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+import unittest
+import os
+import tempfile
+from src.diagnostic_sinks import CountingSink, NullSink, open_sink
+
+class TestDiagnosticSinks(unittest.TestCase):
+
+    def test_counting_sink(self):
+        sink = CountingSink()
+        sink.write("# one\n")
+        sink.write("two\nthree\n")
+        sink.write("no newline at end of file")
+        sink.write("")
+        self.assertEqual(4, sink.count)
+
+    def test_open_sink(self):
+        self.assertEqual(None, open_sink('off'))
+        self.assertTrue(isinstance(open_sink('count'), CountingSink))
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            sink = open_sink(path)
+            sink.write("# comment\n")
+            sink.close()
+            self.assertEqual("# comment\n", open(path).read())
+        finally:
+            os.remove(path)
+
+    def test_null_sink(self):
+        sink = NullSink()
+        sink.write("anything")
+        sink.close()
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestDiagnosticSinks))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+import unittest
+from array import array
+from src.distributions import *
+from src.stats_accumulator import LENGTH_KINDS
+
+@unittest.skipIf(numpy is None, "NumPy isn't installed")
+class TestDistributions(unittest.TestCase):
+
+    def test_n50(self):
+        self.assertEquals((8, 2), n50(numpy.array([2, 3, 4, 5, 8, 8])))
+        self.assertEquals((0, 0), n50(numpy.array([])))
+
+    def test_summarize(self):
+        summary = summarize(as_numpy(array('l', [1, 2, 3, 4, 100])))
+        self.assertEquals(5, summary["Count"])
+        self.assertEquals(3, summary["Median"])
+        self.assertEquals((100, 1), (summary["N50"], summary["L50"]))
+
+    def test_as_numpy_shares_memory_with_64_bit_longs(self):
+        lengths = array('l', [5, 7])
+        result = as_numpy(lengths)
+        self.assertEquals(numpy.int64, result.dtype)
+        self.assertEquals([5, 7], list(result))
+        if lengths.itemsize == 8:
+            lengths[0] = 9
+            self.assertEquals(9, result[0])
+
+    def test_summarize_empty(self):
+        summary = summarize(as_numpy(array('l')))
+        self.assertEquals(0, summary["Count"])
+        self.assertEquals(0, summary["Median"])
+
+    def test_histograms(self):
+        labels, counts = histograms([numpy.array([1, 9, 10, 99, 100, 1000]), numpy.array([])])
+        self.assertEquals(["1-9", "10-99", "100-999", "1000-9999"], labels)
+        self.assertEquals({"1-9": 2, "10-99": 2, "100-999": 1, "1000-9999": 1}, counts[0])
+        self.assertEquals(0, sum(counts[1].values()))
+
+    def test_format_distributions(self):
+        lengths = dict((kind, array('l', [10, 20, 30])) for kind in LENGTH_KINDS)
+        report = format_distributions(lengths)
+        self.assertTrue("Median" in report)
+        self.assertTrue("10-99" in report)
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestDistributions))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import unittest
+from src.edit_plan import EditPlan, OffsetMap, overlap
+from src.sequence import Sequence
+from test.fixtures import make_gene
+
+class TestEditPlan(unittest.TestCase):
+
+    def test_regions_are_sorted_and_merged(self):
+        plan = EditPlan([[20, 25], [1, 3], [22, 30], [31, 32]])
+        self.assertEquals([[1, 3], [20, 30], [31, 32]], plan.regions())
+
+    def test_delete_rejects_backwards_region(self):
+        self.assertRaises(ValueError, EditPlan().delete, 5, 4)
+
+    def test_offset_map(self):
+        offsets = OffsetMap([[3, 4], [10, 12]])
+        self.assertEquals(2, offsets.map(2))
+        self.assertEquals(1, offsets.map(3))
+        self.assertEquals(3, offsets.map(3, False))
+        self.assertEquals(8, offsets.map(13))
+
+    def test_overlap(self):
+        self.assertTrue(overlap([5, 10], [1, 8]))
+        self.assertFalse(overlap([1, 5], [5, 8]))
+
+    def test_apply(self):
+        seq = Sequence("seq1", "NNGATTACAXXXGATTACANN")
+        kept = make_gene("kept", cds=[[13, 19]])
+        doomed = make_gene("doomed", cds=[[8, 14]])
+        seq.genes = [kept, doomed]
+        self.assertEquals(7, EditPlan([[1, 2], [10, 12], [20, 21]]).apply(seq))
+        self.assertEquals("GATTACAGATTACA", seq.bases)
+        self.assertEquals([kept], seq.genes)
+        self.assertEquals([8, 14], kept.indices)
+        self.assertEquals([8, 14], kept.mrnas[0].indices)
+        self.assertEquals([[8, 14]], kept.mrnas[0].cds.indices)
+
+    def test_apply_matches_trim_region(self):
+        planned = Sequence("seq1", "GATTACA" * 10)
+        trimmed = Sequence("seq1", "GATTACA" * 10)
+        for seq in [planned, trimmed]:
+            seq.genes = [make_gene("gene1", cds=[[20, 30]]), make_gene("gene2", cds=[[50, 60]])]
+        EditPlan([[5, 8], [40, 45]]).apply(planned)
+        trimmed.trim_region(40, 45)
+        trimmed.trim_region(5, 8)
+        self.assertEquals(trimmed.bases, planned.bases)
+        self.assertEquals(trimmed.to_gff(), planned.to_gff())
+
+    def test_apply_past_end_does_nothing(self):
+        seq = Sequence("seq1", "GATTACA")
+        self.assertEquals(0, EditPlan([[5, 9]]).apply(seq))
+        self.assertEquals("GATTACA", seq.bases)
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestEditPlan))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
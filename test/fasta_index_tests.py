@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+import unittest
+import copy
+import os
+import shutil
+import tempfile
+from src.fasta_index import FastaIndex, IndexedBases
+from src.fasta_reader import FastaReader
+
+class TestFastaIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fasta_path = os.path.join(self.tmpdir, 'genome.fasta')
+        self.write_fasta('>seq_1 some description\nGATTACAGAT\nTACAGATTAC\nAGA\n' +
+                         '>seq_2\nNNNNNGATTA\nCAnnn\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_fasta(self, text):
+        with open(self.fasta_path, 'wb') as fasta:
+            fasta.write(text)
+
+    def test_build(self):
+        index = FastaIndex(self.fasta_path)
+        entries = index.build()
+        self.assertEquals(2, len(entries))
+        self.assertEquals('seq_1', entries[0].name)
+        self.assertEquals(23, entries[0].length)
+        self.assertEquals(10, entries[0].line_bases)
+        self.assertEquals(11, entries[0].line_width)
+        self.assertEquals('seq_2', entries[1].name)
+        self.assertEquals(15, entries[1].length)
+
+    def test_load_writes_and_reuses_fai(self):
+        index = FastaIndex(self.fasta_path)
+        index.load()
+        self.assertTrue(os.path.isfile(self.fasta_path + '.fai'))
+        reloaded = FastaIndex(self.fasta_path)
+        self.assertTrue(reloaded.index_is_current())
+        reloaded.load()
+        self.assertEquals(['seq_1', 'seq_2'], [e.name for e in reloaded.entries])
+        self.assertEquals(23, reloaded.entries[0].length)
+
+    def test_build_rejects_uneven_lines(self):
+        self.write_fasta('>seq_1\nGATTACA\nGA\nGATTACA\n')
+        index = FastaIndex(self.fasta_path)
+        self.assertRaises(ValueError, index.build)
+
+    def test_build_rejects_uneven_line_endings(self):
+        # Same number of bases per line, but one line is a byte wider
+        self.write_fasta('>seq_1\nGATTACA\nGATTACA\r\nGATTACA\nGA\n')
+        index = FastaIndex(self.fasta_path)
+        self.assertRaises(ValueError, index.build)
+        self.write_fasta('>seq_1\nGATTACA\nGATTACA\r\n')
+        self.assertRaises(ValueError, index.build)
+
+    def test_build_accepts_short_last_line(self):
+        self.write_fasta('>seq_1\r\nGATTACA\r\nGATTACA\r\nGA\n>seq_2\nGA\n')
+        index = FastaIndex(self.fasta_path)
+        entries = index.build()
+        self.assertEquals(16, entries[0].length)
+        self.assertEquals(9, entries[0].line_width)
+        self.assertEquals('TTACAGA', index.read_bases(entries[0], 9, 16))
+
+    def test_read_bases_across_lines(self):
+        index = FastaIndex(self.fasta_path)
+        index.build()
+        self.assertEquals('GATTACAGATTACAGATTACAGA', index.read_bases(index.entries[0], 0, 23))
+        self.assertEquals('ATTACA', index.read_bases(index.entries[0], 8, 14))
+        self.assertEquals('CAnnn', index.read_bases(index.entries[1], 10, 15))
+
+    def test_indexed_bases_behaves_like_string(self):
+        index = FastaIndex(self.fasta_path)
+        index.build()
+        bases = IndexedBases(index, index.entries[1])
+        self.assertEquals(15, len(bases))
+        self.assertEquals('N', bases[0])
+        self.assertEquals('n', bases[-1])
+        self.assertEquals('GATTACA', bases[5:12])
+        self.assertEquals('nnnAC', bases[:9:-1])
+        self.assertEquals('>seq_2\nNNNNNGATTACAnnn', '>seq_2\n' + bases)
+        self.assertEquals('NNNNNGATTACAnnn', str(bases))
+        self.assertTrue(copy.deepcopy(bases) is bases)
+
+    def test_read_indexed(self):
+        reader = FastaReader()
+        seqs = reader.read_indexed(self.fasta_path)
+        self.assertEquals(2, len(seqs))
+        self.assertEquals('seq_1', seqs[0].header)
+        self.assertEquals('ATTA', seqs[0].get_subseq(2, 5))
+        self.assertEquals(3, seqs[1].how_many_Ns_backward(15))
+        self.assertEquals(5, seqs[1].how_many_Ns_forward(1))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestFastaIndex))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,9 @@
 
 import unittest
 import io
-from src.fasta_reader import FastaReader
+import os
+import tempfile
+from src.fasta_reader import FastaReader, find_record_offsets, split_ranges
 from mock import Mock
 
 class TestFastaReader(unittest.TestCase):
@@ -26,7 +28,51 @@ class TestFastaReader(unittest.TestCase):
         self.assertEquals(4, len(self.reader.seqs))
         self.assertEquals('NNNNNNNNGATTACAGATTACAGATTACANNNNNNNNNNN', self.reader.seqs[3].bases)
 
-        
+
+    def test_read_across_block_boundaries(self):
+        text = '>seq_1 first one\r\nGATTACA\r\nGATT\r\n>seq_2\nNNNN\nACGTacgt\n\n>seq_3\nTTT'
+        for block_size in [1, 2, 3, 5, 7, 64]:
+            reader = FastaReader()
+            reader.block_size = block_size
+            reader.read(io.BytesIO(text))
+            self.assertEquals(['seq_1', 'seq_2', 'seq_3'], [seq.header for seq in reader.seqs])
+            self.assertEquals(['GATTACAGATT', 'NNNNACGTacgt', 'TTT'], [seq.bases for seq in reader.seqs])
+
+    def test_read_records_throughput(self):
+        text = '>seq_1\nGATTACA\n'
+        self.reader.read(io.BytesIO(text))
+        self.assertEquals(len(text), self.reader.bytes_read)
+        self.assertTrue(self.reader.throughput_message().startswith("Read 0.0 MB of fasta in "))
+
+    def test_find_record_offsets(self):
+        text = '>seq_1\nGATTACA\n>seq_2\nNNNN\n>seq_3\nTTT'
+        handle, path = tempfile.mkstemp()
+        os.write(handle, text)
+        os.close(handle)
+        try:
+            for block_size in [1, 2, 3, 64]:
+                self.assertEquals([0, 15, 27], find_record_offsets(path, block_size))
+        finally:
+            os.remove(path)
+
+    def test_split_ranges(self):
+        self.assertEquals([(0, 15), (15, 30)], split_ranges([0, 5, 15, 20], 30, 2))
+        self.assertEquals([(0, 30)], split_ranges([0], 30, 4))
+
+    def test_read_parallel_keeps_file_order(self):
+        records = ['>seq_%d desc\n%s\n%s\n' % (i, 'ACGT' * i, 'N' * (i % 3)) for i in range(1, 40)]
+        handle, path = tempfile.mkstemp()
+        os.write(handle, ''.join(records))
+        os.close(handle)
+        try:
+            expected = FastaReader().read(open(path, 'rb'))
+            reader = FastaReader(pack_bases=True)
+            reader.read_parallel(path, 3)
+            self.assertEquals([seq.header for seq in expected], [seq.header for seq in reader.seqs])
+            self.assertEquals([seq.bases for seq in expected], [str(seq.bases) for seq in reader.seqs])
+            self.assertEquals(os.path.getsize(path), reader.bytes_read)
+        finally:
+            os.remove(path)
 
 
 ##########################
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import copy
+import unittest
+from src.feature_table import numpy, build_feature_table, fold_shortest
+from src.filter_manager import FilterManager
+from src.sequence import Sequence
+from src.gene import Gene
+from test.fixtures import make_gene
+
+@unittest.skipIf(numpy is None, "NumPy isn't installed")
+class TestFeatureTable(unittest.TestCase):
+
+    def setUp(self):
+        self.seq1 = Sequence("seq1", "A" * 500)
+        self.seq1.genes = [make_gene("gene1", [[10, 20], [30, 40], [100, 150]], [[15, 20], [30, 35]]),\
+                make_gene("gene2", [[200, 400]], [[210, 390]])]
+        self.seq2 = Sequence("seq2", "C" * 50)
+        self.seq2.genes = [Gene("seq2", "maker", [1, 10], "-", "gene3")]
+        self.seqs = [self.seq1, self.seq2]
+        self.table = build_feature_table(self.seqs)
+
+    def test_columns(self):
+        self.assertEquals([10, 200, 1], list(self.table.genes.start))
+        self.assertEquals([1, 1, -1], list(self.table.genes.strand))
+        self.assertEquals([0, 0, 0, 1], list(self.table.exons.parent))
+        self.assertEquals([12, 181], list(self.table.cds_lengths))
+
+    def test_fold_shortest(self):
+        values = numpy.array([5, 0, 7, 9, 3, 4, 0])
+        groups = numpy.array([0, 0, 0, 0, 1, 1, 2])
+        self.assertEquals([7, 3, 0, 0], list(fold_shortest(values, groups, 4)))
+
+    def test_seq_stats_match_sequence_stats(self):
+        self.assertEquals([seq.stats() for seq in self.seqs], self.table.seq_stats())
+
+    def test_filter_masks_match_filters(self):
+        filter_mgr = FilterManager()
+        filter_mgr.set_filter_arg('cds_shorter_than', '20')
+        gene_mask, mrna_mask = self.table.filter_masks(filter_mgr)
+        self.assertEquals([False, True, False], list(gene_mask))
+        for seq in self.seqs:
+            filter_mgr.apply_filters(seq)
+        self.assertEquals([seq.stats() for seq in self.seqs], self.table.seq_stats(gene_mask, mrna_mask))
+
+    def test_gagflags_match_filtering_copies(self):
+        filter_mgr = FilterManager()
+        changes = [('cds_shorter_than', '20', False), ('gene_longer_than', '100', False),\
+                ('intron_longer_than', '50', False), ('exon_shorter_than', '40', True),\
+                ('gene_shorter_than', '150', True)]
+        for name, arg, remove in changes:
+            filter_mgr.set_filter_arg(name, arg)
+            filter_mgr.set_filter_remove(name, remove)
+            self.assertTrue(self.table.handles(filter_mgr))
+            gene_mask, mrna_mask = self.table.filter_masks(filter_mgr)
+            seqs = copy.deepcopy(self.seqs)
+            for seq in seqs:
+                filter_mgr.apply_filters(seq)
+            self.assertEquals([seq.stats() for seq in seqs], self.table.seq_stats(gene_mask, mrna_mask), name)
+            self.assertEquals([seq.number_of_gagflags() for seq in seqs],\
+                    list(self.table.gagflags(filter_mgr, gene_mask, mrna_mask)), name)
+
+    def test_handles_needs_unique_ids(self):
+        self.seq1.genes.append(make_gene("gene2", [[420, 430]]))
+        self.assertFalse(build_feature_table(self.seqs).handles(FilterManager()))
+
+    def test_to_seqs(self):
+        seqs = self.table.to_seqs()
+        self.assertEquals([seq.to_gff() for seq in self.seqs], [seq.to_gff() for seq in seqs])
+        self.assertFalse(seqs[0].genes[0] is self.seq1.genes[0])
+
+    def test_to_seqs_takes_coordinates_from_columns(self):
+        self.table.genes.start += 1
+        seqs = self.table.to_seqs()
+        self.assertEquals([11, 150], seqs[0].genes[0].indices)
+        self.assertEquals([10, 150], self.seq1.genes[0].indices)
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestFeatureTable))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
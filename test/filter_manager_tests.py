@@ -19,6 +19,14 @@ class TestFilterManager(unittest.TestCase):
         self.filter_mgr.set_filter_arg('cds_shorter_than', '30')
         self.assertFalse(self.filter_mgr.dirty)
 
+    def test_version(self):
+        self.assertEqual(0, self.filter_mgr.version)
+        self.filter_mgr.set_filter_arg('cds_shorter_than', '30')
+        self.filter_mgr.set_filter_arg('cds_shorter_than', '30')
+        self.assertEqual(1, self.filter_mgr.version)
+        self.filter_mgr.set_filter_remove('cds_shorter_than', False)
+        self.assertEqual(2, self.filter_mgr.version)
+
 
 
 
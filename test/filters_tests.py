@@ -390,6 +390,28 @@ class TestFilters(unittest.TestCase):
         
         self.assertEqual(seq.genes, [test_gene0, test_gene1])
 
+###################################################################################################
+
+    def test_measure_matches_flags_mrna(self):
+        mrna = Mock()
+        mrna.cds.length = Mock(return_value=30)
+        mrna.get_shortest_exon = Mock(return_value=10)
+        mrna.get_longest_exon = Mock(return_value=40)
+        mrna.get_shortest_intron = Mock(return_value=0)
+        mrna.get_longest_intron = Mock(return_value=50)
+        for filt in [MinCDSLengthFilter(), MaxCDSLengthFilter(), MinExonLengthFilter(),\
+                MaxExonLengthFilter(), MinIntronLengthFilter(), MaxIntronLengthFilter()]:
+            measure = filt.measure(mrna)
+            for arg in [0, 5, 10, 30, 40, 50, 60]:
+                filt.arg = arg
+                if measure is None:
+                    expected = False
+                elif filt.flags_below:
+                    expected = measure < arg
+                else:
+                    expected = arg > 0 and measure > arg
+                self.assertEqual(expected, bool(filt.flags_mrna(mrna)))
+
 
 
 
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+# Builders for the small genes and seqs the test modules work on
+
+from src.sequence import Sequence
+from src.gene import Gene
+from src.mrna import MRNA
+from src.exon import Exon
+from src.cds import CDS
+
+def make_mrna(name, gene_name, exons=None, cds=None, indices=None):
+    """Returns an mRNA with an exon segment per [start, stop] pair in exons and a CDS
+    segment per pair in cds. It spans indices, or else its exons or CDS."""
+    if indices is None:
+        segments = exons or cds
+        indices = [segments[0][0], segments[-1][1]]
+    mrna = MRNA(name, list(indices), gene_name)
+    if exons:
+        mrna.exon = Exon(identifier=name + ":exon", indices=list(exons[0]), parent_id=name)
+        for i, pair in enumerate(exons[1:]):
+            mrna.exon.add_indices(list(pair))
+            mrna.exon.add_identifier(name + ":exon" + str(i + 1))
+    if cds:
+        mrna.cds = CDS(identifier=name + ":cds", indices=list(cds[0]), strand="+", parent_id=name)
+        for pair in cds[1:]:
+            mrna.cds.add_indices(list(pair))
+            mrna.cds.add_identifier(name + ":cds")
+    return mrna
+
+def make_gene(name, exons=None, cds=None, indices=None, seq_name="seq1"):
+    """Returns a gene on the + strand holding one mRNA, name-RA, built by make_mrna."""
+    mrna = make_mrna(name + "-RA", name, exons, cds, indices)
+    gene = Gene(seq_name, "maker", list(mrna.indices), "+", name)
+    gene.mrnas.append(mrna)
+    return gene
+
+def add_mrna(gene, exons=None, cds=None):
+    """Gives gene its next mRNA (name-RB, name-RC, ...) and stretches the gene over it."""
+    name = gene.identifier + "-R" + chr(ord('A') + len(gene.mrnas))
+    mrna = make_mrna(name, gene.identifier, exons, cds)
+    gene.mrnas.append(mrna)
+    gene.indices = [min(gene.indices[0], mrna.indices[0]), max(gene.indices[1], mrna.indices[1])]
+    return mrna
+
+def make_seq(name, length, gene_count):
+    """Returns a seq of the given length with gene_count genes of one two-exon mRNA each.
+    Gene i is 10 + i bases long."""
+    seq = Sequence(name, "A" * length)
+    for i in range(gene_count):
+        start = i * 20 + 1
+        seq.add_gene(make_gene(name + "_gene" + str(i), [[start, start + 2], [start + 5, start + 9 + i]],\
+                seq_name=name))
+    return seq
@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
+import copy
 import unittest
 from mock import Mock, PropertyMock
 from src.gene import Gene
+from src.gff_attributes import stored_attribute
 
 class TestGene(unittest.TestCase):
 
@@ -24,6 +26,32 @@ class TestGene(unittest.TestCase):
     def test_constructor(self):
         self.assertEqual('Gene', self.test_gene0.__class__.__name__)
 
+    def test_to_gff_keeps_other_attributes(self):
+        gene = Gene(seq_name="sctg_0080_0020", source="maker", indices=[3734, 7436], strand='+',\
+                identifier="g1", raw_attributes="ID=g1;Name=foo;Note=kept;Dbxref=PFAM:PF00001\n")
+        expected = "sctg_0080_0020\tmaker\tgene\t3734\t7436\t.\t+\t.\t"
+        expected += "ID=g1;Name=foo;Dbxref=PFAM:PF00001;Note=kept\n"
+        self.assertEqual(expected, gene.to_gff())
+
+    def test_deepcopy_keeps_attributes_undecoded(self):
+        gene = Gene(seq_name="sctg_0080_0020", source="maker", indices=[3734, 7436], strand='+',\
+                identifier="g1", raw_attributes="ID=g1;Name=foo\n")
+        gene_copy = copy.deepcopy(gene)
+        self.assertEqual(None, stored_attribute(gene_copy, 'annotations'))
+        self.assertEqual('foo', gene_copy.name)
+        gene_copy.indices[0] = 1
+        self.assertEqual([3734, 7436], gene.indices)
+
+    def test_attributes_decoded_lazily(self):
+        gene = Gene(seq_name="sctg_0080_0020", source="maker", indices=[3734, 7436], strand='+',\
+                identifier="g1", raw_attributes="ID=g1;Name=foo;Note=kept;Dbxref=PFAM:PF00001\n")
+        self.assertEqual(None, stored_attribute(gene, 'annotations'))
+        self.assertEqual('foo', gene.name)
+        self.assertEqual([['Dbxref', 'PFAM:PF00001']], gene.annotations)
+        gene.add_annotation('gag_flag', 'short')
+        self.assertTrue(gene.gagflagged())
+        self.assertTrue('Note=kept' in gene.raw_attributes)
+
     def test_length(self):
         self.assertEqual(3703, self.test_gene0.length())
 
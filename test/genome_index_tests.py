@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+import unittest
+from src.genome_index import GenomeIndex
+from src.sequence import Sequence
+from src.gene import Gene
+from src.mrna import MRNA
+
+class TestGenomeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.seq1 = Sequence("seq1", "GATTACA")
+        self.seq2 = Sequence("seq2", "ATTACAGAT")
+        self.gene1 = Gene("seq2", "maker", [1, 5], "+", "gene1")
+        self.mrna1 = MRNA("gene1-RA", [1, 5], "gene1")
+        self.gene1.mrnas.append(self.mrna1)
+        self.seq2.add_gene(self.gene1)
+        self.seqs = [self.seq1, self.seq2]
+        self.index = GenomeIndex(self.seqs)
+
+    def test_get_seq(self):
+        self.assertEquals(self.seq2, self.index.get_seq("seq2"))
+        self.assertEquals(None, self.index.get_seq("seq3"))
+
+    def test_get_gene(self):
+        self.assertEquals((self.seq2, self.gene1), self.index.get_gene("gene1"))
+        self.assertEquals(None, self.index.get_gene("gene2"))
+
+    def test_get_mrna(self):
+        self.assertEquals((self.gene1, self.mrna1), self.index.get_mrna("gene1-RA"))
+        self.assertEquals(None, self.index.get_mrna("gene1-RB"))
+
+    def test_add_gene(self):
+        gene2 = Gene("seq1", "maker", [2, 4], "-", "gene2")
+        gene2.mrnas.append(MRNA("gene2-RA", [2, 4], "gene2"))
+        self.index.add_gene(self.seq1, gene2)
+        self.assertEquals((self.seq1, gene2), self.index.get_gene("gene2"))
+        self.assertEquals(gene2, self.index.get_mrna("gene2-RA")[0])
+
+    def test_first_id_wins(self):
+        dup = Gene("seq1", "maker", [2, 4], "-", "gene1")
+        self.index.add_gene(self.seq1, dup)
+        self.assertEquals((self.seq2, self.gene1), self.index.get_gene("gene1"))
+
+    def test_get_seqs_with_gene(self):
+        self.assertEquals([self.seq2], self.index.get_seqs_with_gene("gene1"))
+        self.assertEquals([], self.index.get_seqs_with_gene("gene2"))
+        self.index.add_gene(self.seq1, Gene("seq1", "maker", [2, 4], "-", "gene1"))
+        self.index.add_gene(self.seq2, Gene("seq2", "maker", [6, 8], "-", "gene1"))
+        self.assertEquals([self.seq1, self.seq2], self.index.get_seqs_with_gene("gene1"))
+
+    def test_covers(self):
+        self.assertTrue(self.index.covers(self.seqs))
+        self.assertFalse(self.index.covers(list(self.seqs)))
+        self.seqs.append(Sequence("seq3", "ACGT"))
+        self.assertFalse(self.index.covers(self.seqs))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestGenomeIndex))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+import unittest
+from src.gff_attributes import decode_attributes, find_attribute, other_attributes
+
+class TestGFFAttributes(unittest.TestCase):
+
+    def test_decode_attributes(self):
+        attr = "ID=mrna1;Name=foo;Parent=gene1;Note=bar;Dbxref=PFAM:PF00001;Ontology_term=GO:0005575;\n"
+        expected = {'identifier': 'mrna1', 'name': 'foo', 'parent_id': 'gene1',\
+                'annotations': [['Dbxref', 'PFAM:PF00001'], ['Ontology_term', 'GO:0005575']]}
+        self.assertEqual(expected, decode_attributes(attr))
+
+    def test_decode_attributes_skips_malformed_pairs(self):
+        self.assertEqual({'parent_id': 'gene1'}, decode_attributes("ID=a=b;Parent=gene1;junk"))
+
+    def test_other_attributes(self):
+        attr = "ID=mrna1;Name=foo;Note=bar;Parent=gene1;Dbxref=PFAM:PF00001;junk;color=red;\n"
+        self.assertEqual(";Note=bar;color=red", other_attributes(attr))
+        self.assertEqual("", other_attributes("ID=mrna1;Parent=gene1"))
+
+    def test_find_attribute(self):
+        attr = "ID=mrna1;Name=foo;Parent=gene1\n"
+        self.assertEqual('mrna1', find_attribute(attr, 'ID'))
+        self.assertEqual('gene1', find_attribute(attr, 'Parent'))
+        self.assertEqual(None, find_attribute("Name=foo", 'ID'))
+
+    def test_find_attribute_matches_decode_attributes(self):
+        attrs = ["ID=x;ID=y", "ID=x;ID=y=z", "ID=a=b", " ID=x ;", "myID=x;Parent=p",\
+                "Parent=p;ID=x;", "ID=;Parent=", "ID=x;;Parent=p;\n"]
+        for attr in attrs:
+            decoded = decode_attributes(attr)
+            self.assertEqual(decoded.get('identifier'), find_attribute(attr, 'ID'))
+            self.assertEqual(decoded.get('parent_id'), find_attribute(attr, 'Parent'))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestGFFAttributes))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
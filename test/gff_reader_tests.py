@@ -3,6 +3,7 @@
 import unittest
 import io
 import os
+import tempfile
 from mock import Mock, patch, PropertyMock
 from src.gff_reader import *
 
@@ -87,14 +88,15 @@ class TestGFFReader(unittest.TestCase):
 
     def test_extract_mrna_args(self):
         line = "scaffold00080\tmaker\tmRNA\t106151\t109853\t.\t+\t.\tID=BDOR_007864-RA;Parent=BDOR_007864\n".split('\t')
-        expected = {'indices': [106151, 109853], 'identifier': 'BDOR_007864-RA', 'strand': '+', 'parent_id': 'BDOR_007864'}
+        expected = {'indices': [106151, 109853], 'identifier': 'BDOR_007864-RA', 'strand': '+', 'parent_id': 'BDOR_007864',\
+                    'raw_attributes': 'ID=BDOR_007864-RA;Parent=BDOR_007864\n'}
         args = self.reader.extract_mrna_args(line)
         self.assertEqual(expected, args)
 
     def test_extract_gene_args(self):
         line = "scaffold00080\tmaker\tgene\t106151\t109853\t.\t+\t.\tID=BDOR_007864\n".split('\t')
         expected = {'seq_name': 'scaffold00080', 'source': 'maker', 'indices': [106151, 109853],\
-                    'strand': '+', 'identifier': 'BDOR_007864'}
+                    'strand': '+', 'identifier': 'BDOR_007864', 'raw_attributes': 'ID=BDOR_007864\n'}
         args = self.reader.extract_gene_args(line)
         self.assertEqual(expected, args)
 
@@ -128,6 +130,16 @@ class TestGFFReader(unittest.TestCase):
         self.assertEquals('BDOR_007864-RA', genes[0].mrnas[0].identifier)
         self.assertEquals([179489, 179691], genes[1].mrnas[0].cds.indices[2])
 
+    def test_read_file_shares_repeated_strings(self):
+        genes = self.reader.read_file(io.BytesIO(self.get_sample_text()))
+        mrna = genes[0].mrnas[0]
+        self.assertTrue(genes[0].seq_name is genes[1].seq_name)
+        self.assertTrue(genes[0].source is genes[1].source)
+        self.assertTrue(mrna.parent_id is genes[0].identifier)
+        self.assertTrue(mrna.exon.parent_id is mrna.identifier)
+        self.assertTrue(mrna.cds.parent_id is mrna.identifier)
+        self.assertTrue(mrna.other_features[0].feature_type is intern('start_codon'))
+
     def get_sample_text(self):
         sample_text = "scaffold00080\tmaker\tgene\t106151\t109853\t.\t+\t.\tID=BDOR_007864\n"
         sample_text += "scaffold00080\tmaker\tmRNA\t106151\t109853\t.\t+\t.\tID=BDOR_007864-RA;Parent=BDOR_007864\n"
@@ -204,6 +216,120 @@ class TestGFFReader(unittest.TestCase):
         genes = self.reader.read_file(inbuff)
         self.assertEqual(1, len(genes))
         
+    def test_read_file_keeps_unplaced_orphans_by_parent(self):
+        text = self.get_out_of_order_text_with_missing_parent()
+        self.reader.read_file(io.BytesIO(text))
+        self.assertEqual(['BDOR_007864-RB'], self.reader.orphans.keys())
+        self.assertEqual(6, len(self.reader.orphans['BDOR_007864-RB']))
+
+    def test_read_file_keeps_children_before_and_after_parent(self):
+        text = "scaffold1\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene1\n"
+        text += "scaffold1\tmaker\tCDS\t60\t90\t.\t+\t1\tID=cds2;Parent=mrna1\n"
+        text += "scaffold1\tmaker\tmRNA\t1\t100\t.\t+\t.\tID=mrna1;Parent=gene1\n"
+        text += "scaffold1\tmaker\tCDS\t10\t40\t.\t+\t0\tID=cds1;Parent=mrna1\n"
+        genes = self.reader.read_file(io.BytesIO(text))
+        cds = genes[0].mrnas[0].cds
+        self.assertEqual([[10, 40], [60, 90]], cds.indices)
+        # Lines that follow their parent are placed first, then the deferred ones
+        self.assertEqual(['cds1', 'cds2'], cds.identifier)
+        self.assertEqual([0, 1], cds.phase)
+        self.assertEqual({}, self.reader.orphans)
+
+    def test_read_by_seqid(self):
+        text = "scaffold1\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene1\n"
+        text += "scaffold1\tmaker\tCDS\t10\t40\t.\t+\t0\tID=cds1;Parent=mrna1\n"
+        text += "scaffold1\tmaker\tmRNA\t1\t100\t.\t+\t.\tID=mrna1;Parent=gene1\n"
+        text += "scaffold2\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene2\n"
+        text += "scaffold2\tmaker\tmRNA\t1\t100\t.\t+\t.\tID=mrna2;Parent=gene2\n"
+        groups = list(self.reader.read_by_seqid(io.BytesIO(text)))
+        self.assertEqual(['scaffold1', 'scaffold2'], [seqid for seqid, genes in groups])
+        self.assertEqual('gene1', groups[0][1][0].identifier)
+        self.assertEqual([[10, 40]], groups[0][1][0].mrnas[0].cds.indices)
+        self.assertEqual('mrna2', groups[1][1][0].mrnas[0].identifier)
+        self.assertEqual({}, self.reader.genes)
+
+    def test_read_by_seqid_unsorted(self):
+        text = "scaffold1\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene1\n"
+        text += "scaffold2\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene2\n"
+        text += "scaffold1\tmaker\tgene\t200\t300\t.\t+\t.\tID=gene3\n"
+        groups = self.reader.read_by_seqid(io.BytesIO(text))
+        self.assertRaises(ValueError, list, groups)
+
+    def write_temp_gff(self, text):
+        handle, path = tempfile.mkstemp(suffix='.gff')
+        os.write(handle, text)
+        os.close(handle)
+        return path
+
+    def test_find_seqid_runs_and_make_shards(self):
+        text = "#comment\nscaffold1\ta\nscaffold1\tb\nscaffold2\tc\nscaffold1\td\n"
+        path = self.write_temp_gff(text)
+        comments = io.BytesIO()
+        try:
+            runs = find_seqid_runs(path, comments)
+        finally:
+            os.remove(path)
+        self.assertEqual("#comment\n", comments.getvalue())
+        self.assertEqual([('scaffold1', 9, 33), ('scaffold2', 33, 45), ('scaffold1', 45, 57)], runs)
+        shards = make_shards(runs, 4)
+        self.assertEqual(2, len(shards))
+        self.assertEqual(['scaffold1'], shards[0]['seqids'])
+        self.assertEqual([(9, 33), (45, 57)], shards[0]['ranges'])
+        self.assertEqual(['scaffold2'], shards[1]['seqids'])
+
+    def test_read_file_parallel(self):
+        text = self.get_out_of_order_text_with_missing_parent()
+        text += "scaffold2\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene2\n"
+        text += "scaffold2\tmaker\tmRNA\t1\t100\t.\t+\t.\tID=mrna2;Parent=gene2\n"
+        text += "scaffold2\tmaker\tUTR\t1\t10\t.\t+\t.\tID=utr2;Parent=mrna2\n"
+        text += "scaffold3\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene3\n"
+        path = self.write_temp_gff(text)
+        try:
+            genes = self.reader.read_file_parallel(path, 2)
+        finally:
+            os.remove(path)
+        self.assertEqual(['BDOR_007864', 'gene2', 'gene3'], sorted([gene.identifier for gene in genes]))
+        self.assertEqual(['BDOR_007864-RB'], self.reader.orphans.keys())
+        self.assertEqual(1, self.reader.skipped_features)
+        counts = {}
+        for shard in self.reader.shards:
+            for seqid in shard['seqids']:
+                counts[seqid] = (shard['skipped_features'], shard['unplaced'])
+        self.assertEqual((0, 6), counts['scaffold00080'])
+        self.assertEqual(open('genome.ignored.gff').read(), "scaffold2\tmaker\tUTR\t1\t10\t.\t+\t.\tID=utr2;Parent=mrna2\n")
+
+    def get_text_with_diagnostics(self):
+        text = "##gff-version 3\n"
+        text += "scaffold1\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene1\n"
+        text += "scaffold1\tmaker\tmRNA\t1\t100\t.\t+\t.\tID=mrna1;Parent=gene1\n"
+        text += "scaffold1\tmaker\tUTR\t1\t10\t.\t+\t.\tID=utr1;Parent=mrna1\n"
+        text += "not a gff line\n"
+        text += "# done\n"
+        return text
+
+    def test_read_file_with_sinks_off(self):
+        for name in ["genome.comments.gff", "genome.invalid.gff", "genome.ignored.gff"]:
+            if os.path.exists(name):
+                os.remove(name)
+        reader = GFFReader({'comments': 'off', 'invalid': 'off', 'ignored': 'off'})
+        genes = reader.read_file(io.BytesIO(self.get_text_with_diagnostics()))
+        self.assertEqual('mrna1', genes[0].mrnas[0].identifier)
+        self.assertEqual(1, reader.skipped_features)
+        self.assertFalse(os.path.exists("genome.comments.gff"))
+        self.assertFalse(os.path.exists("genome.invalid.gff"))
+        self.assertEqual({}, reader.sink_counts)
+
+    def test_read_file_with_counting_and_file_sinks(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            reader = GFFReader({'comments': 'count', 'invalid': 'off', 'ignored': path})
+            reader.read_file(io.BytesIO(self.get_text_with_diagnostics()))
+            self.assertEqual({'comments': 2}, reader.sink_counts)
+            self.assertEqual("scaffold1\tmaker\tUTR\t1\t10\t.\t+\t.\tID=utr1;Parent=mrna1\n", open(path).read())
+        finally:
+            os.remove(path)
+
     def get_annotated_gff(self):
         result = "Scaffold1\tI5K\tgene\t133721\t162851\t.\t-\t.\tID=AGLA000002;Name=AglaTmpM000002;\n"
         result += "Scaffold1\tI5K\tmRNA\t133721\t162851\t.\t-\t.\tID=AGLA000002-RA;Name=AglaTmpM000002-RA;Parent=AGLA000002;Dbxref=PRINTS:PR00075;\n"
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+import unittest
+from src.interval_index import IntervalIndex
+from src.sequence import Sequence
+from test.fixtures import make_gene
+
+class TestIntervalIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.gene1 = make_gene("gene1", [[10, 20], [30, 40]], [[15, 20], [30, 35]])
+        self.gene2 = make_gene("gene2", [[50, 200]], [[60, 190]])
+        self.gene3 = make_gene("gene3", [[100, 120]], [[105, 115]])
+        self.genes = [self.gene1, self.gene2, self.gene3]
+        self.index = IntervalIndex(self.genes)
+
+    def test_query_kinds(self):
+        hits = self.index.query(21, 29)
+        self.assertEquals(['gene', 'mRNA'], [hit.kind for hit in hits])
+        hits = self.index.query(36, 40, ['exon', 'CDS'])
+        self.assertEquals([('exon', [30, 40])], [(hit.kind, hit.indices()) for hit in hits])
+
+    def test_query_finds_long_feature_behind_short_ones(self):
+        self.assertEquals([self.gene2, self.gene3], self.index.genes_overlapping(110, 110))
+        self.assertEquals([self.gene2], self.index.genes_overlapping(125, 199))
+
+    def test_query_is_inclusive(self):
+        self.assertEquals([self.gene1], self.index.genes_overlapping(1, 10))
+        self.assertEquals([], self.index.genes_overlapping(1, 9))
+        self.assertEquals([], self.index.genes_overlapping(201, 300))
+
+    def test_query_skips_removed_mrna(self):
+        self.gene2.mrnas = []
+        self.assertEquals(['gene'], [hit.kind for hit in self.index.query(150, 160)])
+
+    def test_trim_matches_rebuild(self):
+        seq = Sequence("seq1", "A" * 250)
+        for gene in self.genes:
+            seq.add_gene(gene)
+        seq.feature_index()
+        seq.trim_region(45, 55)
+        self.assertEquals([self.gene1, self.gene3], seq.genes)
+        rebuilt = IntervalIndex(seq.genes)
+        self.assertEquals(rebuilt.starts, seq.interval_index.starts)
+        self.assertEquals(rebuilt.stops, seq.interval_index.stops)
+        self.assertEquals(rebuilt.max_stops, seq.interval_index.max_stops)
+        self.assertEquals([self.gene3], seq.genes_in_region(89, 95))
+
+    def test_trim_keeps_starts_sorted(self):
+        # gene5 spans exactly the cut, so it's kept and moves left of gene4
+        seq = Sequence("seq1", "A" * 100)
+        gene4 = make_gene("gene4", [[43, 45]], [[43, 45]])
+        gene5 = make_gene("gene5", [[46, 50]], [[46, 50]])
+        seq.genes = [gene4, gene5]
+        seq.feature_index()
+        seq.trim_region(46, 50)
+        self.assertEquals(sorted(seq.interval_index.starts), seq.interval_index.starts)
+        rebuilt = IntervalIndex(seq.genes)
+        self.assertEquals([(hit.kind, hit.gene) for hit in rebuilt.query(41, 42)],\
+                [(hit.kind, hit.gene) for hit in seq.features_in_region(41, 42)])
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestIntervalIndex))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
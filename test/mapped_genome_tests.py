@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+import unittest
+import gzip
+import os
+import shutil
+import tempfile
+import src.mapped_genome as mapped_genome
+from src.mapped_genome import MappedGenome, MappedBases
+from src.fasta_reader import FastaReader
+from src.seq_helper import SeqHelper
+
+class TestMappedGenome(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fasta_path = os.path.join(self.tmpdir, 'genome.fasta')
+        with open(self.fasta_path, 'wb') as fasta:
+            fasta.write('>seq_1 some description\nGATTACAGAT\nTACAGATTAC\nAGA\n' +
+                        '>seq_2\nNNNNNGAT\nTACAnnn\n')
+        self.genome = MappedGenome(self.fasta_path)
+
+    def tearDown(self):
+        self.genome.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_build_writes_flat_file(self):
+        self.genome.build()
+        with open(self.fasta_path + '.flat', 'rb') as flat:
+            self.assertEquals('GATTACAGATTACAGATTACAGA\nNNNNNGATTACAnnn\n', flat.read())
+        self.assertEquals(['seq_1', 'seq_2'], [e.name for e in self.genome.entries])
+        self.assertEquals(24, self.genome.entries[1].offset)
+        self.assertEquals(15, self.genome.entries[1].length)
+
+    def test_build_matches_gzipped_fasta(self):
+        text = 'junk\n>seq_1\r\nGAT\r\n\nTA CA\n>empty\n>seq_2 x\nNNG\nAT'
+        with open(self.fasta_path, 'wb') as fasta:
+            fasta.write(text)
+        gzipped_path = os.path.join(self.tmpdir, 'genome.gz.fasta')
+        gzipped = gzip.open(gzipped_path, 'wb')
+        gzipped.write(text)
+        gzipped.close()
+        block_size = mapped_genome.BLOCK_SIZE
+        mapped_genome.BLOCK_SIZE = 2
+        try:
+            entries = self.genome.build()
+        finally:
+            mapped_genome.BLOCK_SIZE = block_size
+        other = MappedGenome(gzipped_path)
+        other_entries = other.build()
+        with open(self.fasta_path + '.flat', 'rb') as flat:
+            self.assertEquals('GATTACA\n\nNNGAT\n', flat.read())
+        self.assertEquals([e.to_fai() for e in other_entries], [e.to_fai() for e in entries])
+        self.assertEquals(['seq_1', 'empty', 'seq_2'], [e.name for e in entries])
+        self.assertEquals(9, entries[2].offset)
+
+    def test_load_reuses_current_flat_file(self):
+        self.genome.load()
+        self.genome.close()
+        reloaded = MappedGenome(self.fasta_path)
+        self.assertTrue(reloaded.flat_file_is_current())
+        entries = reloaded.load()
+        self.assertEquals(23, entries[0].length)
+        self.assertEquals('CAnnn', reloaded.read_bases(entries[1], 10, 15))
+        reloaded.close()
+
+    def test_mapped_bases(self):
+        entries = self.genome.load()
+        bases = MappedBases(self.genome, entries[0])
+        self.assertEquals(23, len(bases))
+        self.assertEquals('ATTA', bases[1:5])
+        self.assertEquals('A', bases[-1])
+
+    def test_seq_helper_on_mapped_bases(self):
+        entries = self.genome.load()
+        helper = SeqHelper(MappedBases(self.genome, entries[1]))
+        self.assertEquals('GATTACA', helper.get_sequence_from_indices('+', [[6, 8], [9, 12]]))
+        self.assertEquals('TGTAATC', helper.get_sequence_from_indices('-', [[6, 8], [9, 12]]))
+
+    def test_read_mapped(self):
+        reader = FastaReader()
+        seqs = reader.read_mapped(self.fasta_path)
+        self.assertEquals(2, len(seqs))
+        self.assertEquals('seq_2', seqs[1].header)
+        self.assertEquals('GATTACA', seqs[1].get_subseq(6, 12))
+        seqs[0].bases.genome.close()
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestMappedGenome))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
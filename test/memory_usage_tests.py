@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+import sys
+import unittest
+from src.memory_usage import *
+from src.sequence import Sequence
+from src.gene import Gene
+from src.cds import CDS
+
+class TestMemoryUsage(unittest.TestCase):
+
+    def test_deep_size_follows_containers(self):
+        inner = [1, 2, 3]
+        self.assertTrue(deep_size([inner]) > deep_size(inner))
+
+    def test_deep_size_counts_shared_objects_once(self):
+        inner = ["a" * 1000]
+        self.assertTrue(deep_size([inner, inner]) < 2 * deep_size(inner))
+
+    def test_deep_size_follows_inherited_slots(self):
+        cds = CDS(identifier="cds1", indices=[[1, 10]], phase=[0])
+        small = deep_size(cds)
+        cds.phase = [0] * 1000
+        self.assertTrue(deep_size(cds) > small)
+
+    def test_annotation_size_leaves_out_bases(self):
+        seq = Sequence("seq1", "A" * 100000)
+        seq.genes = [Gene("seq1", "maker", [1, 100], "+", "gene1")]
+        self.assertTrue(0 < annotation_size([seq]) < 100000)
+
+    def test_shared_strings(self):
+        seq = Sequence("seq1", "")
+        seq.genes = [Gene("seq1", "maker", [1, 100], "+", "gene1"), Gene("seq1", "maker", [1, 100], "+", "gene2")]
+        self.assertEquals((8, 5), shared_strings([seq]))
+
+    def test_format_bytes(self):
+        self.assertEquals("512 bytes", format_bytes(512))
+        self.assertEquals("1.5 KB", format_bytes(1536))
+        self.assertEquals("2.0 MB", format_bytes(2 * 1024 * 1024))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestMemoryUsage))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -101,6 +101,13 @@ class TestMRNA(unittest.TestCase):
         self.fake_cds.to_gff.assert_called_with("sctg_0080_0020", "maker")
         self.fake_start_codon.to_gff.assert_called_with("sctg_0080_0020", "maker")
 
+    def test_to_gff_keeps_other_attributes(self):
+        mrna = MRNA(identifier="m1", indices=[10, 20], parent_id="g1",\
+                raw_attributes="ID=m1;Parent=g1;Note=kept;Ontology_term=GO:0005575\n")
+        expected = "seq1\tmaker\tmRNA\t10\t20\t.\t+\t.\t"
+        expected += "ID=m1;Parent=g1;Ontology_term=GO:0005575;Note=kept\n"
+        self.assertEquals(expected, mrna.to_gff(seq_name="seq1", source="maker"))
+
     def test_indices_intersect_mrna_false(self):
         mrna = MRNA(identifier=1, indices=[10, 20], parent_id='foo')
         self.assertFalse(mrna.indices_intersect_mrna([5, 9]))
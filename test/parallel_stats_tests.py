@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+import unittest
+from src.parallel_stats import *
+from src.seq_fixer import SeqFixer
+from src.filter_manager import FilterManager
+from src.stats_manager import StatsManager
+from test.fixtures import make_seq
+
+class TestParallelStats(unittest.TestCase):
+
+    def setUp(self):
+        self.seqs = [make_seq("seq1", 100, 2), make_seq("seq2", 400, 5), make_seq("seq3", 250, 3)]
+
+    def test_largest_first(self):
+        self.assertEquals([1, 2, 0], largest_first(self.seqs))
+
+    def test_parallel_seq_stats_match_serial(self):
+        serial = StatsManager()
+        for seq in self.seqs:
+            serial.update_ref(seq.stats())
+        parallel = StatsManager()
+        for stats, gagflags in parallel_seq_stats(self.seqs, 2):
+            parallel.update_ref(stats)
+        self.assertEquals(serial.ref_stats, parallel.ref_stats)
+        self.assertEquals({}, JOBS)
+
+    def test_parallel_seq_stats_with_filters(self):
+        filter_mgr = FilterManager()
+        filter_mgr.set_filter_arg('gene_shorter_than', '13')
+        results = list(parallel_seq_stats(self.seqs, 2, SeqFixer(), filter_mgr))
+        # Genes 10, 11 and 12 bases long are removed; the seqs themselves are untouched
+        self.assertEquals(2, sum([stats["Number of genes"] for stats, gagflags in results]))
+        self.assertEquals(5, len(self.seqs[1].genes))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestParallelStats))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
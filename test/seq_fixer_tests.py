@@ -2,6 +2,7 @@
 
 import unittest
 from src.seq_fixer import SeqFixer
+from src.sequence import Sequence
 
 class TestSeqFixer(unittest.TestCase):
 
@@ -25,6 +26,22 @@ class TestSeqFixer(unittest.TestCase):
     def test_dirty(self):
         self.assertFalse(self.fixer.dirty)
 
+    def test_version(self):
+        self.fixer.fix_terminal_ns()
+        self.fixer.fix_terminal_ns()
+        self.assertEquals(1, self.fixer.version)
+        self.fixer.fix_start_stop_codons()
+        self.assertEquals(2, self.fixer.version)
+
+    def test_first_changed_base(self):
+        seq = Sequence("seq1", "GATTACANN")
+        self.assertEquals(None, self.fixer.first_changed_base(seq))
+        self.fixer.fix_terminal_ns()
+        self.assertEquals((0, 2), self.fixer.terminal_n_counts(seq))
+        self.assertEquals(8, self.fixer.first_changed_base(seq))
+        self.fixer.fix_start_stop_codons()
+        self.assertEquals(1, self.fixer.first_changed_base(seq))
+
 
 ##########################
 def suite():
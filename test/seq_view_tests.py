@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+import unittest
+from src.seq_view import fixed_view, fixed_copy, with_shared_ids, last_base
+from src.sequence import Sequence
+from src.seq_fixer import SeqFixer
+from src.filter_manager import FilterManager
+from test.fixtures import make_gene
+
+class TestSeqView(unittest.TestCase):
+
+    def setUp(self):
+        self.seq = Sequence("seq1", "NNGATTACAGATTACAGATTACAGATTACANNN")
+        self.short = make_gene("short", cds=[[3, 8]], indices=[3, 10])
+        self.long = make_gene("long", cds=[[11, 28]], indices=[11, 30])
+        self.seq.genes = [self.short, self.long]
+        self.fixer = SeqFixer()
+        self.filter_mgr = FilterManager()
+
+    def test_last_base(self):
+        self.assertEquals(30, last_base(self.long))
+        self.long.mrnas[0].cds.indices[0][1] = 31
+        self.assertEquals(31, last_base(self.long))
+
+    def test_fixed_view_shares_untouched_genes(self):
+        self.filter_mgr.set_filter_arg('cds_shorter_than', '10')
+        view = fixed_view(self.seq, self.fixer, self.filter_mgr)
+        self.assertEquals([self.long], view.genes)
+        self.assertEquals(1, len(view.removed_genes))
+        self.assertEquals([self.short, self.long], self.seq.genes)
+        self.assertEquals([], self.short.mrnas[0].cds.annotations)
+
+    def test_fixed_view_copies_shifted_genes(self):
+        self.fixer.fix_terminal_ns()
+        view = fixed_view(self.seq, self.fixer, self.filter_mgr)
+        self.assertEquals("GATTACAGATTACAGATTACAGATTACA", view.bases)
+        self.assertEquals([1, 8], view.genes[0].indices)
+        self.assertEquals([3, 10], self.short.indices)
+
+    def test_fixed_copy_with_no_genes(self):
+        self.fixer.fix_terminal_ns()
+        self.assertEquals("GAT", fixed_copy(self.seq, [], self.fixer, self.filter_mgr).get_subseq(1, 3))
+
+    def test_with_shared_ids(self):
+        twin = make_gene("short", cds=[[20, 22]], indices=[20, 25])
+        self.seq.genes.append(twin)
+        self.assertEquals([self.short, twin], with_shared_ids(self.seq, [twin]))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestSeqView))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,10 @@
 import unittest
 from mock import Mock
 from src.sequence import Sequence
+from src.gene import Gene
+from src.mrna import MRNA
+from src.exon import Exon
+from src.cds import CDS
 
 class TestSequence(unittest.TestCase):
 
@@ -207,36 +211,64 @@ class TestSequence(unittest.TestCase):
         expected += "mockgene to tbl"
         self.assertEquals(tbl, expected)
 
+    def add_real_genes(self):
+        gene1 = Gene("seq1", "maker", [1, 20], "+", "gene1")
+        mrna = MRNA("gene1-RA", [1, 10], "gene1")
+        mrna.exon = Exon(identifier="gene1-RA:exon", indices=[1, 5], parent_id="gene1-RA")
+        mrna.exon.add_indices([11, 15])
+        mrna.exon.add_indices([21, 30])
+        mrna.cds = CDS(identifier="gene1-RA:cds", indices=[2, 4], phase=0, strand="+", parent_id="gene1-RA")
+        mrna.cds.add_indices([11, 13])
+        mrna.add_start_codon([2, 4])
+        mrna.add_stop_codon([11, 13])
+        gene1.mrnas.append(mrna)
+        gene2 = Gene("seq1", "maker", [5, 14], "+", "gene2")
+        gene2.mrnas.append(MRNA("gene2-RA", [5, 9], "gene2"))
+        mrna = MRNA("gene2-RB", [5, 6], "gene2")
+        mrna.exon = Exon(identifier="gene2-RB:exon", indices=[1, 4], parent_id="gene2-RB")
+        mrna.exon.add_indices([20, 23])
+        mrna.cds = CDS(identifier="gene2-RB:cds", indices=[1, 3], phase=0, strand="+", parent_id="gene2-RB")
+        mrna.add_stop_codon([1, 3])
+        gene2.mrnas.append(mrna)
+        self.seq1.genes = [gene1, gene2]
+
     def test_stats(self):
-        self.add_mock_gene_with_1_mrna("foo_gene1")
-        self.add_mock_gene_with_2_mrnas("foo_gene2")
+        self.add_real_genes()
         stats = self.seq1.stats()
         self.assertEquals(stats["Total sequence length"], 7)
         self.assertEquals(stats["Number of genes"], 2)
         self.assertEquals(stats["Number of mRNAs"], 3)
-        self.assertEquals(stats["Number of exons"], 9)
-        self.assertEquals(stats["Number of introns"], 7)
+        self.assertEquals(stats["Number of exons"], 5)
+        self.assertEquals(stats["Number of introns"], 3)
         self.assertEquals(stats["Number of CDS"], 2)
         self.assertEquals(stats["CDS: complete"], 1)
-        self.assertEquals(stats["CDS: start, no stop"], 1)
-        self.assertEquals(stats["CDS: stop, no start"], 2)
-        self.assertEquals(stats["CDS: no stop, no start"], 2)
+        self.assertEquals(stats["CDS: start, no stop"], 0)
+        self.assertEquals(stats["CDS: stop, no start"], 1)
+        self.assertEquals(stats["CDS: no stop, no start"], 1)
         self.assertEquals(stats["Longest gene"], 20)
-        self.assertEquals(stats["Longest mRNA"], 5)
-        self.assertEquals(stats["Longest exon"], 20)
-        self.assertEquals(stats["Longest intron"], 20)
-        self.assertEquals(stats["Longest CDS"], 5)
+        self.assertEquals(stats["Longest mRNA"], 10)
+        self.assertEquals(stats["Longest exon"], 10)
+        self.assertEquals(stats["Longest intron"], 17)
+        self.assertEquals(stats["Longest CDS"], 6)
         self.assertEquals(stats["Shortest gene"], 10)
         self.assertEquals(stats["Shortest mRNA"], 2)
-        self.assertEquals(stats["Shortest exon"], 5)
-        self.assertEquals(stats["Shortest intron"], 5)
+        self.assertEquals(stats["Shortest exon"], 4)
+        self.assertEquals(stats["Shortest intron"], 7)
         self.assertEquals(stats["Shortest CDS"], 3)
         self.assertEquals(stats["Total gene length"], 30)
-        self.assertEquals(stats["Total mRNA length"], 9)
-        self.assertEquals(stats["Total exon length"], 40)
-        self.assertEquals(stats["Total intron length"], 40)
-        self.assertEquals(stats["Total CDS length"], 8)
+        self.assertEquals(stats["Total mRNA length"], 17)
+        self.assertEquals(stats["Total exon length"], 28)
+        self.assertEquals(stats["Total intron length"], 31)
+        self.assertEquals(stats["Total CDS length"], 9)
 
+    def test_stats_match_get_methods(self):
+        self.add_real_genes()
+        stats = self.seq1.stats()
+        self.assertEquals(self.seq1.get_num_exons(), stats["Number of exons"])
+        self.assertEquals(self.seq1.get_shortest_exon(), stats["Shortest exon"])
+        self.assertEquals(self.seq1.get_shortest_intron(), stats["Shortest intron"])
+        self.assertEquals(self.seq1.get_total_intron_length(), stats["Total intron length"])
+        self.assertEquals(self.seq1.get_shortest_cds(), stats["Shortest CDS"])
 
 
 ##########################
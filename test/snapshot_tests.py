@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+import unittest
+import os
+import shutil
+import tempfile
+from src.snapshot import snapshot_path, snapshot_key, load_snapshot, save_snapshot
+from src.console_controller import ConsoleController
+from src.sequence import Sequence
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for name in ['genome.fasta', 'genome.gff']:
+            shutil.copy(os.path.join('walkthrough/basic', name), self.tmpdir)
+        self.paths = [os.path.join(self.tmpdir, name) for name in ['genome.fasta', 'genome.gff']]
+        # Keep snapshots out of the real cache
+        self.old_cache = os.environ.get('XDG_CACHE_HOME')
+        os.environ['XDG_CACHE_HOME'] = os.path.join(self.tmpdir, 'cache')
+        self.snapshot_path = snapshot_path(self.tmpdir)
+        self.options = {'fasta': 'memory'}
+
+    def tearDown(self):
+        if self.old_cache is None:
+            del os.environ['XDG_CACHE_HOME']
+        else:
+            os.environ['XDG_CACHE_HOME'] = self.old_cache
+        shutil.rmtree(self.tmpdir)
+        # Remove extra files created by GFFReader
+        for name in ["genome.comments.gff", "genome.invalid.gff", "genome.ignored.gff"]:
+            if os.path.exists(name):
+                os.remove(name)
+
+    def test_snapshot_path_is_private(self):
+        cache = os.path.dirname(self.snapshot_path)
+        self.assertEquals(os.path.join(self.tmpdir, 'cache', 'gag'), cache)
+        self.assertEquals(0, os.stat(cache).st_mode & 0077)
+
+    def test_save_and_load(self):
+        key = snapshot_key(self.paths, self.options)
+        save_snapshot(self.snapshot_path, key, {'seqs': [Sequence('seq1', 'GATTACA')]})
+        self.assertEquals(0, os.stat(self.snapshot_path).st_mode & 0077)
+        data = load_snapshot(self.snapshot_path, key)
+        self.assertEquals('GATTACA', data['seqs'][0].bases)
+
+    def test_load_missing_or_stale(self):
+        key = snapshot_key(self.paths, self.options)
+        self.assertEquals(None, load_snapshot(self.snapshot_path, key))
+        save_snapshot(self.snapshot_path, key, {'seqs': []})
+        self.assertEquals(None, load_snapshot(self.snapshot_path,\
+                snapshot_key(self.paths, {'fasta': 'twobit'})))
+        with open(self.paths[1], 'a') as gff:
+            gff.write("# one more comment\n")
+        self.assertEquals(None, load_snapshot(self.snapshot_path, snapshot_key(self.paths, self.options)))
+
+    def test_load_corrupt(self):
+        with open(self.snapshot_path, 'wb') as snapshot:
+            snapshot.write("not a pickle")
+        self.assertEquals(None, load_snapshot(self.snapshot_path, snapshot_key(self.paths, self.options)))
+
+    def test_load_writable_by_others(self):
+        key = snapshot_key(self.paths, self.options)
+        save_snapshot(self.snapshot_path, key, {'seqs': []})
+        os.chmod(self.snapshot_path, 0666)
+        self.assertEquals(None, load_snapshot(self.snapshot_path, key))
+        os.chmod(self.snapshot_path, 0600)
+        os.chmod(os.path.dirname(self.snapshot_path), 0777)
+        self.assertEquals(None, load_snapshot(self.snapshot_path, key))
+
+    def test_load_folder_restores_snapshot(self):
+        parsed = ConsoleController()
+        parsed.load_folder(self.tmpdir + " snapshot=on")
+        self.assertTrue(os.path.isfile(self.snapshot_path))
+        restored = ConsoleController()
+        restored.read_fasta = None # Restoring mustn't parse anything
+        restored.load_folder(self.tmpdir + " snapshot=on")
+        self.assertEquals(parsed.seqs[0].to_gff(), restored.seqs[0].to_gff())
+        self.assertEquals(parsed.stats(), restored.stats())
+
+    def test_load_folder_snapshot_is_opt_in(self):
+        ConsoleController().load_folder(self.tmpdir)
+        self.assertFalse(os.path.exists(self.snapshot_path))
+        self.assertEquals(['genome.fasta', 'genome.gff'],\
+                sorted([name for name in os.listdir(self.tmpdir) if name.startswith('genome')]))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestSnapshot))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import unittest
+from src.stats_accumulator import *
+from src.gene import Gene
+from src.mrna import MRNA
+from test.fixtures import make_mrna
+
+class TestStatsAccumulator(unittest.TestCase):
+
+    def setUp(self):
+        self.accumulator = StatsAccumulator()
+
+    def test_shorter(self):
+        self.assertEquals(5, shorter(0, 5))
+        self.assertEquals(3, shorter(5, 3))
+        self.assertEquals(5, shorter(5, 8))
+        self.assertEquals(0, shorter(0, 0))
+
+    def test_add_exons(self):
+        self.assertEquals((5, 7), self.accumulator.add_exons([[1, 10], [16, 20], [40, 50]]))
+        self.assertEquals(3, self.accumulator.exons)
+        self.assertEquals(2, self.accumulator.introns)
+        self.assertEquals(26, self.accumulator.total_exon_length)
+        self.assertEquals(28, self.accumulator.total_intron_length)
+        self.assertEquals(21, self.accumulator.longest_intron)
+
+    def test_shortest_exon_keeps_the_old_fold(self):
+        # An mRNA without exons resets a gene's shortest exon to 0, as gene.get_shortest_exon does
+        gene = Gene("seq1", "maker", [1, 100], "+", "gene1")
+        gene.mrnas = [make_mrna("gene1-RA", "gene1", [[1, 10]]), MRNA("gene1-RB", [1, 100], "gene1")]
+        self.accumulator.add_gene(gene)
+        self.assertEquals(gene.get_shortest_exon(), self.accumulator.shortest_exon)
+        self.assertEquals(0, self.accumulator.shortest_exon)
+        other = Gene("seq1", "maker", [1, 100], "+", "gene2")
+        other.mrnas = [make_mrna("gene2-RA", "gene2", [[1, 4], [10, 20]])]
+        self.accumulator.add_gene(other)
+        self.assertEquals(4, self.accumulator.shortest_exon)
+
+    def test_counts_gagflags(self):
+        gene = Gene("seq1", "maker", [1, 100], "+", "gene1")
+        gene.add_annotation("gag_flag", "foo")
+        gene.mrnas = [make_mrna("gene1-RA", "gene1", [[1, 10]])]
+        gene.mrnas[0].exon.add_annotation("gag_flag", "bar")
+        self.accumulator.add_gene(gene)
+        self.assertEquals(gene.number_of_gagflags(), self.accumulator.gagflags)
+
+    def test_collect_lengths(self):
+        self.assertEquals(None, self.accumulator.lengths)
+        accumulator = StatsAccumulator(collect_lengths=True)
+        gene = Gene("seq1", "maker", [1, 100], "+", "gene1")
+        gene.mrnas = [make_mrna("gene1-RA", "gene1", [[1, 10], [16, 20]])]
+        accumulator.add_gene(gene)
+        self.assertEquals([100], list(accumulator.lengths['gene']))
+        self.assertEquals([20], list(accumulator.lengths['mRNA']))
+        self.assertEquals([10, 5], list(accumulator.lengths['exon']))
+        self.assertEquals([7], list(accumulator.lengths['intron']))
+        self.assertEquals([], list(accumulator.lengths['CDS']))
+
+    def test_stats_when_empty(self):
+        stats = self.accumulator.stats(100)
+        self.assertEquals(100, stats["Total sequence length"])
+        self.assertEquals(0, stats["Shortest gene"])
+        self.assertEquals(0, stats["Shortest CDS"])
+        self.assertEquals(25, len(stats))
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestStatsAccumulator))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+import unittest
+import io
+import src.twobit
+from src.twobit import TwoBitBases
+from src.sequence import Sequence
+from src.fasta_reader import FastaReader
+
+class TestTwoBitBases(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = 'NNnNNGATTACAgattacaRYNNNacgtnnnGATTACA'
+        self.bases = TwoBitBases(self.raw)
+
+    def test_round_trip(self):
+        self.assertEquals(len(self.raw), len(self.bases))
+        self.assertEquals(self.raw, str(self.bases))
+
+    def test_round_trip_every_window(self):
+        for start in range(len(self.raw)):
+            for stop in range(start, len(self.raw)+1):
+                self.assertEquals(self.raw[start:stop], self.bases[start:stop])
+
+    def test_packs_four_bases_per_byte(self):
+        self.assertEquals(10, len(self.bases.packed))
+
+    def test_run_tables(self):
+        self.assertEquals([0, 21, 28], list(self.bases.n_starts))
+        self.assertEquals([5, 3, 3], list(self.bases.n_sizes))
+        self.assertEquals([2, 12, 24], list(self.bases.mask_starts))
+        self.assertEquals('RY', self.bases.other_bases)
+
+    def test_runs_joined_across_chunks(self):
+        chunk_size = src.twobit.CHUNK_SIZE
+        src.twobit.CHUNK_SIZE = 4
+        try:
+            bases = TwoBitBases(self.raw)
+        finally:
+            src.twobit.CHUNK_SIZE = chunk_size
+        self.assertEquals(self.bases.packed, bases.packed)
+        self.assertEquals(list(self.bases.n_sizes), list(bases.n_sizes))
+        self.assertEquals(list(self.bases.mask_sizes), list(bases.mask_sizes))
+        self.assertEquals(list(self.bases.other_positions), list(bases.other_positions))
+        self.assertEquals(self.raw, str(bases))
+
+    def test_packs_without_numpy(self):
+        numpy = src.twobit.numpy
+        src.twobit.numpy = None
+        try:
+            bases = TwoBitBases(self.raw)
+        finally:
+            src.twobit.numpy = numpy
+        self.assertEquals(self.bases.packed, bases.packed)
+        self.assertEquals(list(self.bases.n_starts), list(bases.n_starts))
+        self.assertEquals(list(self.bases.mask_sizes), list(bases.mask_sizes))
+        self.assertEquals(list(self.bases.other_positions), list(bases.other_positions))
+        self.assertEquals(self.raw, str(bases))
+
+    def test_n_run_forward(self):
+        self.assertEquals(5, self.bases.n_run_forward(0))
+        self.assertEquals(2, self.bases.n_run_forward(3))
+        self.assertEquals(0, self.bases.n_run_forward(5))
+
+    def test_n_run_backward(self):
+        self.assertEquals(3, self.bases.n_run_backward(30))
+        self.assertEquals(1, self.bases.n_run_backward(21))
+        self.assertEquals(0, self.bases.n_run_backward(20))
+
+    def test_sequence_counts_ns_from_run_table(self):
+        seq = Sequence('seq1', TwoBitBases('NNnNNGATTACAnNN'))
+        self.assertEquals(5, seq.how_many_Ns_forward(1))
+        self.assertEquals(3, seq.how_many_Ns_backward(15))
+        self.assertEquals(0, seq.how_many_Ns_forward(6))
+
+    def test_sequence_remove_terminal_ns(self):
+        seq = Sequence('seq1', TwoBitBases('nnGATTACAnNNn'))
+        seq.remove_terminal_ns()
+        self.assertEquals("GATTACA", seq.bases)
+
+    def test_fasta_reader_packs_bases(self):
+        reader = FastaReader(pack_bases=True)
+        reader.read(io.BytesIO('>seq_1\nGATTACA\nnnnn\n>seq_2\nACGT\n'))
+        self.assertTrue(isinstance(reader.seqs[0].bases, TwoBitBases))
+        self.assertEquals('GATTACAnnnn', str(reader.seqs[0].bases))
+        self.assertEquals('ACGT', reader.seqs[1].get_subseq())
+
+
+##########################
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestTwoBitBases))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()